@@ -0,0 +1,7 @@
+"""fastapi-payfast benchmark suites
+
+Run from the repository root::
+
+    python -m benchmarks run --output current.json
+    python -m benchmarks compare benchmarks/baselines/time.json current.json --threshold 10
+"""
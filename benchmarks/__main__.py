@@ -0,0 +1,68 @@
+"""Benchmark command line interface"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from . import bench_import, bench_memory, bench_time  # noqa: F401 - register the suites
+from .harness import SUITES, compare, load, run_suite, save
+
+
+def _print_comparisons(comparisons, threshold: float, stream) -> int:
+    regressions = 0
+    for item in comparisons:
+        flag = ""
+        if item.change_pct > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{item.name:<32} {item.metric:<24} {item.baseline:>14,.1f} -> {item.current:>14,.1f}"
+            f"  {item.change_pct:+7.1f}%{flag}",
+            file=stream,
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a benchmark suite")
+    run.add_argument("--suite", choices=sorted(SUITES), default="time")
+    run.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    run.add_argument("--output", "-o", help="Write results JSON here (default: stdout)")
+    run.add_argument("--baseline", help="Compare against this baseline after running")
+    run.add_argument(
+        "--threshold", type=float, default=10.0, help="Allowed regression in percent (default: 10)"
+    )
+
+    cmp = commands.add_parser("compare", help="Compare two result files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument(
+        "--threshold", type=float, default=10.0, help="Allowed regression in percent (default: 10)"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        current = run_suite(args.suite, args.filter, log=sys.stderr)
+        save(current, args.output)
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    else:
+        baseline, current = load(args.baseline), load(args.current)
+
+    if baseline.get("environment") != current.get("environment"):
+        print("warning: baseline was recorded in a different environment", file=sys.stderr)
+    # Keep stdout clean for the results JSON when running
+    stream = sys.stderr if args.command == "run" else sys.stdout
+    regressions = _print_comparisons(compare(baseline, current), args.threshold, stream)
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
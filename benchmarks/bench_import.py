@@ -0,0 +1,33 @@
+"""Cold-start import benchmarks"""
+
+from .harness import benchmark
+
+
+@benchmark("import", "package")
+def package():
+    """Bare package import"""
+    return "import fastapi_payfast"
+
+
+@benchmark("import", "utils")
+def utils():
+    """Signing helpers only, as used by batch workers"""
+    return "from fastapi_payfast.utils import generate_signature"
+
+
+@benchmark("import", "core")
+def core():
+    """Framework-free core with config and models"""
+    return "import fastapi_payfast.core"
+
+
+@benchmark("import", "cli")
+def cli():
+    """Command line entry point"""
+    return "import fastapi_payfast.cli"
+
+
+@benchmark("import", "client")
+def client():
+    """Full client, including FastAPI"""
+    return "from fastapi_payfast import PayFastClient"
@@ -0,0 +1,59 @@
+"""Memory-footprint benchmarks per operation"""
+
+import urllib.parse
+
+from fastapi_payfast import PayFastITNData, PayFastPaymentData
+from fastapi_payfast.utils import generate_payment_form_html
+
+from . import payloads
+from .harness import benchmark
+
+
+@benchmark("memory", "model.payment")
+def model_payment():
+    """PayFastPaymentData for a typical checkout"""
+    fields = payloads.payment_fields()
+    return lambda: PayFastPaymentData(**fields)
+
+
+@benchmark("memory", "model.payment.large")
+def model_payment_large():
+    """PayFastPaymentData with every optional field filled"""
+    fields = payloads.payment_fields(large=True)
+    return lambda: PayFastPaymentData(**fields)
+
+
+@benchmark("memory", "model.itn")
+def model_itn():
+    """PayFastITNData from form strings"""
+    fields = payloads.itn_fields()
+    return lambda: PayFastITNData(**fields)
+
+
+@benchmark("memory", "create_payment")
+def create_payment():
+    """Signed checkout dict returned by PayFastClient.create_payment"""
+    client = payloads.client()
+    payment = payloads.payment_data()
+    return lambda: client.create_payment(payment)
+
+
+@benchmark("memory", "render.form")
+def render_form():
+    """generate_payment_form_html for a signed large checkout"""
+    info = payloads.client().create_payment(payloads.payment_data(large=True))
+    return lambda: generate_payment_form_html(info["action_url"], info["data"])
+
+
+@benchmark("memory", "queue.itn_form")
+def queue_itn_form():
+    """ITN record queued as the parsed form dict"""
+    body = urllib.parse.urlencode(payloads.itn_fields())
+    return lambda: dict(urllib.parse.parse_qsl(body, keep_blank_values=True))
+
+
+@benchmark("memory", "queue.itn_model")
+def queue_itn_model():
+    """ITN record queued as a validated PayFastITNData"""
+    body = urllib.parse.urlencode(payloads.itn_fields())
+    return lambda: PayFastITNData(**dict(urllib.parse.parse_qsl(body, keep_blank_values=True)))
@@ -0,0 +1,159 @@
+"""Latency benchmarks for the signing, rendering and ITN hot paths"""
+
+import asyncio
+import urllib.parse
+from typing import Any, Callable
+
+import httpx
+from fastapi import FastAPI, Request
+
+from fastapi_payfast import PayFastException, PayFastITNData, PayFastPaymentData
+from fastapi_payfast.api import PayFastAPI
+from fastapi_payfast.asgi import payfast_itn_asgi
+from fastapi_payfast.batch import AdhocChargeRunner
+from fastapi_payfast.testing.stub_api import create_stub_api
+from fastapi_payfast.utils import generate_payment_form_html, generate_signature
+
+from . import payloads
+from .harness import benchmark
+
+
+def _repeat(op: Callable[[], Any]) -> Callable[[int], None]:
+    def loop(n: int) -> None:
+        for _ in range(n):
+            op()
+
+    return loop
+
+
+@benchmark("time", "signature.small")
+def signature_small():
+    """generate_signature over a minimal checkout payload"""
+    data = payloads.signature_fields()
+    passphrase = payloads.CONFIG.passphrase
+    return _repeat(lambda: generate_signature(data, passphrase))
+
+
+@benchmark("time", "signature.large")
+def signature_large():
+    """generate_signature with every optional field at maximum length"""
+    data = payloads.signature_fields(large=True)
+    passphrase = payloads.CONFIG.passphrase
+    return _repeat(lambda: generate_signature(data, passphrase))
+
+
+@benchmark("time", "create_payment")
+def create_payment():
+    """PayFastClient.create_payment for a typical checkout"""
+    client = payloads.client()
+    payment = payloads.payment_data()
+    return _repeat(lambda: client.create_payment(payment))
+
+
+@benchmark("time", "render.form")
+def render_form():
+    """generate_payment_form_html for a signed large checkout"""
+    info = payloads.client().create_payment(payloads.payment_data(large=True))
+    return _repeat(lambda: generate_payment_form_html(info["action_url"], info["data"]))
+
+
+@benchmark("time", "model.payment")
+def model_payment():
+    """PayFastPaymentData construction and validation"""
+    fields = payloads.payment_fields()
+    return _repeat(lambda: PayFastPaymentData(**fields))
+
+
+@benchmark("time", "model.itn")
+def model_itn():
+    """PayFastITNData construction from form strings"""
+    fields = payloads.itn_fields()
+    return _repeat(lambda: PayFastITNData(**fields))
+
+
+def create_app() -> FastAPI:
+    """Minimal merchant app exposing checkout and ITN routes"""
+    client = payloads.client()
+    app = FastAPI()
+
+    @app.post("/checkout")
+    async def checkout():
+        return client.generate_payment_response(payloads.payment_data())
+
+    @app.post("/itn")
+    async def itn(request: Request):
+        try:
+            await client.verify_itn(request)
+        except PayFastException as e:
+            raise e.to_http_exception()
+        return {}
+
+    app.add_route("/itn/raw", payfast_itn_asgi(client, lambda itn: None), methods=["POST"])
+    return app
+
+
+def _asgi_loop(method: str, path: str, body: bytes = b"") -> Callable[[int], None]:
+    event_loop = asyncio.new_event_loop()
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app()), base_url="http://bench"
+    )
+    headers = {"content-type": "application/x-www-form-urlencoded"}
+
+    async def many(n: int) -> None:
+        for _ in range(n):
+            response = await http.request(method, path, content=body, headers=headers)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.text}")
+
+    def loop(n: int) -> None:
+        event_loop.run_until_complete(many(n))
+
+    return loop
+
+
+@benchmark("time", "asgi.checkout")
+def asgi_checkout():
+    """Checkout route rendering the redirect form, through an in-process ASGI client"""
+    return _asgi_loop("POST", "/checkout")
+
+
+@benchmark("time", "asgi.itn.small")
+def asgi_itn_small():
+    """verify_itn for a typical ITN body, through an in-process ASGI client"""
+    return _asgi_loop("POST", "/itn", urllib.parse.urlencode(payloads.itn_fields()).encode())
+
+
+@benchmark("time", "asgi.itn.large")
+def asgi_itn_large():
+    """verify_itn for an ITN with every custom field filled"""
+    return _asgi_loop(
+        "POST", "/itn", urllib.parse.urlencode(payloads.itn_fields(large=True)).encode()
+    )
+
+
+@benchmark("time", "asgi.itn.raw")
+def asgi_itn_raw():
+    """Typical ITN through the raw ASGI endpoint (payfast_itn_asgi)"""
+    return _asgi_loop("POST", "/itn/raw", urllib.parse.urlencode(payloads.itn_fields()).encode())
+
+
+@benchmark("time", "batch.adhoc")
+def batch_adhoc():
+    """AdhocChargeRunner throughput against the stub API (8 in flight, unpaced)"""
+    event_loop = asyncio.new_event_loop()
+    config = payloads.CONFIG
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_api(config)), base_url=config.api_url
+    )
+    runner = AdhocChargeRunner(PayFastAPI(config, http_client=http), concurrency=8, rate=1e9)
+
+    async def many(n: int) -> None:
+        charges = ((f"tok-{i}", 100, "Box") for i in range(n))
+        async for result in runner.run(charges):
+            if result.status != "CHARGED":
+                raise RuntimeError(f"{result.charge.token} was {result.status}: {result.error}")
+
+    def loop(n: int) -> None:
+        event_loop.run_until_complete(many(n))
+
+    return loop
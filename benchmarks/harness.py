@@ -0,0 +1,267 @@
+"""Benchmark registry, timing harness and baseline comparison"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+# A factory does any setup and returns what its suite measures:
+# ``loop(n)`` performing n operations for time, ``op()`` returning the
+# object one operation produces for memory, an import statement for import
+Factory = Callable[[], Callable[..., Any]]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    factory: Factory
+    description: str
+
+
+SUITES: Dict[str, Dict[str, Benchmark]] = {}
+
+# Metric compared against the baseline for each suite
+PRIMARY_METRICS: Dict[str, List[str]] = {}
+
+
+def benchmark(suite: str, name: str) -> Callable[[Factory], Factory]:
+    """Register a benchmark factory under ``suite``"""
+
+    def register(factory: Factory) -> Factory:
+        SUITES.setdefault(suite, {})[name] = Benchmark(
+            name, factory, (factory.__doc__ or "").strip()
+        )
+        return factory
+
+    return register
+
+
+def environment() -> Dict[str, Any]:
+    """Details needed to judge whether two result files are comparable"""
+    return {
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pythonhashseed": os.environ.get("PYTHONHASHSEED"),
+    }
+
+
+def measure_time(
+    loop: Callable[[int], Any], min_time: float = 0.2, repeat: int = 7
+) -> Dict[str, float]:
+    """
+    Time ``loop`` in the style of ``timeit``
+
+    The iteration count is calibrated so one run takes at least
+    ``min_time``; the collector is disabled while timing and the
+    fastest of ``repeat`` runs is the compared figure: slower runs measure
+    interference from the rest of the machine, not the code.
+
+    Returns:
+        ``ns_per_op`` (fastest run), ``median_ns_per_op``, ``stdev_pct``
+        and ``iterations``
+    """
+    loop(1)
+    n = 1
+    while True:
+        started = time.perf_counter()
+        loop(n)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or n >= 1 << 24:
+            break
+        n *= 10 if elapsed < min_time / 10 else 2
+
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            loop(n)
+            timings.append((time.perf_counter() - started) / n * 1e9)
+    finally:
+        if enabled:
+            gc.enable()
+
+    median = statistics.median(timings)
+    return {
+        "ns_per_op": round(min(timings), 1),
+        "median_ns_per_op": round(median, 1),
+        "stdev_pct": round(statistics.pstdev(timings) / median * 100, 2) if median else 0.0,
+        "iterations": n,
+    }
+
+
+def measure_memory(op: Callable[[], Any], batch: int = 10000, repeat: int = 5) -> Dict[str, float]:
+    """
+    Measure allocations of ``op`` with ``tracemalloc``
+
+    Peak is the high-water mark above the starting point during a call,
+    retained is what is still allocated afterwards while the result is
+    kept alive. Single-call figures are the minimum of ``repeat`` calls;
+    the batch figures keep ``batch`` results alive at once, as a queue or
+    cache would, and are reported per operation.
+
+    Returns:
+        ``peak_bytes_per_op``, ``retained_bytes_per_op`` and the
+        ``_10k`` batch equivalents (named for the default batch size)
+    """
+    for _ in range(3):
+        op()
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        peaks, retained = [], []
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = op()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+            del result
+
+        kept: List[Any] = [None] * batch
+        gc.collect()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(batch):
+            kept[i] = op()
+        current, peak = tracemalloc.get_traced_memory()
+        del kept
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return {
+        "peak_bytes_per_op": min(peaks),
+        "retained_bytes_per_op": min(retained),
+        "peak_bytes_per_op_10k": round((peak - before) / batch, 1),
+        "retained_bytes_per_op_10k": round((current - before) / batch, 1),
+    }
+
+
+_IMPORT_TIMER = """
+import time
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started)
+"""
+
+
+def measure_import(statement: str, repeat: int = 7) -> Dict[str, float]:
+    """
+    Time a cold import in fresh interpreters
+
+    Interpreter start-up is excluded; only ``statement`` is timed. The
+    fastest of ``repeat`` runs is reported, with bytecode caches warm as
+    they are in a deployed application.
+
+    Returns:
+        ``import_us`` (fastest run) and ``median_import_us``
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_TIMER.format(statement=statement)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stdout
+        timings.append(float(output) * 1e6)
+    return {
+        "import_us": round(min(timings), 1),
+        "median_import_us": round(statistics.median(timings), 1),
+    }
+
+
+MEASURES: Dict[str, Callable[[Any], Dict[str, float]]] = {
+    "time": measure_time,
+    "memory": measure_memory,
+    "import": measure_import,
+}
+PRIMARY_METRICS["time"] = ["ns_per_op"]
+PRIMARY_METRICS["memory"] = [
+    "peak_bytes_per_op",
+    "retained_bytes_per_op",
+    "retained_bytes_per_op_10k",
+]
+PRIMARY_METRICS["import"] = ["import_us"]
+
+
+def run_suite(suite: str, pattern: Optional[str] = None, log: Any = None) -> Dict[str, Any]:
+    """
+    Run every benchmark in ``suite`` whose name contains ``pattern``
+
+    Returns:
+        JSON-serialisable result document
+    """
+    measure = MEASURES[suite]
+    results = {}
+    for name, bench in sorted(SUITES.get(suite, {}).items()):
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(bench.factory())
+        if log is not None:
+            print(f"{name:<32} {_summary(suite, results[name])}", file=log)
+    return {"suite": suite, "environment": environment(), "results": results}
+
+
+def _summary(suite: str, result: Dict[str, Any]) -> str:
+    return "  ".join(f"{metric}={result[metric]:,}" for metric in PRIMARY_METRICS[suite])
+
+
+class Comparison(NamedTuple):
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change_pct(self) -> float:
+        if not self.baseline:
+            return 0.0 if not self.current else float("inf")
+        return (self.current - self.baseline) / self.baseline * 100
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Comparison]:
+    """Pair up the primary metrics of benchmarks present in both documents"""
+    if baseline.get("suite") != current.get("suite"):
+        raise ValueError(
+            f"Cannot compare suite {current.get('suite')!r} against {baseline.get('suite')!r}"
+        )
+    metrics = PRIMARY_METRICS[current["suite"]]
+    comparisons = []
+    for name, result in sorted(current["results"].items()):
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in metrics:
+            comparisons.append(Comparison(name, metric, previous[metric], result[metric]))
+    return comparisons
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(document: Dict[str, Any], path: Optional[str]) -> None:
+    text = json.dumps(document, indent=2, sort_keys=True) + "\n"
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
@@ -0,0 +1,84 @@
+"""Deterministic payloads shared by the benchmark suites"""
+
+from typing import Any, Dict
+
+from fastapi_payfast import PayFastClient, PayFastConfig, PayFastPaymentData
+from fastapi_payfast.utils import generate_signature
+
+
+CONFIG = PayFastConfig(
+    merchant_id="10000100",
+    merchant_key="46f0cd694581a",
+    passphrase="jt7NOE43FZPn",
+    sandbox=True,
+    validate_ip=False,
+)
+
+
+def client(**kwargs: Any) -> PayFastClient:
+    return PayFastClient(CONFIG, **kwargs)
+
+
+def payment_fields(large: bool = False) -> Dict[str, Any]:
+    """Checkout fields; ``large`` fills every optional field to its maximum length"""
+    fields: Dict[str, Any] = {
+        "merchant_id": CONFIG.merchant_id,
+        "merchant_key": CONFIG.merchant_key,
+        "amount": 249.99,
+        "item_name": "Annual Plan",
+        "return_url": "https://shop.example.com/return",
+        "cancel_url": "https://shop.example.com/cancel",
+        "notify_url": "https://shop.example.com/payfast/itn",
+        "m_payment_id": "ORD-000123",
+    }
+    if large:
+        fields.update(
+            {
+                "item_description": "d" * 255,
+                "name_first": "Thandiwe",
+                "name_last": "Nkosi-van der Merwe",
+                "email_address": "thandiwe.nkosi@example.co.za",
+                "cell_number": "0821234567",
+                "email_confirmation": 1,
+                "confirmation_address": "orders@shop.example.com",
+            }
+        )
+        for i in range(1, 6):
+            fields[f"custom_str{i}"] = f"{i} & <value> " * 18
+            fields[f"custom_int{i}"] = i * 1000
+    return fields
+
+
+def payment_data(large: bool = False) -> PayFastPaymentData:
+    return PayFastPaymentData(**payment_fields(large))
+
+
+def signature_fields(large: bool = False) -> Dict[str, str]:
+    """String fields in PayFast order, as signed at checkout"""
+    data = {k: v for k, v in payment_data(large).dict().items() if v is not None}
+    return {k: str(v) for k, v in data.items()}
+
+
+def itn_fields(large: bool = False, index: int = 0) -> Dict[str, str]:
+    """A signed ITN payload; ``large`` fills the custom and description fields"""
+    fields = {
+        "m_payment_id": f"ORD-{index:06d}",
+        "pf_payment_id": str(1089250 + index),
+        "payment_status": "COMPLETE",
+        "item_name": "Annual Plan",
+        "item_description": "",
+        "amount_gross": "249.99",
+        "amount_fee": "-5.75",
+        "amount_net": "244.24",
+        "name_first": "Thandiwe",
+        "name_last": "Nkosi",
+        "email_address": "thandiwe.nkosi@example.co.za",
+        "merchant_id": CONFIG.merchant_id,
+    }
+    if large:
+        fields["item_description"] = "d" * 255
+        for i in range(1, 6):
+            fields[f"custom_str{i}"] = f"{i} & <value> " * 18
+            fields[f"custom_int{i}"] = str(i * 1000)
+    fields["signature"] = generate_signature(fields, CONFIG.passphrase)
+    return fields
@@ -3,21 +3,40 @@
 __version__ = "0.0.1"
 __author__ = "Carrington Muleya"
 
-from .client import PayFastClient
-from .config import PayFastConfig
-from .models import (
-    PayFastPaymentData,
-    PayFastITNData,
-    PaymentStatus,
-    SubscriptionType,
-    FrequencyType
-)
-from .exceptions import (
-    PayFastException,
-    SignatureVerificationError,
-    InvalidMerchantError,
-    InvalidAmountError
-)
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .client import PayFastClient
+    from .config import PayFastConfig
+    from .models import (
+        PayFastPaymentData,
+        PayFastITNData,
+        PaymentStatus,
+        SubscriptionType,
+        FrequencyType
+    )
+    from .exceptions import (
+        PayFastException,
+        SignatureVerificationError,
+        InvalidMerchantError,
+        InvalidAmountError
+    )
+
+# Public names are imported on first access (PEP 562) so that importing
+# a submodule such as ``fastapi_payfast.utils`` does not load FastAPI
+_LAZY = {
+    "PayFastClient": ".client",
+    "PayFastConfig": ".config",
+    "PayFastPaymentData": ".models",
+    "PayFastITNData": ".models",
+    "PaymentStatus": ".models",
+    "SubscriptionType": ".models",
+    "FrequencyType": ".models",
+    "PayFastException": ".exceptions",
+    "SignatureVerificationError": ".exceptions",
+    "InvalidMerchantError": ".exceptions",
+    "InvalidAmountError": ".exceptions",
+}
 
 __all__ = [
     "PayFastClient",
@@ -32,3 +51,17 @@ __all__ = [
     "InvalidMerchantError",
     "InvalidAmountError",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,179 @@
+"""PayFast REST API client"""
+
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, Optional, Sequence
+
+from .config import PayFastConfig
+from .exceptions import PayFastAPIError
+from .history import aiter_transaction_records
+from .utils import generate_api_signature
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the api extra
+    httpx = None  # type: ignore[assignment]
+
+
+API_VERSION = "v1"
+
+
+class PayFastAPI:
+    """Async client for the PayFast REST API (subscriptions, history)"""
+
+    def __init__(
+        self,
+        config: PayFastConfig,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        timeout: float = 30.0,
+        max_connections: int = 20
+    ):
+        """
+        Initialize PayFast API client
+
+        Args:
+            config: PayFast configuration object
+            http_client: Optional preconfigured httpx client (e.g. for tests)
+            timeout: Request timeout in seconds
+            max_connections: Connection pool size for the default client
+        """
+        if httpx is None:
+            raise ImportError(
+                "PayFastAPI requires httpx. Install with: pip install fastapi-payfast[api]"
+            )
+        self.config = config
+        self._owns_client = http_client is None
+        self._http = http_client or httpx.AsyncClient(
+            base_url=config.api_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def __aenter__(self) -> "PayFastAPI":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client if this instance created it"""
+        if self._owns_client:
+            await self._http.aclose()
+
+    def build_headers(self, body: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Build signed request headers
+
+        Args:
+            body: Request body parameters included in the signature
+
+        Returns:
+            Dictionary of PayFast API headers
+        """
+        headers = {
+            'merchant-id': self.config.merchant_id,
+            'version': API_VERSION,
+            'timestamp': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        }
+        signed = dict(headers)
+        if body:
+            signed.update(body)
+        headers['signature'] = generate_api_signature(signed, self.config.passphrase)
+        return headers
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a signed request and decode the JSON response
+
+        Args:
+            method: HTTP method
+            path: API path, e.g. ``/subscriptions/{token}/adhoc``
+            body: Optional form body parameters
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            PayFastAPIError: If PayFast responds with a non-2xx status
+        """
+        response = await self._http.request(
+            method,
+            path,
+            params=self.config.api_params,
+            headers=self.build_headers(body),
+            data=body
+        )
+        if response.status_code >= 400:
+            raise PayFastAPIError(response.status_code, response.text)
+        result: Dict[str, Any] = response.json()
+        return result
+
+    async def ping(self) -> Dict[str, Any]:
+        """Check API connectivity and credentials"""
+        return await self.request("GET", "/ping")
+
+    async def charge_adhoc(
+        self,
+        token: str,
+        amount: int,
+        item_name: str,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """
+        Charge an ad-hoc (tokenised) subscription
+
+        Args:
+            token: Subscription token from the original ITN
+            amount: Amount to charge in cents
+            item_name: Description shown to the buyer
+            **extra: Optional API fields (item_description, m_payment_id, ...)
+
+        Returns:
+            Decoded JSON response
+        """
+        body = {'amount': int(amount), 'item_name': item_name}
+        body.update({k: v for k, v in extra.items() if v is not None})
+        return await self.request("POST", f"/subscriptions/{token}/adhoc", body)
+
+    async def stream_transaction_history(
+        self,
+        from_date: str,
+        to_date: str,
+        columns: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[tuple]:
+        """
+        Stream the transaction history export as typed records
+
+        The response body is consumed line by line and never held in
+        memory in full.
+
+        Args:
+            from_date: Start date (YYYY-MM-DD)
+            to_date: End date (YYYY-MM-DD)
+            columns: Optional normalized column names to keep
+
+        Yields:
+            ``TransactionRecord`` named tuples with amounts in cents
+
+        Raises:
+            PayFastAPIError: If PayFast responds with a non-2xx status
+        """
+        query = {'from': from_date, 'to': to_date}
+        async with self._http.stream(
+            "GET",
+            "/transactions/history",
+            params={**self.config.api_params, **query},
+            headers=self.build_headers(query)
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise PayFastAPIError(response.status_code, response.text)
+            async for record in aiter_transaction_records(response.aiter_lines(), columns):
+                yield record
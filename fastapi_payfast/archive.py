@@ -0,0 +1,283 @@
+"""Append-only ITN archive with memory-mapped hash indexes
+
+An archive is a directory of numbered segments. Each segment is a JSONL
+data file (``NNNNNNNN.jsonl``, readable by ``audit`` and ordinary tools)
+plus a fixed-size open-addressing hash index (``NNNNNNNN.idx``) mapping
+``pf_payment_id`` and ``m_payment_id`` to record positions. The index of
+the active segment is updated in place as records are appended, so
+readers in other processes see new ITNs immediately.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+
+KEY_FIELDS = ('pf_payment_id', 'm_payment_id')
+
+_MAGIC = b"PFAX"
+_VERSION = 1
+# magic, version, slots, records, data_end
+_HEADER = struct.Struct("<4sIQQQ")
+_ENTRY = struct.Struct("<QQ")
+_EMPTY = 0
+_LENGTH_BITS = 24
+_MAX_RECORD = (1 << _LENGTH_BITS) - 1
+
+
+def _key(field: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{field}\0{value}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def _segment_paths(directory: str, number: int) -> Tuple[str, str]:
+    base = os.path.join(directory, f"{number:08d}")
+    return base + ".jsonl", base + ".idx"
+
+
+def _segment_numbers(directory: str) -> List[int]:
+    return sorted(
+        int(name[:-4]) for name in os.listdir(directory)
+        if name.endswith(".idx") and name[:-4].isdigit()
+    )
+
+
+class _Segment:
+    """One data file and its memory-mapped index"""
+
+    def __init__(self, directory: str, number: int, writable: bool = False, slots: int = 0):
+        self.number = number
+        self.data_path, index_path = _segment_paths(directory, number)
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        if slots:
+            # Build the index under a temporary name so readers never map
+            # one whose header is not written yet
+            building = index_path + ".tmp"
+            with open(building, "wb") as f:
+                f.truncate(_HEADER.size + slots * _ENTRY.size)
+                f.write(_HEADER.pack(_MAGIC, _VERSION, slots, 0, 0))
+            open(self.data_path, "ab").close()
+            os.replace(building, index_path)
+        with open(index_path, "r+b" if writable else "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=access)
+        magic, version, self.slots, _, _ = _HEADER.unpack_from(self.index, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{index_path} is not an ITN archive index")
+        self._data: Optional[mmap.mmap] = None
+
+    @property
+    def records(self) -> int:
+        records: int = _HEADER.unpack_from(self.index, 0)[3]
+        return records
+
+    @property
+    def data_end(self) -> int:
+        end: int = _HEADER.unpack_from(self.index, 0)[4]
+        return end
+
+    def positions(self, key: int) -> Iterator[Tuple[int, int]]:
+        """Yield ``(offset, length)`` of every record indexed under ``key``"""
+        index = self.index
+        slot = key % self.slots
+        for _ in range(self.slots):
+            entry_key, position = _ENTRY.unpack_from(index, _HEADER.size + slot * _ENTRY.size)
+            if entry_key == _EMPTY:
+                return
+            if entry_key == key:
+                yield position >> _LENGTH_BITS, position & _MAX_RECORD
+            slot = (slot + 1) % self.slots
+
+    def insert(self, key: int, offset: int, length: int) -> None:
+        index = self.index
+        slot = key % self.slots
+        while True:
+            at = _HEADER.size + slot * _ENTRY.size
+            if _ENTRY.unpack_from(index, at)[0] == _EMPTY:
+                # Position first, key last: a reader never sees a key without its position
+                struct.pack_into("<Q", index, at + 8, offset << _LENGTH_BITS | length)
+                struct.pack_into("<Q", index, at, key)
+                return
+            slot = (slot + 1) % self.slots
+
+    def read(self, offset: int, length: int) -> bytes:
+        end = offset + length
+        if self._data is None or len(self._data) < end:
+            # The active segment grows; remap to cover new records
+            if self._data is not None:
+                self._data.close()
+            with open(self.data_path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data[offset:end]
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+        self.index.close()
+
+
+class ArchiveWriter:
+    """
+    Appends ITNs to an archive directory
+
+    Use a single writer per directory. Each record is written to the
+    data file before its index entries are published, and the index
+    header records where the last complete record ends, so a crash
+    mid-append leaves at most a truncated tail that is discarded when
+    the archive is reopened.
+    """
+
+    def __init__(self, directory: str, records_per_segment: int = 1 << 20, fsync: bool = False):
+        """
+        Initialize archive writer
+
+        Args:
+            directory: Archive directory (created if missing)
+            records_per_segment: Records before rolling to a new segment
+            fsync: fsync the data file after every record
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.records_per_segment = records_per_segment
+        self.fsync = fsync
+        numbers = _segment_numbers(directory)
+        if numbers:
+            self._open_segment(numbers[-1])
+            if self._segment.records >= records_per_segment:
+                self._roll()
+        else:
+            self._new_segment(1)
+
+    @property
+    def _slots(self) -> int:
+        # Two keys per record at a load factor of at most one half
+        return 4 * self.records_per_segment
+
+    def _open_segment(self, number: int) -> None:
+        self._segment = _Segment(self.directory, number, writable=True)
+        self._file = open(self._segment.data_path, "r+b")
+        # Discard anything written after the last indexed record
+        self._file.truncate(self._segment.data_end)
+        self._file.seek(self._segment.data_end)
+
+    def _new_segment(self, number: int) -> None:
+        _Segment(self.directory, number, writable=True, slots=self._slots).close()
+        self._open_segment(number)
+
+    def _roll(self) -> None:
+        number = self._segment.number + 1
+        self.close()
+        self._new_segment(number)
+
+    def append(self, fields: Mapping[str, Any]) -> None:
+        """
+        Archive one ITN
+
+        Args:
+            fields: ITN fields in the order they were received
+        """
+        if self._segment.records >= self.records_per_segment:
+            self._roll()
+        record = json.dumps(dict(fields), separators=(",", ":")).encode() + b"\n"
+        if len(record) > _MAX_RECORD:
+            raise ValueError(f"ITN record of {len(record)} bytes is too large to archive")
+        offset = self._segment.data_end
+        self._file.write(record)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        for field in KEY_FIELDS:
+            value = fields.get(field)
+            if value:
+                self._segment.insert(_key(field, str(value)), offset, len(record))
+        _, _, slots, records, _ = _HEADER.unpack_from(self._segment.index, 0)
+        _HEADER.pack_into(
+            self._segment.index, 0, _MAGIC, _VERSION, slots, records + 1, offset + len(record)
+        )
+
+    def close(self) -> None:
+        self._file.close()
+        self._segment.index.flush()
+        self._segment.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class ArchiveReader:
+    """
+    Looks up archived ITNs by ``pf_payment_id`` or ``m_payment_id``
+
+    A lookup probes each segment's index (a few page reads per segment)
+    and reads matching records straight from the mapped data files.
+    Segments created after the reader was opened are picked up on the
+    next lookup.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segments: Dict[int, _Segment] = {}
+
+    def _refresh(self) -> List[_Segment]:
+        for number in _segment_numbers(self.directory):
+            if number not in self._segments:
+                self._segments[number] = _Segment(self.directory, number)
+        return [self._segments[number] for number in sorted(self._segments)]
+
+    def lookup(self, value: str, field: str = 'pf_payment_id') -> List[Dict[str, Any]]:
+        """
+        Find every archived ITN whose ``field`` equals ``value``
+
+        Args:
+            value: Identifier to look up
+            field: ``pf_payment_id`` or ``m_payment_id``
+
+        Returns:
+            Matching ITNs, oldest first
+        """
+        if field not in KEY_FIELDS:
+            raise ValueError(f"Archive is not indexed by {field}")
+        key = _key(field, value)
+        matches = []
+        for segment in self._refresh():
+            data_end = segment.data_end
+            for offset, length in sorted(segment.positions(key)):
+                if offset + length > data_end:
+                    continue
+                try:
+                    record = json.loads(segment.read(offset, length))
+                except ValueError:
+                    # Entry left behind by an interrupted append
+                    continue
+                # Also guards against 64-bit hash collisions
+                if str(record.get(field)) == value:
+                    matches.append(record)
+        return matches
+
+    def get(self, identifier: str) -> List[Dict[str, Any]]:
+        """Find ITNs whose ``pf_payment_id`` or ``m_payment_id`` equals ``identifier``"""
+        matches = self.lookup(identifier, 'pf_payment_id')
+        matches.extend(
+            record for record in self.lookup(identifier, 'm_payment_id')
+            if str(record.get('pf_payment_id')) != identifier
+        )
+        return matches
+
+    def __len__(self) -> int:
+        return sum(segment.records for segment in self._refresh())
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,184 @@
+"""Raw ASGI endpoint for PayFast ITNs"""
+
+import inspect
+import json
+import urllib.parse
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union, cast
+
+from .client import PayFastClient
+from .core import REJECTION_MESSAGES
+from .dedupe import ITNDedupeTable
+from .models import PayFastITNData
+
+
+ITNHandler = Callable[[PayFastITNData], Union[None, Awaitable[None]]]
+Message = Dict[str, Any]
+
+
+def _response(
+    status: int,
+    body: bytes,
+    content_type: bytes = b"text/plain; charset=utf-8"
+) -> Tuple[Message, Message]:
+    start = {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    return start, {'type': 'http.response.body', 'body': body}
+
+
+# PayFast only looks at the status code, so success is a constant
+_OK = _response(200, b"OK")
+_METHOD_NOT_ALLOWED = _response(405, b"Method Not Allowed")
+_TOO_LARGE = _response(413, b"Payload Too Large")
+_REJECTIONS = {
+    reason: _response(400, json.dumps({'detail': message}).encode(), b"application/json")
+    for reason, message in REJECTION_MESSAGES.items()
+}
+
+
+class _Disconnected(Exception):
+    pass
+
+
+class PayFastITNApp:
+    """
+    Pure ASGI app that verifies ITNs and passes them to a handler
+
+    The body is read straight from ``receive`` and parsed as urlencoded
+    form data; no ``Request``, routing, dependency resolution or response
+    serialisation is involved. Every response is prebuilt: rejections get
+    a 400 with a constant JSON ``detail`` per reason.
+    """
+
+    def __init__(
+        self,
+        client: PayFastClient,
+        handler: ITNHandler,
+        max_body_size: int = 64 * 1024,
+        dedupe: Optional[ITNDedupeTable] = None
+    ):
+        """
+        Initialize ITN app
+
+        Args:
+            client: PayFast client used for verification
+            handler: Called with each verified ITN; may be sync or async.
+                Exceptions propagate to the server (a 500 response).
+            max_body_size: Larger bodies are rejected with a 413
+            dedupe: Shared table of seen ITNs; verified duplicates are
+                acknowledged without calling the handler
+        """
+        self.client = client
+        self.handler = handler
+        self.max_body_size = max_body_size
+        self.dedupe = dedupe
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if scope['method'] != 'POST':
+            await self._send(send, _METHOD_NOT_ALLOWED)
+            return
+
+        tracer = self.client.tracer
+        trace = tracer.start() if tracer is not None else None
+        try:
+            body = await self._read_body(receive)
+        except _Disconnected:
+            return
+        if body is None:
+            await self._send(send, _TOO_LARGE)
+            return
+        if trace is not None:
+            trace.mark('body')
+        data = dict(urllib.parse.parse_qsl(body.decode('latin-1'), keep_blank_values=True))
+        if trace is not None:
+            trace.mark('form')
+
+        client = scope.get('client')
+        verified = self.client.try_verify_itn_data(data, client[0] if client else None, trace)
+        if not verified.ok:
+            await self._send(send, _REJECTIONS[cast(str, verified.reason)])
+            return
+
+        itn = cast(PayFastITNData, verified.data)
+        if self.dedupe is not None and not self.dedupe.claim(itn.pf_payment_id, itn.payment_status):
+            await self._send(send, _OK)
+            return
+        try:
+            result = self.handler(itn)
+            if inspect.isawaitable(result):
+                await result
+        except BaseException:
+            if self.dedupe is not None:
+                # Let PayFast's retry through
+                self.dedupe.release(itn.pf_payment_id, itn.payment_status)
+            raise
+        await self._send(send, _OK)
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise _Disconnected()
+            chunk = message.get('body', b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send(send: Callable, response: Tuple[Message, Message]) -> None:
+        start, body = response
+        await send(start)
+        await send(body)
+
+    @staticmethod
+    async def _lifespan(receive: Callable, send: Callable) -> None:
+        # Only reached when served standalone; mounted apps get no lifespan
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def payfast_itn_asgi(
+    client: PayFastClient,
+    handler: ITNHandler,
+    max_body_size: int = 64 * 1024,
+    dedupe: Optional[ITNDedupeTable] = None
+) -> PayFastITNApp:
+    """
+    Create a raw ASGI ITN endpoint
+
+    Add it to a FastAPI app with ``app.add_route(path, itn_app,
+    methods=["POST"])`` to serve an exact path (Starlette passes ASGI
+    app instances through untouched), or with ``app.mount(path,
+    itn_app)``, which only matches ``path/`` with a trailing slash.
+
+    Args:
+        client: PayFast client used for verification
+        handler: Called with each verified ITN; may be sync or async
+        max_body_size: Larger bodies are rejected with a 413
+        dedupe: Shared table of seen ITNs; verified duplicates are
+            acknowledged without calling the handler
+
+    Returns:
+        ASGI application
+    """
+    return PayFastITNApp(client, handler, max_body_size, dedupe)
@@ -0,0 +1,237 @@
+"""PayFast offline ITN signature audit"""
+
+import csv
+import json
+import os
+import time
+import urllib.parse
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, cast
+
+from .core import MERCHANT_MISMATCH, MISSING_SIGNATURE, SIGNATURE_MISMATCH, verify_signature
+
+
+FORMATS = ('jsonl', 'csv', 'raw')
+
+# Audit-only reason for records that are not ITN payloads at all; the
+# others are core's rejection reasons
+UNPARSEABLE = "unparseable"
+
+
+class AuditMismatch(NamedTuple):
+    """An archived ITN that failed verification"""
+    line: int
+    reason: str
+    pf_payment_id: Optional[str]
+    merchant_id: Optional[str]
+
+
+class AuditReport:
+    """Summary of an audit run"""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.verified = 0
+        self.reasons: Counter = Counter()
+        self.passphrase_usage: Counter = Counter()
+        self.elapsed = 0.0
+
+    @property
+    def mismatches(self) -> int:
+        return self.total - self.verified
+
+    @property
+    def throughput(self) -> float:
+        """Records verified per second"""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'verified': self.verified,
+            'mismatches': self.mismatches,
+            'reasons': dict(self.reasons),
+            'passphrase_usage': {str(k): v for k, v in sorted(self.passphrase_usage.items())},
+            'elapsed_seconds': round(self.elapsed, 3),
+            'records_per_second': round(self.throughput, 1),
+        }
+
+
+def detect_format(path: str) -> str:
+    """Guess the archive format from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    return 'raw'
+
+
+def verify_payload(
+    data: Dict[str, Any],
+    passphrases: Sequence[str],
+    merchant_id: Optional[str] = None
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Verify one ITN payload against each candidate passphrase in turn
+
+    Args:
+        data: ITN fields in the order they were received
+        passphrases: Candidate passphrases, current one first
+        merchant_id: Expected merchant ID (skipped when None)
+
+    Returns:
+        ``(reason, passphrase_index)`` where reason is None on success
+    """
+    if not data.get('signature'):
+        return MISSING_SIGNATURE, None
+    for index, passphrase in enumerate(passphrases):
+        if verify_signature(data, passphrase):
+            break
+    else:
+        return SIGNATURE_MISMATCH, None
+    if merchant_id is not None and data.get('merchant_id') != merchant_id:
+        return MERCHANT_MISMATCH, index
+    return None, index
+
+
+def _parse(fmt: str, header: Optional[List[str]], item: Any) -> Dict[str, Any]:
+    if fmt == 'jsonl':
+        data = json.loads(item)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        return data
+    if fmt == 'csv':
+        return dict(zip(cast(List[str], header), item))
+    return dict(urllib.parse.parse_qsl(item.strip(), keep_blank_values=True))
+
+
+def _audit_chunk(
+    fmt: str,
+    header: Optional[List[str]],
+    first_line: int,
+    items: List[Any],
+    passphrases: Sequence[str],
+    merchant_id: Optional[str]
+) -> Tuple[int, Counter, List[AuditMismatch]]:
+    """Worker entry point: verify a chunk, return only the small results"""
+    usage: Counter = Counter()
+    mismatches = []
+    count = 0
+    for offset, item in enumerate(items):
+        # Blank lines are padding, not records (csv yields [] or empty fields)
+        if not (any(item) if fmt == 'csv' else item.strip()):
+            continue
+        count += 1
+        try:
+            data = _parse(fmt, header, item)
+        except ValueError:
+            mismatches.append(AuditMismatch(first_line + offset, UNPARSEABLE, None, None))
+            continue
+        reason, index = verify_payload(data, passphrases, merchant_id)
+        if index is not None:
+            usage[index] += 1
+        if reason is not None:
+            mismatches.append(AuditMismatch(
+                first_line + offset, reason, data.get('pf_payment_id'), data.get('merchant_id')
+            ))
+    return count, usage, mismatches
+
+
+def _iter_chunks(
+    path: str,
+    fmt: str,
+    chunk_size: int
+) -> Iterator[Tuple[Optional[List[str]], int, List[Any]]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        header = None
+        first_line = 1
+        if fmt == 'csv':
+            source: Iterator[Any] = csv.reader(f)
+            header = next(source, None)
+            first_line = 2
+        else:
+            source = f
+        chunk: List[Any] = []
+        for item in source:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield header, first_line, chunk
+                first_line += len(chunk)
+                chunk = []
+        if chunk:
+            yield header, first_line, chunk
+
+
+def audit_archive(
+    path: str,
+    passphrases: Sequence[str],
+    merchant_id: Optional[str] = None,
+    fmt: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 5000,
+    on_mismatch: Optional[Callable[[AuditMismatch], None]] = None,
+    executor: Optional[Executor] = None
+) -> AuditReport:
+    """
+    Re-verify archived ITNs across a process pool
+
+    Input is read and dispatched in chunks with at most two chunks per
+    worker in flight, so memory stays bounded for archives of any size.
+    Mismatch line numbers are physical lines for JSONL and raw archives
+    and row numbers (header is row 1) for CSV.
+
+    Args:
+        path: Archive file (JSONL, CSV or one raw urlencoded body per line)
+        passphrases: Candidate passphrases for rotation, current one first
+        merchant_id: Expected merchant ID (skipped when None)
+        fmt: Archive format, detected from the extension when omitted
+        workers: Worker processes (defaults to CPU count; 1 runs inline)
+        chunk_size: Records per IPC message
+        on_mismatch: Callback invoked for every failed record
+        executor: Optional executor to use instead of a new process pool
+
+    Returns:
+        AuditReport with totals, failure reasons and throughput
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    passphrases = list(passphrases) or ['']
+    workers = workers or os.cpu_count() or 1
+    report = AuditReport()
+    started = time.perf_counter()
+
+    def collect(result: Tuple[int, Counter, List[AuditMismatch]]) -> None:
+        count, usage, mismatches = result
+        report.total += count
+        report.verified += count - len(mismatches)
+        report.passphrase_usage.update(usage)
+        for mismatch in mismatches:
+            report.reasons[mismatch.reason] += 1
+            if on_mismatch is not None:
+                on_mismatch(mismatch)
+
+    chunks = _iter_chunks(path, fmt, chunk_size)
+    if workers == 1 and executor is None:
+        for header, first_line, items in chunks:
+            collect(_audit_chunk(fmt, header, first_line, items, passphrases, merchant_id))
+    else:
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            in_flight: deque = deque()
+            for header, first_line, items in chunks:
+                in_flight.append(pool.submit(
+                    _audit_chunk, fmt, header, first_line, items, passphrases, merchant_id
+                ))
+                if len(in_flight) >= workers * 2:
+                    collect(in_flight.popleft().result())
+            while in_flight:
+                collect(in_flight.popleft().result())
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+    report.elapsed = time.perf_counter() - started
+    return report
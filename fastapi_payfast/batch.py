@@ -0,0 +1,246 @@
+"""PayFast bulk ad-hoc charge runner"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from .api import PayFastAPI
+from .exceptions import PayFastAPIError
+
+
+class ChargeStatus(str, Enum):
+    """Outcome of a single ad-hoc charge"""
+    STARTED = "STARTED"
+    CHARGED = "CHARGED"
+    REJECTED = "REJECTED"
+    UNCERTAIN = "UNCERTAIN"
+    SKIPPED = "SKIPPED"
+
+
+class AdhocCharge(NamedTuple):
+    """
+    A single ad-hoc charge against a subscription token
+
+    ``key`` is your reference for the charge (an invoice number or
+    billing period, say). Set it when a token may legitimately be charged
+    the same amount for the same item more than once.
+    """
+    token: str
+    amount: int
+    item_name: str
+    key: Optional[str] = None
+
+    @property
+    def checkpoint_key(self) -> str:
+        """Idempotency key used for checkpointing: the token and charge reference"""
+        reference = self.key if self.key is not None else f"{self.amount}:{self.item_name}"
+        return f"{self.token}:{reference}"
+
+
+class ChargeResult(NamedTuple):
+    """Result of a single ad-hoc charge"""
+    charge: AdhocCharge
+    status: ChargeStatus
+    response: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter for pacing outbound API calls"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to ``rate``)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CheckpointStore:
+    """SQLite-backed record of charge progress, used to resume safely"""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a checkpoint database
+
+        Args:
+            path: SQLite database file path
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS adhoc_charges ("
+            "key TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "response TEXT, updated_at REAL NOT NULL)"
+        )
+
+    def status(self, key: str) -> Optional[ChargeStatus]:
+        """Get the recorded status for a charge key, if any"""
+        row = self._conn.execute(
+            "SELECT status FROM adhoc_charges WHERE key = ?", (key,)
+        ).fetchone()
+        return ChargeStatus(row[0]) if row else None
+
+    def mark(self, key: str, status: ChargeStatus, detail: Optional[Any] = None) -> None:
+        """Durably record the status of a charge key"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO adhoc_charges (key, status, response, updated_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, status.value, json.dumps(detail) if detail is not None else None, time.time())
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of charges recorded per status"""
+        return dict(self._conn.execute(
+            "SELECT status, COUNT(*) FROM adhoc_charges GROUP BY status"
+        ))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class AdhocChargeRunner:
+    """Run ad-hoc charges with bounded concurrency, rate pacing and checkpoints"""
+
+    def __init__(
+        self,
+        api: PayFastAPI,
+        checkpoint: Optional[CheckpointStore] = None,
+        concurrency: int = 8,
+        rate: float = 10.0,
+        burst: Optional[float] = None
+    ):
+        """
+        Initialize charge runner
+
+        Args:
+            api: PayFast REST API client
+            checkpoint: Optional checkpoint store for crash-safe resumption
+            concurrency: Maximum number of charges in flight
+            rate: Maximum charges started per second
+            burst: Token-bucket burst size (defaults to ``rate``)
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.api = api
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self._in_flight: Set[str] = set()
+
+    async def run(
+        self,
+        charges: Iterable[Union[AdhocCharge, Tuple[str, int, str]]]
+    ) -> AsyncIterator[ChargeResult]:
+        """
+        Execute charges, yielding results in completion order
+
+        The input iterable is consumed lazily, so arbitrarily large
+        batches run with memory bounded by ``concurrency``.
+
+        Args:
+            charges: Iterable of ``AdhocCharge`` or ``(token, amount, item_name)``
+
+        Yields:
+            ChargeResult for every input charge
+        """
+        source = iter(charges)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        finished = object()
+        failure: List[Exception] = []
+
+        async def worker() -> None:
+            for item in source:
+                charge = item if isinstance(item, AdhocCharge) else AdhocCharge(*item)
+                await results.put(await self._process(charge))
+
+        async def supervise() -> None:
+            try:
+                await asyncio.gather(*workers)
+            except Exception as e:
+                failure.append(e)
+            finally:
+                await results.put(finished)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        tasks = workers + [asyncio.ensure_future(supervise())]
+        try:
+            while True:
+                result = await results.get()
+                if result is finished:
+                    break
+                yield result
+            if failure:
+                raise failure[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _process(self, charge: AdhocCharge) -> ChargeResult:
+        key = charge.checkpoint_key
+        # Claim the key before the first await, so a duplicate queued
+        # behind the rate limiter cannot pass the same checks
+        if key in self._in_flight:
+            return ChargeResult(
+                charge, ChargeStatus.SKIPPED, error="Duplicate of a charge in progress"
+            )
+        if self.checkpoint is not None:
+            previous = self.checkpoint.status(key)
+            if previous == ChargeStatus.CHARGED:
+                return ChargeResult(charge, ChargeStatus.SKIPPED)
+            if previous in (ChargeStatus.STARTED, ChargeStatus.UNCERTAIN):
+                # The charge may have gone through before the crash; never resend
+                return ChargeResult(
+                    charge, ChargeStatus.UNCERTAIN, error="Outcome unknown from previous run"
+                )
+
+        self._in_flight.add(key)
+        try:
+            return await self._charge(charge, key)
+        finally:
+            self._in_flight.discard(key)
+
+    async def _charge(self, charge: AdhocCharge, key: str) -> ChargeResult:
+        await self.bucket.acquire()
+        if self.checkpoint is not None:
+            self.checkpoint.mark(key, ChargeStatus.STARTED)
+
+        try:
+            response = await self.api.charge_adhoc(charge.token, charge.amount, charge.item_name)
+        except PayFastAPIError as e:
+            # 4xx responses are definite rejections; 5xx may have been processed
+            status = ChargeStatus.REJECTED if e.status_code < 500 else ChargeStatus.UNCERTAIN
+            result = ChargeResult(charge, status, error=e.message)
+        except Exception as e:
+            result = ChargeResult(charge, ChargeStatus.UNCERTAIN, error=f"{type(e).__name__}: {e}")
+        else:
+            result = ChargeResult(charge, ChargeStatus.CHARGED, response=response)
+
+        if self.checkpoint is not None:
+            self.checkpoint.mark(key, result.status, result.error or result.response)
+        return result
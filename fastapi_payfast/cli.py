@@ -0,0 +1,190 @@
+"""PayFast command line tools"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, List, Optional, TextIO, cast
+
+
+def _add_audit_parser(subparsers: Any) -> None:
+    parser = subparsers.add_parser(
+        "audit",
+        help="Re-verify signatures of archived ITNs",
+        description="Re-verify archived ITN signatures and merchant IDs across a process pool."
+    )
+    parser.add_argument("archive", help="JSONL, CSV or raw-body (one per line) archive")
+    parser.add_argument("--format", choices=["jsonl", "csv", "raw"],
+                        help="Override format detection")
+    parser.add_argument(
+        "--passphrase",
+        action="append",
+        help="Candidate passphrase; repeat for rotated passphrases, current first "
+             "(default: $PAYFAST_PASSPHRASE)"
+    )
+    parser.add_argument("--merchant-id", default=os.environ.get("PAYFAST_MERCHANT_ID"),
+                        help="Expected merchant ID (default: $PAYFAST_MERCHANT_ID)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per worker chunk")
+    parser.add_argument("--output", help="Write mismatches as JSONL to this file ('-' for stdout)")
+    parser.set_defaults(handler=_run_audit)
+
+
+def _run_audit(args: argparse.Namespace) -> int:
+    from .audit import AuditMismatch, audit_archive
+
+    passphrases = args.passphrase
+    if not passphrases:
+        passphrases = [os.environ.get("PAYFAST_PASSPHRASE", "")]
+
+    out: Optional[TextIO] = None
+    if args.output == "-":
+        out = sys.stdout
+    elif args.output:
+        out = open(args.output, "w", encoding="utf-8")
+
+    def on_mismatch(mismatch: AuditMismatch) -> None:
+        cast(TextIO, out).write(json.dumps(mismatch._asdict()) + "\n")
+
+    try:
+        report = audit_archive(
+            args.archive,
+            passphrases,
+            merchant_id=args.merchant_id,
+            fmt=args.format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            on_mismatch=on_mismatch if out is not None else None
+        )
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    print(json.dumps(report.as_dict(), indent=2), file=sys.stderr)
+    return 1 if report.mismatches else 0
+
+
+def _add_loadtest_parser(subparsers: Any) -> None:
+    parser = subparsers.add_parser(
+        "loadtest",
+        help="Post signed ITNs at a notify URL and report latency",
+        description="Generate correctly signed ITN traffic and report throughput, "
+                    "latency percentiles and rejections by exception type."
+    )
+    parser.add_argument("url", help="ITN URL, or a path when used with --app")
+    parser.add_argument("--app", help="Test an in-process ASGI app given as module:attribute")
+    parser.add_argument("--requests", "-n", type=int, default=1000, help="Requests to send")
+    parser.add_argument("--concurrency", "-c", type=int, default=32,
+                        help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float,
+                        help="Target requests per second (default: closed loop)")
+    parser.add_argument("--merchant-id", default=os.environ.get("PAYFAST_MERCHANT_ID", ""),
+                        help="Merchant ID to sign for (default: $PAYFAST_MERCHANT_ID)")
+    parser.add_argument("--passphrase", default=os.environ.get("PAYFAST_PASSPHRASE", ""),
+                        help="Passphrase to sign with (default: $PAYFAST_PASSPHRASE)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of replayed ITNs")
+    parser.add_argument("--invalid-signature-rate", type=float, default=0.0,
+                        help="Share of ITNs with a bad signature")
+    parser.add_argument("--wrong-merchant-rate", type=float, default=0.0,
+                        help="Share of ITNs signed for another merchant ID")
+    parser.add_argument("--oversized-rate", type=float, default=0.0, help="Share of oversized ITNs")
+    parser.add_argument("--oversized-bytes", type=int, default=1024 * 1024,
+                        help="Padding added to oversized ITNs")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible traffic")
+    parser.set_defaults(handler=_run_loadtest)
+
+
+def _run_loadtest(args: argparse.Namespace) -> int:
+    import asyncio
+    import importlib
+
+    from .config import PayFastConfig
+    from .loadtest import TrafficMix, run_load_test
+
+    transport = None
+    url = args.url
+    if args.app:
+        import httpx
+
+        module, _, attribute = args.app.partition(":")
+        app = getattr(importlib.import_module(module), attribute or "app")
+        transport = httpx.ASGITransport(app=app)
+        if url.startswith("/"):
+            url = "http://loadtest" + url
+
+    config = PayFastConfig(
+        merchant_id=args.merchant_id, merchant_key="", passphrase=args.passphrase
+    )
+    mix = TrafficMix(
+        duplicate_rate=args.duplicate_rate,
+        invalid_signature_rate=args.invalid_signature_rate,
+        wrong_merchant_rate=args.wrong_merchant_rate,
+        oversized_rate=args.oversized_rate,
+        oversized_bytes=args.oversized_bytes
+    )
+    report = asyncio.run(run_load_test(
+        url,
+        config,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        mix=mix,
+        seed=args.seed,
+        timeout=args.timeout,
+        transport=transport
+    ))
+    print(json.dumps(report.as_dict(), indent=2))
+    return 0
+
+
+def _add_archive_parser(subparsers: Any) -> None:
+    parser = subparsers.add_parser(
+        "archive",
+        help="Query an ITN archive",
+        description="Look up archived ITNs by pf_payment_id or m_payment_id."
+    )
+    commands = parser.add_subparsers(dest="archive_command", required=True)
+    get = commands.add_parser("get", help="Print archived ITNs matching an identifier as JSONL")
+    get.add_argument("id", help="pf_payment_id or m_payment_id")
+    get.add_argument("--dir", default=os.environ.get("PAYFAST_ARCHIVE_DIR"),
+                     help="Archive directory (default: $PAYFAST_ARCHIVE_DIR)")
+    get.add_argument("--field", choices=["pf_payment_id", "m_payment_id"],
+                     help="Only match this field (default: either)")
+    get.set_defaults(handler=_run_archive_get)
+
+
+def _run_archive_get(args: argparse.Namespace) -> int:
+    from .archive import ArchiveReader
+
+    if not args.dir:
+        print("error: --dir or $PAYFAST_ARCHIVE_DIR is required", file=sys.stderr)
+        return 2
+    with ArchiveReader(args.dir) as reader:
+        if args.field:
+            records = reader.lookup(args.id, args.field)
+        else:
+            records = reader.get(args.id)
+    for record in records:
+        print(json.dumps(record))
+    return 0 if records else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the PayFast command line interface
+
+    Args:
+        argv: Arguments (defaults to ``sys.argv[1:]``)
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m fastapi_payfast", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_audit_parser(subparsers)
+    _add_loadtest_parser(subparsers)
+    _add_archive_parser(subparsers)
+    args = parser.parse_args(argv)
+    code: int = args.handler(args)
+    return code
@@ -1,30 +1,121 @@
 """PayFast client implementation"""
 
-from typing import Dict, Any
+import gc
+import json
+from time import perf_counter
+from typing import Dict, Any, Optional, cast
 from fastapi import Request, HTTPException, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 
+from . import metrics as m
 from .config import PayFastConfig
 from .models import PayFastPaymentData, PayFastITNData, PaymentStatus
-from .exceptions import (
-    SignatureVerificationError,
-    InvalidMerchantError,
-    InvalidAmountError
-)
+from .tracing import ITNTrace, ITNTracer
 from .utils import generate_signature, generate_payment_form_html
+from . import core
+from .core import (
+    REJECTION_EXCEPTIONS,
+    REJECTION_MESSAGES,
+    VerificationResult,
+    verify_itn_data
+)
+
+
+# Encoded 400 bodies per rejection reason, with the same JSON ``detail``
+# shape as ``to_http_exception()``
+REJECTION_BODIES: Dict[str, bytes] = {
+    reason: json.dumps({'detail': message}, separators=(',', ':')).encode()
+    for reason, message in REJECTION_MESSAGES.items()
+}
+
+
+def rejection_response(reason: str) -> Response:
+    """
+    Build the 400 response for a rejection reason
+
+    The body is encoded once per reason; the response itself is new on
+    every call, since responses carry per-request state.
+
+    Args:
+        reason: ``VerificationResult.reason`` of a rejected ITN
+
+    Returns:
+        JSON response with a ``detail`` message
+    """
+    return Response(
+        REJECTION_BODIES[reason],
+        status_code=status.HTTP_400_BAD_REQUEST,
+        media_type="application/json"
+    )
 
 
 class PayFastClient:
     """Main client for PayFast API integration"""
     
-    def __init__(self, config: PayFastConfig):
+    def __init__(
+        self,
+        config: PayFastConfig,
+        metrics: Optional[m.MetricsRegistry] = None,
+        tracer: Optional[ITNTracer] = None
+    ):
         """
         Initialize PayFast client
         
         Args:
             config: PayFast configuration object
+            metrics: Optional metrics registry; instrumentation is skipped when None
+            tracer: Optional ITN stage tracer; no traces are allocated when None
         """
         self.config = config
+        self.metrics = metrics
+        self.tracer = tracer
+        # Derived from the frozen config once instead of on every request
+        self._process_url = config.process_url
+    
+    def warmup(self, freeze: bool = False) -> None:
+        """
+        Do all lazy one-off work before the first request
+        
+        Builds the deferred pydantic schemas (including URL validators),
+        and runs a synthetic checkout and ITN through signing, form
+        rendering and verification so the first real request pays none of
+        it. Metrics and traces are not recorded.
+        
+        Args:
+            freeze: Collect and ``gc.freeze()`` afterwards, so pre-fork
+                workers share the warmed objects copy-on-write
+        """
+        payment = PayFastPaymentData.model_validate({
+            'merchant_id': self.config.merchant_id,
+            'merchant_key': self.config.merchant_key,
+            'amount': 1.00,
+            'item_name': "warmup",
+            'return_url': "https://warmup.invalid/return",
+            'cancel_url': "https://warmup.invalid/cancel",
+            'notify_url': "https://warmup.invalid/notify",
+            'subscription_type': 1,
+            'frequency': 3,
+        })
+        data = {k: v for k, v in payment.dict().items() if v is not None}
+        data['signature'] = generate_signature(data, self.config.passphrase)
+        HTMLResponse(content=generate_payment_form_html(self._process_url, data))
+        
+        itn = {
+            'm_payment_id': "warmup",
+            'pf_payment_id': "0",
+            'payment_status': PaymentStatus.COMPLETE.value,
+            'item_name': "warmup",
+            'amount_gross': "1.00",
+            'amount_fee': "-0.05",
+            'amount_net': "0.95",
+            'merchant_id': self.config.merchant_id,
+        }
+        itn['signature'] = generate_signature(itn, self.config.passphrase)
+        verify_itn_data(itn, self.config)
+        
+        if freeze:
+            gc.collect()
+            gc.freeze()
     
     def create_payment(self, payment_data: PayFastPaymentData) -> Dict[str, Any]:
         """
@@ -44,11 +135,15 @@ class PayFastClient:
         data['merchant_key'] = self.config.merchant_key
         
         # Generate signature
+        metrics = self.metrics
+        started = perf_counter() if metrics is not None else 0.0
         signature = generate_signature(data, self.config.passphrase)
         data['signature'] = signature
+        if metrics is not None:
+            metrics.observe(m.OPERATION_SECONDS, perf_counter() - started, m.SIGN)
         
         return {
-            'action_url': self.config.process_url,
+            'action_url': self._process_url,
             'data': data
         }
     
@@ -63,10 +158,15 @@ class PayFastClient:
             HTML string with auto-submitting form
         """
         payment_info = self.create_payment(payment_data)
-        return generate_payment_form_html(
+        metrics = self.metrics
+        started = perf_counter() if metrics is not None else 0.0
+        form_html = generate_payment_form_html(
             payment_info['action_url'],
             payment_info['data']
         )
+        if metrics is not None:
+            metrics.observe(m.OPERATION_SECONDS, perf_counter() - started, m.RENDER)
+        return form_html
     
     def generate_payment_response(self, payment_data: PayFastPaymentData) -> HTMLResponse:
         """
@@ -95,43 +195,104 @@ class PayFastClient:
             SignatureVerificationError: If signature is invalid
             InvalidMerchantError: If merchant ID doesn't match
         """
+        result = await self.try_verify_itn(request)
+        if not result.ok:
+            raise result.to_exception(self.config)
+        return cast(PayFastITNData, result.data)
+    
+    def verify_itn_data(
+        self,
+        data: Dict[str, Any],
+        client_ip: Optional[str] = None,
+        trace: Optional[ITNTrace] = None
+    ) -> PayFastITNData:
+        """
+        Verify already-parsed ITN fields
+        
+        For callers that read the request body themselves; applies the
+        same checks, metrics and tracing as ``verify_itn``.
+        
+        Args:
+            data: ITN fields in the order they were received
+            client_ip: Address the ITN came from, if known
+            trace: Trace started by the caller (one is started if omitted)
+            
+        Returns:
+            Validated ITN data
+            
+        Raises:
+            SignatureVerificationError: If signature is invalid
+            InvalidMerchantError: If merchant ID doesn't match
+        """
+        result = self.try_verify_itn_data(data, client_ip, trace)
+        if not result.ok:
+            raise result.to_exception(self.config)
+        return cast(PayFastITNData, result.data)
+    
+    async def try_verify_itn(self, request: Request) -> VerificationResult:
+        """
+        Verify ITN from PayFast without raising on rejection
+        
+        Rejections return a shared preallocated result; pass its reason
+        to ``rejection_response`` to answer without building an exception
+        or encoding JSON per request.
+        
+        Args:
+            request: FastAPI request object
+            
+        Returns:
+            VerificationResult with the ITN data on success
+        """
+        metrics = self.metrics
+        started = perf_counter() if metrics is not None else 0.0
+        trace = self.tracer.start() if self.tracer is not None else None
+        
         # Get form data
+        if trace is not None:
+            # Read the body separately so network time is not billed to parsing
+            await request.body()
+            trace.mark('body')
         form_data = await request.form()
         data = dict(form_data)
+        if trace is not None:
+            trace.mark('form')
+        
+        if metrics is not None:
+            metrics.observe(m.OPERATION_SECONDS, perf_counter() - started, m.PARSE)
         
-        # Extract signature
-        received_signature = data.get('signature')
-        if not received_signature:
-            raise SignatureVerificationError("Missing signature")
-        
-        # Create data dict for signature verification
-        verification_data = {k: v for k, v in data.items() if k != 'signature'}
-        
-        # Verify signature
-        calculated_signature = generate_signature(verification_data, self.config.passphrase)
-        
-        if calculated_signature != received_signature:
-            raise SignatureVerificationError("Signature mismatch")
-        
-        # Verify merchant ID
-        if data.get('merchant_id') != self.config.merchant_id:
-            raise InvalidMerchantError(
-                f"Merchant ID mismatch: expected {self.config.merchant_id}"
-            )
-        
-        # Validate IP if enabled
-        if self.config.validate_ip:
-            client_ip = request.client.host if request.client else None
-            if client_ip and client_ip not in self.config.valid_ips:
-                # Log warning but don't reject (IP validation is optional)
-                pass
-        
-        # Parse and return ITN data
-        try:
-            itn_data = PayFastITNData(**data)
-            return itn_data
-        except Exception as e:
-            raise SignatureVerificationError(f"Invalid ITN data: {str(e)}")
+        client_ip = request.client.host if request.client else None
+        return self.try_verify_itn_data(data, client_ip, trace)
+    
+    def try_verify_itn_data(
+        self,
+        data: Dict[str, Any],
+        client_ip: Optional[str] = None,
+        trace: Optional[ITNTrace] = None
+    ) -> VerificationResult:
+        """
+        Verify already-parsed ITN fields without raising on rejection
+        
+        Args:
+            data: ITN fields in the order they were received
+            client_ip: Address the ITN came from, if known (source
+                addresses are checked by ``ITNPipeline``, not here)
+            trace: Trace started by the caller (one is started if omitted)
+            
+        Returns:
+            VerificationResult with the ITN data on success
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return core.try_verify_itn_data(data, self.config, self.metrics)
+        
+        if trace is None:
+            trace = tracer.start()
+        result = core.try_verify_itn_data(data, self.config, self.metrics, trace)
+        if result.ok:
+            tracer.finish(trace, "ok", cast(PayFastITNData, result.data).pf_payment_id)
+        else:
+            tracer.finish(trace, REJECTION_EXCEPTIONS[cast(str, result.reason)].__name__)
+        return result
     
     def validate_payment_amount(
         self,
@@ -163,5 +324,3 @@ class PayFastClient:
             True if payment status is COMPLETE
         """
         return itn_data.payment_status == PaymentStatus.COMPLETE
-
-
@@ -15,6 +15,7 @@ class PayFastConfig(BaseModel):
     
     class Config:
         frozen = True  # Make config immutable
+        defer_build = True
     
     @property
     def process_url(self) -> str:
@@ -30,6 +31,18 @@ class PayFastConfig(BaseModel):
             return "https://sandbox.payfast.co.za/eng/query/validate"
         return "https://www.payfast.co.za/eng/query/validate"
     
+    @property
+    def api_url(self) -> str:
+        """Get the PayFast REST API base URL"""
+        return "https://api.payfast.co.za"
+    
+    @property
+    def api_params(self) -> dict[str, str]:
+        """Get query parameters required on every REST API call"""
+        if self.sandbox:
+            return {"testing": "true"}
+        return {}
+    
     @property
     def valid_ips(self) -> list[str]:
         """Get list of valid PayFast IP addresses"""
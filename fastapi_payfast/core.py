@@ -0,0 +1,197 @@
+"""Framework-free PayFast core: signing, verification and models
+
+Nothing here imports FastAPI or Starlette, so batch workers, CLIs and
+other non-web processes can sign and verify without loading a web
+framework.
+"""
+
+from time import perf_counter
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Type, cast
+
+from . import metrics as m
+from .config import PayFastConfig
+from .exceptions import (
+    PayFastException,
+    SignatureVerificationError,
+    InvalidMerchantError,
+    InvalidAmountError
+)
+from .models import (
+    PayFastPaymentData,
+    PayFastITNData,
+    PaymentStatus,
+    SubscriptionType,
+    FrequencyType
+)
+from .tracing import ITNTrace
+from .utils import generate_signature, generate_api_signature, parse_cents
+
+
+# Rejection reason codes
+MISSING_SIGNATURE = "missing_signature"
+SIGNATURE_MISMATCH = "signature_mismatch"
+MERCHANT_MISMATCH = "merchant_mismatch"
+INVALID_DATA = "invalid_data"
+
+# Constant client-facing message per reason; unlike the exception
+# messages these never echo configuration or input back
+REJECTION_MESSAGES: Dict[str, str] = {
+    MISSING_SIGNATURE: "Missing signature",
+    SIGNATURE_MISMATCH: "Signature mismatch",
+    MERCHANT_MISMATCH: "Merchant ID mismatch",
+    INVALID_DATA: "Invalid ITN data",
+}
+
+REJECTION_EXCEPTIONS: Dict[str, Type[PayFastException]] = {
+    MISSING_SIGNATURE: SignatureVerificationError,
+    SIGNATURE_MISMATCH: SignatureVerificationError,
+    MERCHANT_MISMATCH: InvalidMerchantError,
+    INVALID_DATA: SignatureVerificationError,
+}
+
+
+class VerificationResult(NamedTuple):
+    """Outcome of a non-raising ITN verification"""
+    ok: bool
+    reason: Optional[str] = None
+    data: Optional[PayFastITNData] = None
+    detail: Optional[str] = None
+
+    def to_exception(self, config: PayFastConfig) -> PayFastException:
+        """Build the exception the raising API reports for this rejection"""
+        if self.reason == MERCHANT_MISMATCH:
+            return InvalidMerchantError(f"Merchant ID mismatch: expected {config.merchant_id}")
+        if self.reason == INVALID_DATA:
+            return SignatureVerificationError(f"Invalid ITN data: {self.detail}")
+        reason = cast(str, self.reason)
+        return REJECTION_EXCEPTIONS[reason](REJECTION_MESSAGES[reason])
+
+
+# Rejections carry no per-request state, so one instance each is shared
+REJECTED: Dict[str, VerificationResult] = {
+    reason: VerificationResult(False, reason) for reason in REJECTION_MESSAGES
+}
+
+
+def verify_signature(data: Mapping[str, Any], passphrase: str = '') -> bool:
+    """
+    Check the ``signature`` field of a PayFast payload
+
+    Args:
+        data: Payload fields in the order they were received
+        passphrase: Merchant passphrase
+
+    Returns:
+        True if the signature is present and matches
+    """
+    received: Optional[str] = data.get('signature')
+    if not received:
+        return False
+    unsigned = {k: v for k, v in data.items() if k != 'signature'}
+    return generate_signature(unsigned, passphrase) == received
+
+
+def try_verify_itn_data(
+    data: Mapping[str, Any],
+    config: PayFastConfig,
+    metrics: Optional[m.MetricsRegistry] = None,
+    trace: Optional[ITNTrace] = None
+) -> VerificationResult:
+    """
+    Verify already-parsed ITN fields without raising
+
+    Performs the same checks as ``PayFastClient.verify_itn`` without a
+    request object; the client calls this for every ITN.
+
+    Args:
+        data: ITN fields in the order they were received
+        config: Merchant configuration
+        metrics: Optional registry counting outcomes and verify latency
+        trace: Optional trace marked after each check
+
+    Returns:
+        VerificationResult with the ITN model on success
+    """
+    started = perf_counter() if metrics is not None else 0.0
+
+    received_signature = data.get('signature')
+    if not received_signature:
+        if metrics is not None:
+            metrics.inc(m.SIGNATURE_FAILURES)
+        return REJECTED[MISSING_SIGNATURE]
+    unsigned = {k: v for k, v in data.items() if k != 'signature'}
+    calculated_signature = generate_signature(unsigned, config.passphrase)
+    if metrics is not None:
+        metrics.observe(m.OPERATION_SECONDS, perf_counter() - started, m.VERIFY)
+    if trace is not None:
+        trace.mark('signature')
+    if calculated_signature != received_signature:
+        if metrics is not None:
+            metrics.inc(m.SIGNATURE_FAILURES)
+        return REJECTED[SIGNATURE_MISMATCH]
+
+    if data.get('merchant_id') != config.merchant_id:
+        if metrics is not None:
+            metrics.inc(m.MERCHANT_MISMATCHES)
+        return REJECTED[MERCHANT_MISMATCH]
+    if trace is not None:
+        trace.mark('merchant')
+
+    try:
+        itn_data = PayFastITNData(**data)
+    except Exception as e:
+        if metrics is not None:
+            metrics.inc(m.INVALID_DATA_FAILURES)
+        return VerificationResult(False, INVALID_DATA, detail=str(e))
+    if trace is not None:
+        trace.mark('model')
+    if metrics is not None:
+        metrics.inc(m.ITN_TOTAL, (("status", itn_data.payment_status),))
+    return VerificationResult(True, data=itn_data)
+
+
+def verify_itn_data(data: Mapping[str, Any], config: PayFastConfig) -> PayFastITNData:
+    """
+    Verify already-parsed ITN fields and build the ITN model
+
+    Args:
+        data: ITN fields in the order they were received
+        config: Merchant configuration
+
+    Returns:
+        Validated ITN data
+
+    Raises:
+        SignatureVerificationError: If signature is missing or invalid
+        InvalidMerchantError: If merchant ID doesn't match
+    """
+    result = try_verify_itn_data(data, config)
+    if not result.ok:
+        raise result.to_exception(config)
+    return cast(PayFastITNData, result.data)
+
+
+__all__ = [
+    "PayFastConfig",
+    "PayFastPaymentData",
+    "PayFastITNData",
+    "PaymentStatus",
+    "SubscriptionType",
+    "FrequencyType",
+    "PayFastException",
+    "SignatureVerificationError",
+    "InvalidMerchantError",
+    "InvalidAmountError",
+    "generate_signature",
+    "generate_api_signature",
+    "parse_cents",
+    "MISSING_SIGNATURE",
+    "SIGNATURE_MISMATCH",
+    "MERCHANT_MISMATCH",
+    "INVALID_DATA",
+    "REJECTION_MESSAGES",
+    "VerificationResult",
+    "verify_signature",
+    "try_verify_itn_data",
+    "verify_itn_data",
+]
@@ -0,0 +1,82 @@
+"""PayFast debug endpoints"""
+
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from .client import PayFastClient
+from .profiling import MODES, Profiler
+
+
+def create_debug_router(
+    client: PayFastClient,
+    token: str,
+    prefix: str = "/payfast/debug",
+    max_profile_duration: float = 30.0
+) -> APIRouter:
+    """
+    Create an auth-guarded router with PayFast diagnostics
+
+    Every route requires the ``X-PayFast-Debug-Token`` header to match
+    ``token``. Do not mount this router without a strong token.
+
+    Args:
+        client: PayFast client whose diagnostics are exposed
+        token: Shared secret required on every request
+        prefix: Route prefix
+        max_profile_duration: Upper bound on a profiling session in seconds
+
+    Returns:
+        FastAPI APIRouter to include in your app
+    """
+    if not token:
+        raise ValueError("A debug token is required")
+
+    def require_token(x_payfast_debug_token: Optional[str] = Header(None)) -> None:
+        if not x_payfast_debug_token or not secrets.compare_digest(x_payfast_debug_token, token):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid debug token"
+            )
+
+    router = APIRouter(
+        prefix=prefix, dependencies=[Depends(require_token)], include_in_schema=False
+    )
+
+    @router.get("/slow-itns")
+    async def slow_itns() -> Dict[str, Any]:
+        """Dump the ring buffer of slow ITN traces"""
+        tracer = client.tracer
+        if tracer is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="ITN tracing is disabled"
+            )
+        return {
+            'threshold_ms': tracer.slow_threshold * 1000,
+            'samples': list(tracer.samples),
+        }
+
+    profiler = Profiler(client, max_duration=max_profile_duration)
+
+    @router.post("/profile", response_class=PlainTextResponse)
+    async def profile(
+        mode: str = Query("cprofile"),
+        duration: float = Query(10.0, gt=0)
+    ) -> PlainTextResponse:
+        """Profile checkout and ITN handling for a bounded time"""
+        if mode not in MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown profile mode: {mode}"
+            )
+        try:
+            result = await profiler.run(mode, duration)
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        return PlainTextResponse(result.output, headers={
+            'X-PayFast-Profile-Calls': str(result.calls),
+            'X-PayFast-Profile-Seconds': f"{result.duration:.3f}",
+        })
+
+    return router
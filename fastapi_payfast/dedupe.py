@@ -0,0 +1,155 @@
+"""Cross-worker ITN dedupe table in shared memory"""
+
+import hashlib
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, cast
+
+
+_MAGIC = b"PFDD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQ")
+# Each slot is two native uint64 words: key hash, expiry in epoch milliseconds
+_SLOT_WORDS = 2
+_EMPTY = 0
+
+
+def _open(name: Optional[str], create: bool, size: int) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, create, size, track=create)
+    shm = shared_memory.SharedMemory(name, create, size)
+    if not create:
+        # Before 3.13 attaching registers the segment too, and the first
+        # attached process to exit would unlink it for everyone
+        resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+    return shm
+
+
+def dedupe_key(pf_payment_id: str, status: str) -> int:
+    """64-bit non-zero hash of an ITN's ``pf_payment_id`` and status"""
+    digest = hashlib.blake2b(f"{pf_payment_id}|{status}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class ITNDedupeTable:
+    """
+    Fixed-size open-addressing hash table of recently seen ITNs
+
+    Slots live in a ``multiprocessing.shared_memory`` segment, so every
+    worker sees every claim. Create the table in the master process
+    before forking (e.g. gunicorn ``preload_app``) or create it once by
+    name and ``attach`` from each worker.
+
+    There is no compare-and-swap: claiming writes the slot's key (an
+    aligned 8-byte store, which is not torn) and re-reads it, probing
+    again if another worker overwrote it. Every race resolves towards
+    treating an ITN as new, so this is a microsecond pre-check in front
+    of idempotent processing, not a replacement for it. Expired slots
+    are reused in place, and when ``max_probe`` slots in a row are live
+    the table fails open the same way.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        slots: int = 1 << 16,
+        ttl: float = 86400.0,
+        max_probe: int = 32,
+        create: bool = True
+    ):
+        """
+        Initialize dedupe table
+
+        Args:
+            name: Shared memory segment name (generated when None)
+            slots: Capacity; keep it well above the ITNs expected per ``ttl``
+            ttl: Seconds an ITN is remembered
+            max_probe: Slots inspected per lookup before failing open
+            create: Create the segment, or attach to an existing one
+        """
+        self.ttl_ms = int(ttl * 1000)
+        self.max_probe = max_probe
+        if create:
+            self._shm = _open(name, True, _HEADER.size + slots * _SLOT_WORDS * 8)
+            buf = cast(memoryview, self._shm.buf)
+            _HEADER.pack_into(buf, 0, _MAGIC, _VERSION, slots)
+        else:
+            self._shm = _open(name, False, 0)
+            buf = cast(memoryview, self._shm.buf)
+            magic, version, slots = _HEADER.unpack_from(buf, 0)
+            if magic != _MAGIC or version != _VERSION:
+                self._shm.close()
+                raise ValueError(f"Shared memory segment {name!r} is not an ITN dedupe table")
+        self.slots = slots
+        self._words = buf[_HEADER.size:_HEADER.size + slots * _SLOT_WORDS * 8].cast('Q')
+
+    @classmethod
+    def attach(cls, name: str, ttl: float = 86400.0, max_probe: int = 32) -> "ITNDedupeTable":
+        """Attach to a table another process created"""
+        return cls(name, ttl=ttl, max_probe=max_probe, create=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def claim(self, pf_payment_id: str, status: str) -> bool:
+        """
+        Record an ITN unless it was already seen within the TTL
+
+        Returns:
+            True if this is the first delivery, False for a duplicate
+        """
+        key = dedupe_key(pf_payment_id, status)
+        now = int(time.time() * 1000)
+        words = self._words
+        start = key % self.slots
+        for _ in range(2):
+            free = None
+            for probe in range(min(self.max_probe, self.slots)):
+                index = (start + probe) % self.slots * _SLOT_WORDS
+                slot_key = words[index]
+                if slot_key == key:
+                    if words[index + 1] > now:
+                        return False
+                    words[index + 1] = now + self.ttl_ms
+                    return True
+                if slot_key == _EMPTY:
+                    # Nothing further along the chain
+                    if free is None:
+                        free = index
+                    break
+                if free is None and words[index + 1] <= now:
+                    free = index
+            if free is None:
+                return True
+            words[free] = key
+            words[free + 1] = now + self.ttl_ms
+            if words[free] == key:
+                return True
+            # Another worker took the slot for a different ITN; probe again
+        return True
+
+    def release(self, pf_payment_id: str, status: str) -> None:
+        """Forget an ITN, e.g. when processing it failed and PayFast will retry"""
+        key = dedupe_key(pf_payment_id, status)
+        words = self._words
+        start = key % self.slots
+        for probe in range(min(self.max_probe, self.slots)):
+            index = (start + probe) % self.slots * _SLOT_WORDS
+            slot_key = words[index]
+            if slot_key == key:
+                words[index + 1] = 0
+                return
+            if slot_key == _EMPTY:
+                return
+
+    def close(self) -> None:
+        """Detach this process from the segment"""
+        self._words.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the segment; call once, from the process that created it"""
+        self._shm.unlink()
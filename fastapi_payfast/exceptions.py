@@ -1,6 +1,9 @@
 """PayFast custom exceptions"""
 
-from fastapi import HTTPException, status
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastapi import HTTPException
 
 
 class PayFastException(Exception):
@@ -15,7 +18,9 @@ class SignatureVerificationError(PayFastException):
         self.message = message
         super().__init__(self.message)
     
-    def to_http_exception(self) -> HTTPException:
+    def to_http_exception(self) -> "HTTPException":
+        from fastapi import HTTPException, status
+
         return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=self.message
@@ -29,7 +34,9 @@ class InvalidMerchantError(PayFastException):
         self.message = message
         super().__init__(self.message)
     
-    def to_http_exception(self) -> HTTPException:
+    def to_http_exception(self) -> "HTTPException":
+        from fastapi import HTTPException, status
+
         return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=self.message
@@ -45,8 +52,44 @@ class InvalidAmountError(PayFastException):
         self.message = f"Amount mismatch: expected {expected}, received {received}"
         super().__init__(self.message)
     
-    def to_http_exception(self) -> HTTPException:
+    def to_http_exception(self) -> "HTTPException":
+        from fastapi import HTTPException, status
+
         return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=self.message
-        )
\ No newline at end of file
+        )
+
+
+class PayFastAPIError(PayFastException):
+    """Raised when a PayFast REST API call is rejected"""
+    
+    def __init__(self, status_code: int, message: str = "PayFast API request failed"):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"{status_code}: {message}")
+    
+    def to_http_exception(self) -> "HTTPException":
+        from fastapi import HTTPException, status
+
+        return HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=self.message
+        )
+
+
+class ITNValidationError(PayFastException):
+    """Raised when an ITN fails a verification pipeline check"""
+    
+    def __init__(self, message: str = "ITN validation failed", status_code: int = 400):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(self.message)
+    
+    def to_http_exception(self) -> "HTTPException":
+        from fastapi import HTTPException
+
+        return HTTPException(
+            status_code=self.status_code,
+            detail=self.message
+        )
@@ -0,0 +1,310 @@
+"""Fan-out of verified ITNs to internal webhook destinations"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from . import metrics as m
+from .models import PayFastITNData
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Outcomes counted per destination
+DELIVERED = "delivered"
+FAILED = "failed"
+REJECTED = "rejected"
+DROPPED = "dropped"
+
+
+class Destination(NamedTuple):
+    """An internal service receiving verified ITNs"""
+    name: str
+    url: str
+    batch_size: int = 1
+    max_delay: float = 0.05
+    concurrency: int = 4
+    timeout: float = 5.0
+    retries: int = 3
+    backoff: float = 0.1
+    max_backoff: float = 5.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    queue_size: int = 10000
+    headers: Optional[Dict[str, str]] = None
+    transport: Any = None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until ``allow`` may succeed again"""
+        if self._opened_at is None:
+            return 0.0
+        remaining = self._opened_at + self.reset_timeout - self.clock()
+        # While a half-open trial is in flight, check back shortly
+        return remaining if remaining > 0 else 0.05
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial that ended without an outcome"""
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> bool:
+        """
+        Count a failed call
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        self.failures += 1
+        if self._trial or (self._opened_at is None and self.failures >= self.failure_threshold):
+            self._opened_at = self.clock()
+            self._trial = False
+            return True
+        return False
+
+
+class _Sender:
+    """Queue, workers, connection pool and breaker for one destination"""
+
+    def __init__(self, destination: Destination, metrics: Optional[m.MetricsRegistry]):
+        self.destination = destination
+        self.metrics = metrics
+        self.breaker = CircuitBreaker(destination.failure_threshold, destination.reset_timeout)
+        self.queue: asyncio.Queue = asyncio.Queue(destination.queue_size)
+        self.stats: Counter = Counter()
+        self._labels = {
+            outcome: (("destination", destination.name), ("outcome", outcome))
+            for outcome in (DELIVERED, FAILED, REJECTED, DROPPED)
+        }
+        self._destination_labels = (("destination", destination.name),)
+        self._http: Any = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        d = self.destination
+        self._http = httpx.AsyncClient(
+            timeout=d.timeout,
+            headers=d.headers,
+            transport=d.transport,
+            limits=httpx.Limits(
+                max_connections=d.concurrency, max_keepalive_connections=d.concurrency
+            )
+        )
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._work()) for _ in range(d.concurrency)]
+
+    def _count(self, outcome: str, events: int) -> None:
+        self.stats[outcome] += events
+        if self.metrics is not None:
+            self.metrics.inc(m.WEBHOOK_EVENTS, self._labels[outcome], events)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._count(DROPPED, 1)
+
+    async def _work(self) -> None:
+        d = self.destination
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + d.max_delay
+            while len(batch) < d.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Webhook delivery to %s failed unexpectedly", d.name)
+                self._count(FAILED, len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        d = self.destination
+        payload: Any = batch[0] if d.batch_size == 1 else {'events': batch}
+        for attempt in range(d.retries + 1):
+            while True:
+                trial = self.breaker.state == HALF_OPEN
+                if self.breaker.allow():
+                    break
+                await asyncio.sleep(self.breaker.retry_after())
+            started = time.perf_counter()
+            try:
+                response = await self._http.post(d.url, json=payload)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = None
+            except asyncio.CancelledError:
+                # Otherwise the breaker would wait forever for this trial's outcome
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            if self.metrics is not None:
+                self.metrics.observe(
+                    m.WEBHOOK_SECONDS, time.perf_counter() - started, self._destination_labels
+                )
+
+            if status_code is not None and status_code < 300:
+                self.breaker.record_success()
+                self._count(DELIVERED, len(batch))
+                return
+            if status_code is not None and status_code < 500 and status_code not in (408, 429):
+                # The receiver refused these events; retrying will not help
+                self.breaker.record_success()
+                logger.warning(
+                    "Webhook %s rejected %d events with %d", d.name, len(batch), status_code
+                )
+                self._count(REJECTED, len(batch))
+                return
+            if self.breaker.record_failure():
+                logger.warning(
+                    "Webhook %s circuit opened after %d failures", d.name, self.breaker.failures
+                )
+                if self.metrics is not None:
+                    self.metrics.inc(m.WEBHOOK_CIRCUIT_OPENS, self._destination_labels)
+            if attempt < d.retries:
+                # Full jitter keeps retrying workers from synchronising
+                await asyncio.sleep(random.uniform(0, min(d.max_backoff, d.backoff * 2 ** attempt)))
+        logger.warning("Webhook %s gave up on %d events", d.name, len(batch))
+        self._count(FAILED, len(batch))
+
+    async def aclose(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Webhook %s closed with %d events undelivered",
+                self.destination.name,
+                self.queue.qsize()
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
+
+
+class WebhookFanout:
+    """
+    Forwards verified ITNs to several internal services
+
+    ``publish`` only enqueues, so ITN handling never waits on a
+    destination. Each destination has its own bounded queue, workers,
+    connection pool and circuit breaker: a slow or failing service fills
+    its own queue (the overflow is dropped and counted) without affecting
+    the others. Events are held in memory only, so persist side effects
+    that must survive a restart before acknowledging the ITN.
+    """
+
+    def __init__(
+        self,
+        destinations: Iterable[Destination],
+        metrics: Optional[m.MetricsRegistry] = None
+    ):
+        """
+        Initialize fan-out
+
+        Args:
+            destinations: Services to forward to
+            metrics: Optional registry for per-destination counters and latency
+        """
+        if httpx is None:
+            raise ImportError(
+                "WebhookFanout requires httpx. Install with: pip install fastapi-payfast[api]"
+            )
+        self._senders = {d.name: _Sender(d, metrics) for d in destinations}
+        self._started = False
+
+    def sender(self, name: str) -> _Sender:
+        return self._senders[name]
+
+    @property
+    def stats(self) -> Dict[str, Counter]:
+        """Outcome counts per destination"""
+        return {name: sender.stats for name, sender in self._senders.items()}
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Queue an event for every destination; must be called on the event loop"""
+        if not self._started:
+            self._started = True
+            for sender in self._senders.values():
+                sender.start()
+        for sender in self._senders.values():
+            sender.offer(event)
+
+    async def __call__(self, itn: PayFastITNData) -> None:
+        self.publish(itn.dict())
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Deliver what is queued (up to ``timeout`` per destination) and stop"""
+        if self._started:
+            await asyncio.gather(*(sender.aclose(timeout) for sender in self._senders.values()))
+            self._started = False
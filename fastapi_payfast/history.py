@@ -0,0 +1,146 @@
+"""PayFast transaction history export parser"""
+
+import csv
+import re
+from collections import namedtuple
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+)
+
+from .utils import parse_cents
+
+
+AMOUNT_COLUMNS = frozenset({'gross', 'fee', 'net', 'balance', 'amount'})
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_column(name: str) -> str:
+    """
+    Normalize an export column header to a Python identifier
+
+    Args:
+        name: Raw header, e.g. ``"PF Payment ID"``
+
+    Returns:
+        Snake-case name, e.g. ``"pf_payment_id"``
+    """
+    return _NON_WORD.sub('_', name.strip().lower()).strip('_')
+
+
+class _RecordParser:
+    """Maps raw CSV rows to typed, projected records"""
+
+    def __init__(self, header: Sequence[str], columns: Optional[Sequence[str]] = None):
+        names = [normalize_column(h) for h in header]
+        if columns is None:
+            columns = names
+            self.indices = list(range(len(names)))
+        else:
+            missing = [c for c in columns if c not in names]
+            if missing:
+                raise ValueError(f"Unknown columns: {', '.join(missing)}")
+            self.indices = [names.index(c) for c in columns]
+        self.converters: List[Callable[[str], Any]] = [
+            _parse_amount if c in AMOUNT_COLUMNS else str for c in columns
+        ]
+        # Duplicate or non-identifier headers become positional names (_0, _1, ...)
+        # Fields are only known at runtime, which mypy's namedtuple support cannot express
+        self.record_type: Type[Any] = namedtuple(  # type: ignore[misc]
+            'TransactionRecord', columns, rename=True
+        )
+
+    def parse(self, row: List[str]) -> tuple:
+        record: tuple = self.record_type._make([
+            convert(row[i]) for i, convert in zip(self.indices, self.converters)
+        ])
+        return record
+
+
+def _parse_amount(value: str) -> Optional[int]:
+    return parse_cents(value) if value.strip() else None
+
+
+def iter_transaction_records(
+    lines: Iterable[str],
+    columns: Optional[Sequence[str]] = None
+) -> Iterator[tuple]:
+    """
+    Incrementally parse a transaction history CSV export
+
+    Rows are parsed one at a time, so memory stays flat regardless of
+    export size. Amount columns are returned as integer cents.
+
+    Args:
+        lines: Iterable of CSV lines (e.g. an open file)
+        columns: Optional normalized column names to keep, in order
+
+    Yields:
+        ``TransactionRecord`` named tuples containing only ``columns``
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    parser = _RecordParser(header, columns)
+    for row in reader:
+        if row:
+            yield parser.parse(row)
+
+
+async def aiter_transaction_records(
+    lines: AsyncIterable[str],
+    columns: Optional[Sequence[str]] = None
+) -> AsyncIterator[tuple]:
+    """
+    Async counterpart of ``iter_transaction_records`` for streamed bodies
+
+    Args:
+        lines: Async iterable of CSV lines (e.g. ``response.aiter_lines()``)
+        columns: Optional normalized column names to keep, in order
+
+    Yields:
+        ``TransactionRecord`` named tuples containing only ``columns``
+    """
+    parser = None
+    pending = ''
+    async for line in lines:
+        pending = pending + '\n' + line if pending else line
+        # An odd quote count means a quoted field spans onto the next line
+        if pending.count('"') % 2:
+            continue
+        row = next(csv.reader([pending]), None)
+        pending = ''
+        if not row:
+            continue
+        if parser is None:
+            parser = _RecordParser(row, columns)
+        else:
+            yield parser.parse(row)
+
+
+def read_transaction_history(
+    path: str,
+    columns: Optional[Sequence[str]] = None
+) -> Iterator[tuple]:
+    """
+    Stream records from a transaction history export on disk
+
+    Args:
+        path: CSV file path
+        columns: Optional normalized column names to keep, in order
+
+    Yields:
+        ``TransactionRecord`` named tuples
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from iter_transaction_records(f, columns)
@@ -0,0 +1,54 @@
+"""Application lifespan helper for PayFast warm-up"""
+
+import gc
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from .api import PayFastAPI
+from .client import PayFastClient
+
+
+logger = logging.getLogger(__name__)
+
+
+def payfast_lifespan(
+    client: PayFastClient,
+    api: Optional[PayFastAPI] = None,
+    freeze: bool = False
+) -> Callable[[Any], Any]:
+    """
+    Create a FastAPI lifespan that warms PayFast up before serving
+
+    On startup the client is warmed up and, when ``api`` is given, a
+    ping opens its connection pool so the first API call skips the TLS
+    handshake. A failed ping is logged, not raised. On shutdown ``api``
+    is closed.
+
+    Args:
+        client: PayFast client to warm up
+        api: Optional REST API client whose pool should be primed
+        freeze: ``gc.freeze()`` after warm-up (for pre-fork servers,
+            prefer calling ``client.warmup(freeze=True)`` before forking)
+
+    Returns:
+        Lifespan callable for ``FastAPI(lifespan=...)``
+    """
+    @asynccontextmanager
+    async def lifespan(app: Any) -> AsyncIterator[None]:
+        client.warmup()
+        if api is not None:
+            try:
+                await api.ping()
+            except Exception:
+                logger.warning("PayFast API warm-up ping failed", exc_info=True)
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        try:
+            yield
+        finally:
+            if api is not None:
+                await api.aclose()
+
+    return lifespan
@@ -0,0 +1,271 @@
+"""Async ITN load generator"""
+
+import asyncio
+import json
+import random
+import time
+import urllib.parse
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import PayFastConfig
+from .core import REJECTION_EXCEPTIONS, REJECTION_MESSAGES
+from .utils import generate_signature
+
+
+VALID = "valid"
+DUPLICATE = "duplicate"
+INVALID_SIGNATURE = "invalid_signature"
+WRONG_MERCHANT = "wrong_merchant"
+OVERSIZED = "oversized"
+
+# Rejection details produced by PayFastClient.verify_itn, mapped back to
+# the exception that raised them
+ERROR_DETAILS: Tuple[Tuple[str, str], ...] = tuple(
+    (message, REJECTION_EXCEPTIONS[reason].__name__)
+    for reason, message in REJECTION_MESSAGES.items()
+)
+
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('p999', 0.999))
+
+
+class TrafficMix(NamedTuple):
+    """Share of requests exercising each defensive path; the rest are valid"""
+    duplicate_rate: float = 0.0
+    invalid_signature_rate: float = 0.0
+    wrong_merchant_rate: float = 0.0
+    oversized_rate: float = 0.0
+    oversized_bytes: int = 1024 * 1024
+
+
+class ITNGenerator:
+    """Produces signed, urlencoded ITN bodies for a traffic mix"""
+
+    def __init__(
+        self,
+        config: PayFastConfig,
+        mix: TrafficMix = TrafficMix(),
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize generator
+
+        Args:
+            config: Merchant configuration ITNs are signed for
+            mix: Traffic mix
+            seed: Seed for reproducible traffic
+        """
+        self.config = config
+        self.mix = mix
+        self.random = random.Random(seed)
+        self._recent: Deque[bytes] = deque(maxlen=1000)
+        self._thresholds = []
+        cumulative = 0.0
+        for kind, rate in (
+            (DUPLICATE, mix.duplicate_rate),
+            (INVALID_SIGNATURE, mix.invalid_signature_rate),
+            (WRONG_MERCHANT, mix.wrong_merchant_rate),
+            (OVERSIZED, mix.oversized_rate),
+        ):
+            cumulative += rate
+            self._thresholds.append((cumulative, kind))
+        if cumulative > 1:
+            raise ValueError("Traffic mix rates must not add up to more than 1")
+
+    def fields(
+        self,
+        index: int,
+        merchant_id: Optional[str] = None,
+        padding: int = 0
+    ) -> Dict[str, str]:
+        """Build a signed ITN in PayFast field order"""
+        cents = self.random.randint(500, 500000)
+        fee = cents * 35 // 1000 + 200
+        fields = {
+            'm_payment_id': f"LOAD-{index:08d}",
+            'pf_payment_id': str(2000000 + index),
+            'payment_status': "COMPLETE",
+            'item_name': "Load test item",
+            'amount_gross': f"{cents / 100:.2f}",
+            'amount_fee': f"{-fee / 100:.2f}",
+            'amount_net': f"{(cents - fee) / 100:.2f}",
+        }
+        if padding:
+            fields['custom_str1'] = "x" * padding
+        fields['merchant_id'] = merchant_id or self.config.merchant_id
+        fields['signature'] = generate_signature(fields, self.config.passphrase)
+        return fields
+
+    def next(self, index: int) -> Tuple[str, bytes]:
+        """
+        Generate the body for request ``index``
+
+        Returns:
+            ``(kind, body)``
+        """
+        draw = self.random.random()
+        kind = VALID
+        for threshold, candidate in self._thresholds:
+            if draw < threshold:
+                kind = candidate
+                break
+
+        if kind == DUPLICATE:
+            if self._recent:
+                return kind, self._recent[self.random.randrange(len(self._recent))]
+            kind = VALID
+        if kind == WRONG_MERCHANT:
+            fields = self.fields(index, merchant_id="0" + self.config.merchant_id)
+        elif kind == OVERSIZED:
+            fields = self.fields(index, padding=self.mix.oversized_bytes)
+        else:
+            fields = self.fields(index)
+        if kind == INVALID_SIGNATURE:
+            fields['signature'] = fields['signature'][::-1]
+        body = urllib.parse.urlencode(fields).encode()
+        if kind == VALID:
+            self._recent.append(body)
+        return kind, body
+
+
+def classify(status_code: int, body: bytes) -> str:
+    """Map a merchant response to ``ok``, an exception name or ``HTTP <status>``"""
+    if 200 <= status_code < 300:
+        return "ok"
+    try:
+        detail = json.loads(body).get('detail')
+    except (ValueError, AttributeError):
+        detail = None
+    if isinstance(detail, str):
+        for prefix, name in ERROR_DETAILS:
+            if detail.startswith(prefix):
+                return name
+    return f"HTTP {status_code}"
+
+
+class LoadTestReport:
+    """Throughput, latency percentiles and outcome breakdown of a run"""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.by_kind: Dict[str, Counter] = {}
+        self.elapsed = 0.0
+
+    def record(self, kind: str, outcome: str, latency: float) -> None:
+        self.latencies.append(latency)
+        self.outcomes[outcome] += 1
+        self.by_kind.setdefault(kind, Counter())[outcome] += 1
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second"""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def percentiles(self) -> Dict[str, float]:
+        """Nearest-rank latency percentiles in milliseconds"""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {name: 0.0 for name, _ in PERCENTILES}
+        last = len(ordered) - 1
+        return {
+            name: round(ordered[min(last, int(q * len(ordered)))] * 1000, 3)
+            for name, q in PERCENTILES
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.total,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'requests_per_second': round(self.throughput, 1),
+            'latency_ms': self.percentiles(),
+            'outcomes': dict(self.outcomes),
+            'by_kind': {kind: dict(counts) for kind, counts in sorted(self.by_kind.items())},
+        }
+
+
+async def run_load_test(
+    url: str,
+    config: PayFastConfig,
+    requests: int = 1000,
+    concurrency: int = 32,
+    rate: Optional[float] = None,
+    mix: TrafficMix = TrafficMix(),
+    seed: Optional[int] = None,
+    timeout: float = 10.0,
+    transport: Any = None
+) -> LoadTestReport:
+    """
+    Post signed ITNs at a notify URL and measure the responses
+
+    Without ``rate`` the test is closed-loop: ``concurrency`` workers
+    send back to back. With ``rate`` requests are scheduled open-loop at
+    that many per second (at most ``concurrency`` in flight) and latency
+    is measured from the scheduled send time, so queueing caused by a
+    slow server is not hidden.
+
+    Args:
+        url: Merchant ITN URL
+        config: Merchant configuration ITNs are signed for
+        requests: Number of requests to send
+        concurrency: Maximum requests in flight
+        rate: Target requests per second (closed-loop when None)
+        mix: Traffic mix
+        seed: Seed for reproducible traffic
+        timeout: Request timeout in seconds
+        transport: httpx transport, e.g. ``httpx.ASGITransport(app=app)``
+            to test an in-process app
+
+    Returns:
+        LoadTestReport
+    """
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("httpx is not installed. Install with: pip install fastapi-payfast[api]")
+
+    generator = ITNGenerator(config, mix, seed)
+    report = LoadTestReport()
+    headers = {'content-type': 'application/x-www-form-urlencoded'}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(transport=transport, timeout=timeout, limits=limits) as http:
+        async def send(index: int, scheduled: float) -> None:
+            kind, body = generator.next(index)
+            try:
+                response = await http.post(url, content=body, headers=headers)
+                outcome = classify(response.status_code, response.content)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            report.record(kind, outcome, time.perf_counter() - scheduled)
+
+        started = time.perf_counter()
+        if rate is None:
+            indexes = iter(range(requests))
+
+            async def worker() -> None:
+                for index in indexes:
+                    await send(index, time.perf_counter())
+
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+        else:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def fire(index: int, scheduled: float) -> None:
+                async with slots:
+                    await send(index, scheduled)
+
+            tasks = []
+            for index in range(requests):
+                scheduled = started + index / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(fire(index, scheduled)))
+            await asyncio.gather(*tasks)
+        report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,432 @@
+"""PayFast instrumentation and Prometheus exposition"""
+
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+_HAVE_FCNTL = fcntl is not None
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)
+
+ITN_TOTAL = "payfast_itn_total"
+SIGNATURE_FAILURES = "payfast_signature_failures_total"
+MERCHANT_MISMATCHES = "payfast_merchant_mismatches_total"
+INVALID_DATA_FAILURES = "payfast_invalid_itn_data_total"
+OPERATION_SECONDS = "payfast_operation_seconds"
+WEBHOOK_EVENTS = "payfast_webhook_events_total"
+WEBHOOK_SECONDS = "payfast_webhook_request_seconds"
+WEBHOOK_CIRCUIT_OPENS = "payfast_webhook_circuit_opens_total"
+
+METRICS: Dict[str, Tuple[str, str]] = {
+    ITN_TOTAL: ("counter", "Verified ITNs by payment status"),
+    SIGNATURE_FAILURES: ("counter", "ITNs rejected for a missing or invalid signature"),
+    MERCHANT_MISMATCHES: ("counter", "ITNs rejected for a merchant ID mismatch"),
+    INVALID_DATA_FAILURES: ("counter", "Signed ITNs rejected for fields that failed validation"),
+    OPERATION_SECONDS: ("histogram", "Latency of PayFast operations in seconds"),
+    WEBHOOK_EVENTS: ("counter", "Fanned-out ITN events by destination and outcome"),
+    WEBHOOK_SECONDS: ("histogram", "Latency of webhook deliveries in seconds"),
+    WEBHOOK_CIRCUIT_OPENS: ("counter", "Times a webhook destination's circuit breaker opened"),
+}
+
+# Preallocated label sets for the instrumented operations
+SIGN = (("operation", "sign"),)
+VERIFY = (("operation", "verify"),)
+RENDER = (("operation", "render"),)
+PARSE = (("operation", "parse"),)
+
+_SNAPSHOT_NAME = re.compile(r"payfast-metrics-(\d+)-[0-9a-f]+\.json")
+_RETIRED_NAME = re.compile(r"payfast-metrics-retired-\d+-[0-9a-f]+\.json")
+_TOTAL_NAME = "payfast-metrics-total.json"
+_LOCK_NAME = "payfast-metrics.lock"
+
+Counters = Dict[Tuple[str, Labels], float]
+Histograms = Dict[Tuple[str, Labels], List[float]]
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        # Signal 0 is not a probe on Windows; keep every snapshot there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Per-process counters and histograms
+
+    Updates are plain dict and list operations without locks; within a
+    single event loop they are safe, and the GIL keeps concurrent threads
+    from corrupting state (at worst an increment is lost). For pre-fork
+    servers pass ``multiprocess_dir``: each worker writes a snapshot
+    there at most once per ``flush_interval`` (updates made in between are
+    written when the interval ends) and ``render()`` merges every worker's
+    snapshot.
+
+    Snapshot files are named by PID and a random token, so a reused PID
+    never overwrites another worker's totals. A worker retires its final
+    snapshot when it exits, and ``collect()`` retires snapshots of PIDs
+    that are no longer running (POSIX only). Retired snapshots keep
+    counting and are folded into one saved total file, so counters never
+    go down when workers restart. Folding needs ``fcntl`` to lock the
+    directory; elsewhere retired snapshots are kept as separate files.
+    """
+
+    def __init__(
+        self,
+        multiprocess_dir: Optional[str] = None,
+        flush_interval: float = 1.0,
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Initialize metrics registry
+
+        Args:
+            multiprocess_dir: Shared directory for per-worker snapshots
+            flush_interval: Minimum seconds between snapshot writes
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._counters: Counters = {}
+        self._histograms: Histograms = {}
+        self._last_flush = 0.0
+        self._snapshot_pid = 0
+        self._snapshot_path = ""
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._timer_pid = 0
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+            atexit.register(self.close)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """Increment a counter"""
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+        if self.multiprocess_dir:
+            self._maybe_flush()
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """Record a histogram observation"""
+        key = (name, labels)
+        series = self._histograms.get(key)
+        if series is None:
+            # One slot per bucket plus +Inf, then sum and count
+            series = self._histograms[key] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+        if self.multiprocess_dir:
+            self._maybe_flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get this process's metrics as a JSON-serialisable dict"""
+        # Copies first: the flush timer may snapshot while a request updates
+        histograms = {key: list(series) for key, series in list(self._histograms.items())}
+        return self._format(dict(self._counters), histograms)
+
+    def flush(self) -> None:
+        """Write this worker's snapshot to the multiprocess directory"""
+        if not self.multiprocess_dir:
+            return
+        with self._flush_lock:
+            if self._snapshot_pid == os.getpid() or self._counters or self._histograms:
+                self._write_snapshot()
+
+    def close(self) -> None:
+        """
+        Retire this worker's totals; called automatically at exit
+
+        The final snapshot is written and renamed to a retired file, so the
+        worker's counts keep being reported after it exits. Local totals
+        are then reset, so closing again (or recording more and closing
+        again) never counts anything twice.
+        """
+        if not self.multiprocess_dir:
+            return
+        with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._snapshot_pid != os.getpid() and not (self._counters or self._histograms):
+                return
+            try:
+                self._write_snapshot()
+                with self._locked():
+                    self._retire(self._snapshot_path)
+            except OSError:
+                return
+            self._counters = {}
+            self._histograms = {}
+            self._snapshot_pid = 0
+
+    def _write_snapshot(self) -> None:
+        self._last_flush = time.monotonic()
+        self._write(self._path(), self.snapshot())
+
+    def _write(self, path: str, data: Dict[str, Any]) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _path(self) -> str:
+        # Workers forked from a parent that created the registry need their own file
+        pid = os.getpid()
+        if pid != self._snapshot_pid:
+            self._snapshot_pid = pid
+            self._snapshot_path = os.path.join(
+                cast(str, self.multiprocess_dir), f"payfast-metrics-{pid}-{uuid.uuid4().hex}.json"
+            )
+        return self._snapshot_path
+
+    def _maybe_flush(self) -> None:
+        remaining = self.flush_interval - (time.monotonic() - self._last_flush)
+        if remaining <= 0:
+            self._flush_quietly()
+            return
+        # Make sure updates in this interval are written even if no more arrive;
+        # a timer inherited across fork is not running in this process
+        pid = os.getpid()
+        if self._timer is None or self._timer_pid != pid or not self._timer.is_alive():
+            self._timer = threading.Timer(remaining, self._flush_quietly)
+            self._timer.daemon = True
+            self._timer_pid = pid
+            self._timer.start()
+
+    def _flush_quietly(self) -> None:
+        # Metrics must never fail the request (or shutdown) they describe
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def collect(self) -> Tuple[Counters, Histograms]:
+        """
+        Get metrics aggregated across workers
+
+        Returns:
+            ``(counters, histograms)`` keyed by ``(name, labels)``
+        """
+        if not self.multiprocess_dir:
+            return dict(self._counters), {k: list(v) for k, v in self._histograms.items()}
+        self.flush()
+        counters: Counters = {}
+        histograms: Histograms = {}
+        with self._locked() as locked:
+            retired = []
+            for path in glob.glob(os.path.join(self.multiprocess_dir, "payfast-metrics-*.json")):
+                name = os.path.basename(path)
+                match = _SNAPSHOT_NAME.fullmatch(name)
+                if match is not None and _pid_alive(int(match.group(1))):
+                    # Without the lock the worker may retire it after the listing
+                    snapshot = self._read(path) or self._read(self._retired_path(path))
+                    if snapshot is not None:
+                        self._add(snapshot, counters, histograms)
+                elif match is not None:
+                    try:
+                        retired.append(self._retire(path))
+                    except OSError:
+                        pass
+                elif _RETIRED_NAME.fullmatch(name):
+                    retired.append(path)
+            total_path = os.path.join(self.multiprocess_dir, _TOTAL_NAME)
+            if locked:
+                retired = self._fold(total_path, retired)
+            for path in [total_path] + retired:
+                snapshot = self._read(path)
+                if snapshot is not None:
+                    self._add(snapshot, counters, histograms)
+        return counters, histograms
+
+    @contextmanager
+    def _locked(self) -> Iterator[bool]:
+        # Serialises folding and retiring across processes where fcntl exists
+        if not _HAVE_FCNTL:
+            yield False
+            return
+        with open(os.path.join(cast(str, self.multiprocess_dir), _LOCK_NAME), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield True
+
+    def _retired_path(self, path: str) -> str:
+        directory, name = os.path.split(path)
+        name = name.replace("payfast-metrics-", "payfast-metrics-retired-", 1)
+        return os.path.join(directory, name)
+
+    def _retire(self, path: str) -> str:
+        retired = self._retired_path(path)
+        os.replace(path, retired)
+        return retired
+
+    def _fold(self, total_path: str, retired: List[str]) -> List[str]:
+        """
+        Fold retired snapshots into the saved total
+
+        The total records which files it already holds, so a crash before
+        they are removed does not count them twice.
+
+        Returns:
+            Retired snapshots still to be read separately
+        """
+        total = self._read(total_path)
+        if total is not None and tuple(total['buckets']) != self.buckets:
+            return retired
+        held = set(total.get('merged', ())) if total is not None else set()
+        counters: Counters = {}
+        histograms: Histograms = {}
+        if total is not None:
+            self._add(total, counters, histograms)
+        folded, left = [], []
+        for path in retired:
+            if os.path.basename(path) in held:
+                folded.append(path)
+                continue
+            snapshot = self._read(path)
+            if snapshot is not None and self._add(snapshot, counters, histograms):
+                folded.append(path)
+            else:
+                left.append(path)
+        if not folded:
+            return left
+        data = self._format(counters, histograms)
+        data['merged'] = [os.path.basename(path) for path in folded]
+        try:
+            self._write(total_path, data)
+        except OSError:
+            return [path for path in retired if os.path.basename(path) not in held]
+        for path in folded:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return left
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data: Dict[str, Any] = json.load(f)
+                return data
+        except (OSError, ValueError):
+            return None
+
+    def _add(self, snapshot: Dict[str, Any], counters: Counters, histograms: Histograms) -> bool:
+        if tuple(snapshot['buckets']) != self.buckets:
+            return False
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            empty: List[float] = [0] * len(series)
+            merged = histograms.setdefault(key, empty)
+            for i, value in enumerate(series):
+                merged[i] += value
+        return True
+
+    def _format(self, counters: Counters, histograms: Histograms) -> Dict[str, Any]:
+        return {
+            'buckets': list(self.buckets),
+            'counters': [[n, list(map(list, l)), v] for (n, l), v in counters.items()],
+            'histograms': [[n, list(map(list, l)), s] for (n, l), s in histograms.items()],
+        }
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        counters, histograms = self.collect()
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str) -> None:
+            if name not in described:
+                described.add(name)
+                kind, help_text = METRICS.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for (name, labels), series in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0.0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                bucket_labels = _format_labels(labels + (('le', bound),))
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(series[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def create_metrics_router(registry: MetricsRegistry, path: str = "/metrics") -> "APIRouter":
+    """
+    Create a router exposing metrics in Prometheus text format
+
+    Args:
+        registry: Metrics registry to expose
+        path: Route path
+
+    Returns:
+        FastAPI APIRouter to include in your app
+    """
+    from fastapi import APIRouter
+    from fastapi.responses import PlainTextResponse
+
+    router = APIRouter()
+
+    @router.get(path, include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    return router
@@ -83,6 +83,7 @@ class PayFastPaymentData(BaseModel):
     
     class Config:
         use_enum_values = True
+        defer_build = True
 
 
 class PayFastITNData(BaseModel):
@@ -114,10 +115,15 @@ class PayFastITNData(BaseModel):
     name_last: Optional[str] = None
     email_address: Optional[str] = None
     
+    # Subscription details
+    token: Optional[str] = None
+    billing_date: Optional[str] = None
+    
     # Merchant verification
     merchant_id: str
     signature: str
     
     class Config:
         use_enum_values = True
+        defer_build = True
 
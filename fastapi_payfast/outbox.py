@@ -0,0 +1,439 @@
+"""Transactional outbox for ITN-driven side effects"""
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .models import PayFastITNData
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class OutboxTask(NamedTuple):
+    """A side effect to perform once for an ITN"""
+    kind: str
+    payload: Optional[Dict[str, Any]] = None
+
+
+class ClaimedTask(NamedTuple):
+    """A task handed to a dispatcher handler"""
+    id: int
+    kind: str
+    payload: Optional[Dict[str, Any]]
+    itn: Dict[str, Any]
+    attempts: int
+
+
+TaskHandler = Callable[[ClaimedTask], Awaitable[None]]
+
+
+class Outbox:
+    """
+    SQLite outbox recording verified ITNs and their side effects
+
+    ``record`` writes the ITN and its tasks in one transaction, so
+    either both exist or neither does. Concurrent calls are grouped
+    into a single commit, so one fsync covers many ITNs. An ITN already
+    recorded (same ``pf_payment_id`` and status) is not recorded again
+    and gets no new tasks, so PayFast's retries cannot duplicate side
+    effects. All database work runs on one background thread, so the
+    event loop never blocks on a commit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 256,
+        commit_interval: float = 0.002,
+        synchronous: str = "FULL"
+    ):
+        """
+        Open (or create) an outbox database
+
+        Args:
+            path: SQLite database file path
+            max_batch: Records that trigger an immediate commit
+            commit_interval: Seconds to wait for more records to share a commit
+            synchronous: SQLite ``synchronous`` pragma; ``NORMAL`` survives
+                process crashes but not power loss
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self.commit_interval = commit_interval
+        self.stats: Counter = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payfast-outbox")
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox_itns ("
+            "pf_payment_id TEXT NOT NULL, payment_status TEXT NOT NULL, "
+            "m_payment_id TEXT, fields TEXT NOT NULL, received_at REAL NOT NULL, "
+            "PRIMARY KEY (pf_payment_id, payment_status))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox_tasks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+            "pf_payment_id TEXT NOT NULL, payment_status TEXT NOT NULL, payload TEXT, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "available_at REAL NOT NULL, claimed_at REAL, updated_at REAL NOT NULL, "
+            "last_error TEXT)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_tasks_ready ON outbox_tasks (status, available_at)"
+        )
+        self._queue: List[Tuple[Dict[str, Any], List[OutboxTask], asyncio.Future]] = []
+        self._arrived: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._listeners: Set[asyncio.Event] = set()
+        self._closed = False
+
+    def _db(self, fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def record(
+        self,
+        itn: Union[PayFastITNData, Mapping[str, Any]],
+        tasks: Iterable[OutboxTask] = ()
+    ) -> bool:
+        """
+        Durably record a verified ITN and its side effects
+
+        Acknowledge the ITN only after this returns.
+
+        Args:
+            itn: Verified ITN (model or fields as received)
+            tasks: Side effects to perform once for this ITN
+
+        Returns:
+            True if recorded, False if this ITN was already recorded
+
+        Raises:
+            RuntimeError: If the outbox is closed
+            sqlite3.Error: If the commit failed
+        """
+        if self._closed:
+            raise RuntimeError("Outbox is closed")
+        fields = itn.dict() if isinstance(itn, PayFastITNData) else dict(itn)
+        loop = asyncio.get_running_loop()
+        arrived = self._arrived
+        if arrived is None:
+            arrived = self._arrived = asyncio.Event()
+            self._flusher = loop.create_task(self._flush_loop(arrived))
+        future = loop.create_future()
+        self._queue.append((fields, list(tasks), future))
+        arrived.set()
+        recorded: bool = await future
+        return recorded
+
+    async def _flush_loop(self, arrived: asyncio.Event) -> None:
+        while True:
+            await arrived.wait()
+            arrived.clear()
+            if not self._queue:
+                if self._closed:
+                    return
+                continue
+            if len(self._queue) < self.max_batch and not self._closed:
+                # Let concurrent handlers join this commit
+                await asyncio.sleep(self.commit_interval)
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            try:
+                results = await self._db(
+                    self._commit, [(fields, tasks) for fields, tasks, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, _, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                self.notify()
+            if self._queue or self._closed:
+                arrived.set()
+
+    def _commit(self, batch: List[Tuple[Dict[str, Any], List[OutboxTask]]]) -> List[bool]:
+        now = time.time()
+        results = []
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fields, tasks in batch:
+                pf_payment_id = str(fields.get('pf_payment_id'))
+                payment_status = str(fields.get('payment_status'))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO outbox_itns "
+                    "(pf_payment_id, payment_status, m_payment_id, fields, received_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        pf_payment_id, payment_status, fields.get('m_payment_id'),
+                        json.dumps(fields), now
+                    )
+                )
+                created = cursor.rowcount == 1
+                if created and tasks:
+                    conn.executemany(
+                        "INSERT INTO outbox_tasks (kind, pf_payment_id, payment_status, payload, "
+                        "status, available_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (task.kind, pf_payment_id, payment_status,
+                             json.dumps(task.payload) if task.payload is not None else None,
+                             PENDING, now, now)
+                            for task in tasks
+                        ]
+                    )
+                results.append(created)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.stats['commits'] += 1
+        self.stats['recorded'] += sum(results)
+        self.stats['duplicates'] += len(results) - sum(results)
+        return results
+
+    def notify(self) -> None:
+        """Wake dispatchers waiting for new tasks"""
+        for listener in self._listeners:
+            listener.set()
+
+    def _claim(self, limit: int, lease: float, held: Iterable[int] = ()) -> List[ClaimedTask]:
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Renew the lease on tasks the caller is still running
+            conn.executemany(
+                "UPDATE outbox_tasks SET claimed_at = ? WHERE id = ? AND status = ?",
+                [(now, task_id, RUNNING) for task_id in held]
+            )
+            # Tasks whose dispatcher died mid-run become available again
+            conn.execute(
+                "UPDATE outbox_tasks SET status = ?, updated_at = ? "
+                "WHERE status = ? AND claimed_at < ?",
+                (PENDING, now, RUNNING, now - lease)
+            )
+            rows = conn.execute(
+                "SELECT t.id, t.kind, t.payload, i.fields, t.attempts FROM outbox_tasks t "
+                "JOIN outbox_itns i USING (pf_payment_id, payment_status) "
+                "WHERE t.status = ? AND t.available_at <= ? ORDER BY t.id LIMIT ?",
+                (PENDING, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox_tasks SET status = ?, claimed_at = ?, updated_at = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(RUNNING, now, now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            ClaimedTask(
+                task_id,
+                kind,
+                json.loads(payload) if payload else None,
+                json.loads(fields),
+                attempts + 1
+            )
+            for task_id, kind, payload, fields, attempts in rows
+        ]
+
+    def _finish(
+        self,
+        task_id: int,
+        status: str,
+        available_at: float = 0.0,
+        error: Optional[str] = None
+    ) -> None:
+        self._conn.execute(
+            "UPDATE outbox_tasks SET status = ?, available_at = ?, updated_at = ?, "
+            "last_error = ? WHERE id = ?",
+            (status, available_at, time.time(), error, task_id)
+        )
+
+    def _recover(self) -> int:
+        cursor = self._conn.execute(
+            "UPDATE outbox_tasks SET status = ?, updated_at = ? WHERE status = ?",
+            (PENDING, time.time(), RUNNING)
+        )
+        return cursor.rowcount
+
+    def _counts(self) -> Dict[str, int]:
+        return dict(
+            self._conn.execute("SELECT status, COUNT(*) FROM outbox_tasks GROUP BY status")
+        )
+
+    async def counts(self) -> Dict[str, int]:
+        """Get the number of tasks per status"""
+        counts: Dict[str, int] = await self._db(self._counts)
+        return counts
+
+    async def aclose(self) -> None:
+        """Commit what is queued and close the database"""
+        self._closed = True
+        if self._flusher is not None and self._arrived is not None:
+            self._arrived.set()
+            await self._flusher
+        await self._db(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+
+class OutboxDispatcher:
+    """
+    Drains outbox tasks in the background
+
+    Tasks are claimed in id order, run with at most ``concurrency`` in
+    flight, and marked done once their handler returns. Failures are
+    retried with jittered exponential backoff until ``max_attempts``,
+    after which the task is marked failed. A task whose dispatcher dies
+    mid-run is reclaimed after ``lease`` seconds, or on the next start
+    when ``exclusive`` (only safe with a single dispatcher per database,
+    e.g. not under several gunicorn workers). Leases of
+    running tasks are renewed every ``poll_interval``, so a slow handler
+    is not started twice; keep ``lease`` well above it. Handlers may
+    therefore see a task again after a crash; use ``task.id`` as the
+    idempotency key with downstream services.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        handlers: Dict[str, TaskHandler],
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        lease: float = 300.0,
+        exclusive: bool = False
+    ):
+        """
+        Initialize dispatcher
+
+        Args:
+            outbox: Outbox to drain
+            handlers: Async handler per task kind
+            concurrency: Tasks run at once
+            poll_interval: Seconds between checks for retries that became due
+            max_attempts: Attempts before a task is marked failed
+            backoff: Base retry delay in seconds
+            lease: Seconds after which a running task is presumed abandoned
+            exclusive: Reset all running tasks on start; only set this
+                when no other dispatcher shares the database
+        """
+        self.outbox = outbox
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        self.exclusive = exclusive
+        self.stats: Counter = Counter()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight: Dict[asyncio.Task, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Recover abandoned tasks and start dispatching"""
+        wakeup = self._wakeup = asyncio.Event()
+        if self.exclusive:
+            recovered = await self.outbox._db(self.outbox._recover)
+            if recovered:
+                logger.warning("Recovered %d outbox tasks interrupted by a restart", recovered)
+            self.stats['recovered'] += recovered
+        self.outbox._listeners.add(wakeup)
+        self._task = asyncio.get_running_loop().create_task(self._run(wakeup))
+
+    async def _run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            wakeup.clear()
+            free = max(self.concurrency - len(self._in_flight), 0)
+            # Claim even when full, so the leases of running tasks are renewed
+            claimed = await self.outbox._db(
+                self.outbox._claim, free, self.lease, list(self._in_flight.values())
+            )
+            for task in claimed:
+                running = asyncio.ensure_future(self._execute(task))
+                self._in_flight[running] = task.id
+                running.add_done_callback(self._done)
+            if len(claimed) == free and free > 0:
+                # There may be more ready; claim again without waiting
+                continue
+            try:
+                await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._in_flight.pop(task, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _execute(self, task: ClaimedTask) -> None:
+        handler = self.handlers.get(task.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for outbox task kind {task.kind!r}")
+            await handler(task)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if handler is None or task.attempts >= self.max_attempts:
+                logger.error(
+                    "Outbox task %d (%s) failed permanently: %s", task.id, task.kind, error
+                )
+                self.stats['failed'] += 1
+                await self.outbox._db(self.outbox._finish, task.id, FAILED, 0.0, error)
+            else:
+                delay = random.uniform(0.5, 1.0) * self.backoff * 2 ** (task.attempts - 1)
+                self.stats['retried'] += 1
+                await self.outbox._db(
+                    self.outbox._finish, task.id, PENDING, time.time() + delay, error
+                )
+            return
+        self.stats['done'] += 1
+        await self.outbox._db(self.outbox._finish, task.id, DONE)
+
+    async def aclose(self, timeout: float = 10.0) -> None:
+        """Stop claiming and wait up to ``timeout`` for running tasks"""
+        if self._wakeup is not None:
+            self.outbox._listeners.discard(self._wakeup)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._in_flight:
+            # Unfinished tasks stay running in the database and are recovered later
+            _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+            for running in pending:
+                running.cancel()
@@ -0,0 +1,256 @@
+"""Policy-driven ITN verification with concurrent I/O checks"""
+
+import asyncio
+import time
+import urllib.parse
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, cast
+
+from .client import PayFastClient
+from .core import VerificationResult
+from .exceptions import InvalidAmountError, ITNValidationError, PayFastException
+from .models import PayFastITNData
+from .ratelimit import (
+    PAYFAST_NETWORKS,
+    ip_in_networks,
+    parse_networks,
+    resolve_client_ip,
+)
+
+
+FAST = "fast"
+STANDARD = "standard"
+STRICT = "strict"
+POLICIES = (FAST, STANDARD, STRICT)
+
+# Rejection reasons added by the pipeline on top of those in ``core``
+SOURCE_IP = "source_ip"
+ORDER_NOT_FOUND = "order_not_found"
+ORDER_LOOKUP_FAILED = "order_lookup_failed"
+AMOUNT_MISMATCH = "amount_mismatch"
+POSTBACK_INVALID = "postback_invalid"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+PIPELINE_MESSAGES: Dict[str, str] = {
+    SOURCE_IP: "ITN did not come from a PayFast address",
+    ORDER_NOT_FOUND: "Unknown order",
+    ORDER_LOOKUP_FAILED: "Order lookup failed",
+    POSTBACK_INVALID: "PayFast did not confirm the ITN",
+    DEADLINE_EXCEEDED: "ITN checks did not finish in time",
+}
+
+# Rejections PayFast should retry soon rather than treat as final
+RETRYABLE = frozenset({ORDER_LOOKUP_FAILED, DEADLINE_EXCEEDED})
+
+# Returns the expected gross amount of an order, or None if it is unknown
+OrderLookup = Callable[[str], Awaitable[Optional[float]]]
+
+
+class PipelineResult(NamedTuple):
+    """Outcome of an ITN pipeline run"""
+    ok: bool
+    reason: Optional[str] = None
+    data: Optional[PayFastITNData] = None
+    detail: Optional[str] = None
+    expected_amount: Optional[float] = None
+    timings: Optional[Dict[str, float]] = None
+
+    def to_exception(self, client: PayFastClient) -> PayFastException:
+        """Build the exception ``ITNPipeline.verify`` raises for this rejection"""
+        if self.reason == AMOUNT_MISMATCH:
+            itn = cast(PayFastITNData, self.data)
+            return InvalidAmountError(cast(float, self.expected_amount), itn.amount_gross)
+        if self.reason in PIPELINE_MESSAGES:
+            # PayFast retries non-2xx responses; transient failures are worth retrying sooner
+            status_code = 503 if self.reason in RETRYABLE else 400
+            return ITNValidationError(PIPELINE_MESSAGES[self.reason], status_code)
+        result = VerificationResult(False, self.reason, detail=self.detail)
+        return result.to_exception(client.config)
+
+
+class ITNPipeline:
+    """
+    Runs PayFast's recommended ITN checks under a policy
+
+    The source address is checked first, then the CPU checks, so forged
+    or misaddressed ITNs fail without any I/O. The I/O checks then run
+    concurrently under one deadline, and the first rejection cancels
+    the rest.
+
+    Policies:
+        fast: signature, merchant ID and model validation only
+        standard: also the source IP (when known) and, given
+            ``order_lookup``, the order amount
+        strict: also a postback to PayFast's ``validate_url``
+    """
+
+    def __init__(
+        self,
+        client: PayFastClient,
+        policy: str = STANDARD,
+        order_lookup: Optional[OrderLookup] = None,
+        deadline: float = 5.0,
+        amount_tolerance: float = 0.01,
+        allowed_networks: Any = PAYFAST_NETWORKS,
+        trusted_proxies: Iterable[str] = (),
+        http_client: Any = None
+    ):
+        """
+        Initialize pipeline
+
+        Args:
+            client: PayFast client for the merchant
+            policy: ``fast``, ``standard`` or ``strict``
+            order_lookup: Async callable returning the expected gross
+                amount for an ``m_payment_id`` (None if unknown)
+            deadline: Seconds allowed for a whole run, I/O included
+            amount_tolerance: Accepted difference from the expected amount
+            allowed_networks: Source networks accepted by the IP check
+                (skipped when ``config.validate_ip`` is False)
+            trusted_proxies: Proxy networks whose ``X-Forwarded-For`` is
+                honoured by ``verify_request``
+            http_client: httpx.AsyncClient for postbacks (created when needed)
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.client = client
+        self.policy = policy
+        self.order_lookup = order_lookup
+        self.deadline = deadline
+        self.amount_tolerance = amount_tolerance
+        self.allowed_networks = parse_networks(allowed_networks)
+        self.trusted_proxies = parse_networks(trusted_proxies)
+        self._http = http_client
+        self._owns_client = http_client is None
+
+    async def run(self, data: Dict[str, Any], client_ip: Optional[str] = None) -> PipelineResult:
+        """
+        Verify ITN fields without raising on rejection
+
+        Args:
+            data: ITN fields in the order they were received
+            client_ip: Address the ITN came from; the source IP check is
+                skipped when it is None
+
+        Returns:
+            PipelineResult with per-check timings in seconds
+        """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        # The address check is cheaper than hashing, so off-range floods stop here
+        if (
+            self.policy != FAST
+            and client_ip is not None
+            and self.client.config.validate_ip
+            and not ip_in_networks(client_ip, self.allowed_networks)
+        ):
+            return PipelineResult(False, SOURCE_IP, timings=timings)
+
+        verified = self.client.try_verify_itn_data(data, client_ip)
+        timings['verify'] = time.perf_counter() - started
+        if not verified.ok:
+            return PipelineResult(False, verified.reason, detail=verified.detail, timings=timings)
+        itn = cast(PayFastITNData, verified.data)
+        if self.policy == FAST:
+            return PipelineResult(True, data=itn, timings=timings)
+
+        checks: List[Awaitable[PipelineResult]] = []
+        if self.order_lookup is not None:
+            checks.append(self._timed('order', self._check_order(self.order_lookup, itn), timings))
+        if self.policy == STRICT:
+            checks.append(self._timed('postback', self._check_postback(data), timings))
+        if not checks:
+            return PipelineResult(True, data=itn, timings=timings)
+
+        tasks = [asyncio.ensure_future(check) for check in checks]
+        remaining = self.deadline - (time.perf_counter() - started)
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=max(remaining, 0)):
+                result = await next_done
+                if not result.ok:
+                    return result._replace(data=itn, timings=timings)
+        except asyncio.TimeoutError:
+            return PipelineResult(False, DEADLINE_EXCEEDED, data=itn, timings=timings)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return PipelineResult(True, data=itn, timings=timings)
+
+    @staticmethod
+    async def _timed(
+        name: str,
+        check: Awaitable[PipelineResult],
+        timings: Dict[str, float]
+    ) -> PipelineResult:
+        started = time.perf_counter()
+        try:
+            return await check
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    async def _check_order(self, order_lookup: OrderLookup, itn: PayFastITNData) -> PipelineResult:
+        try:
+            expected = await order_lookup(cast(str, itn.m_payment_id))
+        except Exception as e:
+            return PipelineResult(False, ORDER_LOOKUP_FAILED, detail=str(e))
+        if expected is None:
+            return PipelineResult(False, ORDER_NOT_FOUND)
+        if not self.client.validate_payment_amount(itn, expected, self.amount_tolerance):
+            return PipelineResult(False, AMOUNT_MISMATCH, expected_amount=expected)
+        return PipelineResult(True)
+
+    async def _check_postback(self, data: Dict[str, Any]) -> PipelineResult:
+        if self._http is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError(
+                    "httpx is not installed. Install with: pip install fastapi-payfast[api]"
+                )
+            self._http = httpx.AsyncClient()
+        body = urllib.parse.urlencode({k: v for k, v in data.items() if k != 'signature'})
+        try:
+            response = await self._http.post(
+                self.client.config.validate_url,
+                content=body,
+                headers={'content-type': 'application/x-www-form-urlencoded'}
+            )
+        except Exception as e:
+            return PipelineResult(False, POSTBACK_INVALID, detail=str(e))
+        if response.status_code != 200 or response.text.strip() != "VALID":
+            return PipelineResult(False, POSTBACK_INVALID, detail=response.text[:200])
+        return PipelineResult(True)
+
+    async def verify(self, data: Dict[str, Any], client_ip: Optional[str] = None) -> PayFastITNData:
+        """
+        Verify ITN fields
+
+        Returns:
+            Validated ITN data
+
+        Raises:
+            SignatureVerificationError: If signature is missing or invalid
+            InvalidMerchantError: If merchant ID doesn't match
+            InvalidAmountError: If the amount differs from the order
+            ITNValidationError: If another pipeline check fails
+        """
+        result = await self.run(data, client_ip)
+        if not result.ok:
+            raise result.to_exception(self.client)
+        return cast(PayFastITNData, result.data)
+
+    async def verify_request(self, request: Any) -> PayFastITNData:
+        """
+        Read the ITN form from a FastAPI request and ``verify`` it
+
+        The source address is resolved through ``trusted_proxies``, so
+        deployments behind a reverse proxy check the real sender.
+        """
+        form = await request.form()
+        return await self.verify(dict(form), resolve_client_ip(request.scope, self.trusted_proxies))
+
+    async def aclose(self) -> None:
+        """Close the postback HTTP client if the pipeline created it"""
+        if self._http is not None and self._owns_client:
+            await self._http.aclose()
+            self._http = None
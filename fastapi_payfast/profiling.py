@@ -0,0 +1,314 @@
+"""On-demand profiling of PayFast client operations"""
+
+import asyncio
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, cast
+
+
+MODES = ('cprofile', 'sampling', 'tracemalloc')
+
+# Synchronous client methods behind the checkout and ITN routes; every
+# ITN path (verify_itn, verify_itn_data, the raw ASGI endpoint and the
+# pipeline) goes through try_verify_itn_data
+TARGETS = ('create_payment', 'try_verify_itn_data')
+
+
+class ProfileResult(NamedTuple):
+    """Output of a finished profiling session"""
+    mode: str
+    duration: float
+    calls: int
+    output: str
+
+
+class Profiler:
+    """
+    Time-bounded profiling scoped to checkout and ITN verification
+
+    Nothing is installed until a session starts: the target methods are
+    wrapped on the client instance for the duration of the session and
+    the wrappers are removed when it stops, so an idle profiler costs
+    nothing on the request path.
+
+    Only synchronous work is profiled: signing in ``create_payment`` and
+    signature, merchant and model checks in ``try_verify_itn_data``.
+    Reading and parsing the ITN body is awaited, and profiling across an
+    await would also record whatever other tasks run on the event loop
+    meanwhile.
+
+    Modes:
+        cprofile: deterministic profile, rendered as pstats text; each
+            thread running a target gets its own profiler, merged when
+            the session stops
+        sampling: periodic stack samples taken while PayFast code is on
+            the stack, rendered as collapsed stacks for flamegraph tools
+        tracemalloc: allocations made under the targets that are still
+            live at the end of the session, grouped by line
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_duration: float = 30.0,
+        interval: float = 0.005,
+        top: int = 50
+    ):
+        """
+        Initialize profiler
+
+        Args:
+            client: PayFastClient to profile
+            max_duration: Upper bound on any session in seconds
+            interval: Seconds between stack samples in sampling mode
+            top: Entries reported in cprofile and tracemalloc output
+        """
+        self.client = client
+        self.max_duration = max_duration
+        self.interval = interval
+        self.top = top
+        self.mode: Optional[str] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._started = 0.0
+        self._calls = 0
+        self._depth = 0
+        self._threads: Set[int] = set()
+        self._profiling = False
+        # Per thread: cProfile only hooks the thread that enables it
+        self._depths: Dict[int, int] = {}
+        self._profiles: Dict[int, cProfile.Profile] = {}
+        self._samples: Counter = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: str) -> None:
+        """
+        Start a profiling session
+
+        Args:
+            mode: One of ``MODES``
+
+        Raises:
+            ValueError: If the mode is unknown
+            RuntimeError: If a session is already running
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        with self._lock:
+            if self.mode is not None:
+                raise RuntimeError("A profiling session is already running")
+            self.mode = mode
+        self._reset()
+        self._started = time.perf_counter()
+        if mode == 'cprofile':
+            self._profiling = True
+        elif mode == 'sampling':
+            self._sampler = threading.Thread(
+                target=self._sample, name="payfast-profiler", daemon=True
+            )
+            self._sampler.start()
+        else:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self._owns_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot()
+        for name in TARGETS:
+            setattr(self.client, name, self._wrap(getattr(self.client, name)))
+
+    def stop(self) -> ProfileResult:
+        """
+        Stop the running session and render its output
+
+        Returns:
+            ProfileResult with the rendered report
+
+        Raises:
+            RuntimeError: If no session is running
+        """
+        mode = self.mode
+        if mode is None:
+            raise RuntimeError("No profiling session is running")
+        for name in TARGETS:
+            self.client.__dict__.pop(name, None)
+        duration = time.perf_counter() - self._started
+        if mode == 'cprofile':
+            with self._lock:
+                # Calls still running finish unprofiled
+                self._profiling = False
+                profiles = list(self._profiles.values())
+            output = self._render_pstats(profiles)
+        elif mode == 'sampling':
+            self._stopping.set()
+            if self._sampler is not None:
+                self._sampler.join()
+            output = "".join(f"{stack} {count}\n" for stack, count in self._samples.most_common())
+        else:
+            output = self._render_tracemalloc()
+        result = ProfileResult(mode, duration, self._calls, output)
+        self._reset()
+        self.mode = None
+        return result
+
+    async def run(self, mode: str, duration: float) -> ProfileResult:
+        """
+        Profile for ``duration`` seconds (capped at ``max_duration``)
+
+        Args:
+            mode: One of ``MODES``
+            duration: Session length in seconds
+
+        Returns:
+            ProfileResult with the rendered report
+        """
+        self.start(mode)
+        try:
+            await asyncio.sleep(max(0.0, min(duration, self.max_duration)))
+        finally:
+            result = self.stop()
+        return result
+
+    def _wrap(self, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self._enter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def _enter(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            self._calls += 1
+            self._depth += 1
+            self._threads.add(ident)
+            depth = self._depths[ident] = self._depths.get(ident, 0) + 1
+            if depth > 1 or not self._profiling:
+                return
+            profile = self._profiles.get(ident)
+            if profile is None:
+                profile = self._profiles[ident] = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; this
+            # call runs unprofiled while another thread's call is
+            pass
+
+    def _exit(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            self._depth -= 1
+            depth = self._depths[ident] = self._depths[ident] - 1
+            if depth:
+                return
+            del self._depths[ident]
+            profile = self._profiles.get(ident)
+        if profile is not None:
+            profile.disable()
+
+    def _sample(self) -> None:
+        package = os.path.dirname(os.path.abspath(__file__))
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            if not self._depth:
+                continue
+            frames = sys._current_frames()
+            for ident in list(self._threads):
+                frame = frames.get(ident)
+                if ident == own or frame is None:
+                    continue
+                stack = []
+                scoped = False
+                while frame is not None:
+                    code = frame.f_code
+                    filename = code.co_filename
+                    if not scoped and code.co_name in TARGETS and filename.startswith(package):
+                        scoped = True
+                    location = f"{os.path.basename(filename)}:{code.co_firstlineno}"
+                    stack.append(f"{code.co_name} ({location})")
+                    frame = frame.f_back
+                # Only count samples taken while a target is on this thread's stack
+                if scoped:
+                    self._samples[";".join(reversed(stack))] += 1
+
+    def _render_pstats(self, profiles: List[cProfile.Profile]) -> str:
+        for profile in profiles:
+            profile.create_stats()
+        profiles = [profile for profile in profiles if profile.stats]
+        if not profiles:
+            return "No PayFast calls were profiled\n"
+        buffer = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        return buffer.getvalue()
+
+    def _target_ranges(self) -> List[Tuple[str, int, int]]:
+        ranges = []
+        for name in TARGETS:
+            function = inspect.unwrap(getattr(type(self.client), name))
+            filename = inspect.getsourcefile(function)
+            if filename is not None:
+                lines, first = inspect.getsourcelines(function)
+                ranges.append((filename, first, first + len(lines)))
+        return ranges
+
+    def _target_allocations(
+        self,
+        snapshot: tracemalloc.Snapshot,
+        ranges: List[Tuple[str, int, int]]
+    ) -> Dict[Tuple[str, int], List[int]]:
+        # Size and count per allocating line, for traces with a target frame
+        totals: Dict[Tuple[str, int], List[int]] = {}
+        for trace in snapshot.traces:
+            frames = trace.traceback
+            if any(
+                frame.filename == filename and first <= frame.lineno < end
+                for frame in frames for filename, first, end in ranges
+            ):
+                line = (frames[-1].filename, frames[-1].lineno)
+                total = totals.setdefault(line, [0, 0])
+                total[0] += trace.size
+                total[1] += 1
+        return totals
+
+    def _render_tracemalloc(self) -> str:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        ranges = self._target_ranges()
+        before = self._target_allocations(cast(tracemalloc.Snapshot, self._baseline), ranges)
+        after = self._target_allocations(snapshot, ranges)
+        diff = []
+        for line, (size, count) in after.items():
+            old_size, old_count = before.get(line, (0, 0))
+            if size != old_size or count != old_count:
+                diff.append((size - old_size, count - old_count, size, count, line))
+        diff.sort(key=lambda item: abs(item[0]), reverse=True)
+        lines = [f"# traced current={current} peak={peak} bytes"]
+        lines.extend(
+            f"{filename}:{lineno}: size={size} B ({size_diff:+d} B), "
+            f"count={count} ({count_diff:+d})"
+            for size_diff, count_diff, size, count, (filename, lineno) in diff[:self.top]
+        )
+        return "\n".join(lines) + "\n"
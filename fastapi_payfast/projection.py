@@ -0,0 +1,151 @@
+"""PayFast subscription revenue projection"""
+
+from datetime import date
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from .scheduler import FREQUENCY_MONTHS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+
+class RevenueProjection(NamedTuple):
+    """Expected revenue per calendar month"""
+    periods: List[date]
+    amounts: List[int]
+
+    @property
+    def total(self) -> int:
+        """Total expected revenue in cents"""
+        return sum(self.amounts)
+
+
+def _month_index(value: Any) -> int:
+    if isinstance(value, str):
+        return int(value[0:4]) * 12 + int(value[5:7]) - 1
+    return int(value.year) * 12 + int(value.month) - 1
+
+
+def project_revenue(
+    amounts: Sequence[int],
+    frequencies: Sequence[int],
+    billing_dates: Sequence[Any],
+    cycles: Optional[Sequence[int]] = None,
+    billed: Optional[Sequence[int]] = None,
+    start: Optional[date] = None,
+    months: int = 12,
+    use_numpy: Optional[bool] = None
+) -> RevenueProjection:
+    """
+    Project expected subscription revenue per calendar month
+
+    Uses the same cycle semantics as ``BillingScheduler``: cycle ``n``
+    bills in the month ``n * period`` after the first billing date, for
+    ``billed <= n < cycles`` (``cycles`` of 0 is indefinite). Month-end
+    clamping never moves a charge into another month, so month buckets
+    match the scheduler exactly.
+
+    Args:
+        amounts: Recurring amount per subscription in cents
+        frequencies: ``FrequencyType`` value per subscription
+        billing_dates: First billing date per subscription (``date`` or ISO string)
+        cycles: Total cycles per subscription, 0 for indefinite (default all 0)
+        billed: Cycles already billed per subscription (default all 0)
+        start: First projected month (defaults to the current month)
+        months: Number of months to project
+        use_numpy: Force or disable the NumPy path (default: use if installed)
+
+    Returns:
+        RevenueProjection with one amount per month
+    """
+    start = start or date.today()
+    first = start.year * 12 + start.month - 1
+    periods = []
+    for k in range(months):
+        year, month = divmod(first + k, 12)
+        periods.append(date(year, month + 1, 1))
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise ImportError(
+                "NumPy is not installed. Install with: pip install fastapi-payfast[numpy]"
+            )
+        totals = _project_numpy(amounts, frequencies, billing_dates, cycles, billed, first, months)
+    else:
+        totals = _project_python(amounts, frequencies, billing_dates, cycles, billed, first, months)
+    return RevenueProjection(periods, totals)
+
+
+def _project_python(
+    amounts: Sequence[int],
+    frequencies: Sequence[int],
+    billing_dates: Sequence[Any],
+    cycles: Optional[Sequence[int]],
+    billed: Optional[Sequence[int]],
+    first: int,
+    months: int
+) -> List[int]:
+    totals = [0] * months
+    end = first + months
+    count = len(amounts)
+    limits = cycles if cycles is not None else [0] * count
+    billed_counts = billed if billed is not None else [0] * count
+    for amount, frequency, billing_date, limit, done in zip(
+        amounts, frequencies, billing_dates, limits, billed_counts
+    ):
+        step = FREQUENCY_MONTHS.get(int(frequency))
+        if step is None:
+            raise ValueError(f"Unknown frequency value: {frequency}")
+        origin = _month_index(billing_date)
+        # First cycle that is both unbilled and inside the window
+        n = max(done, -((origin - first) // step))
+        month = origin + n * step
+        while month < end and (not limit or n < limit):
+            totals[month - first] += amount
+            n += 1
+            month += step
+    return totals
+
+
+def _project_numpy(
+    amounts: Sequence[int],
+    frequencies: Sequence[int],
+    billing_dates: Sequence[Any],
+    cycles: Optional[Sequence[int]],
+    billed: Optional[Sequence[int]],
+    first: int,
+    months: int
+) -> List[int]:
+    values = np.asarray(amounts, dtype=np.int64)
+    count = len(values)
+
+    lookup = np.zeros(max(FREQUENCY_MONTHS) + 1, dtype=np.int64)
+    for frequency, step in FREQUENCY_MONTHS.items():
+        lookup[frequency] = step
+    codes = np.asarray(frequencies, dtype=np.int64)
+    if count and (codes.min() < 0 or codes.max() >= len(lookup)):
+        raise ValueError("Unknown frequency value")
+    steps = lookup[codes]
+    if not steps.all():
+        raise ValueError("Unknown frequency value")
+
+    dates = np.asarray(billing_dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype('datetime64[D]')
+    # Months since 1970-01, shifted to the same absolute index as ``first``
+    origins = dates.astype('datetime64[M]').astype(np.int64) + 1970 * 12
+
+    limits = np.zeros(count, np.int64) if cycles is None else np.asarray(cycles, dtype=np.int64)
+    done = np.zeros(count, np.int64) if billed is None else np.asarray(billed, dtype=np.int64)
+    unlimited = limits == 0
+
+    totals = []
+    for k in range(months):
+        delta = first + k - origins
+        n, remainder = np.divmod(delta, steps)
+        hit = (delta >= 0) & (remainder == 0) & (n >= done) & (unlimited | (n < limits))
+        totals.append(int(values[hit].sum()))
+    return totals
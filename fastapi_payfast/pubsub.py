@@ -0,0 +1,384 @@
+"""Payment status push to browsers over SSE and WebSocket"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
+
+from .models import PayFastITNData, PaymentStatus
+
+if TYPE_CHECKING:
+    from fastapi import APIRouter
+
+
+# A checkout is settled once one of these arrives; streams end there
+TERMINAL_STATUSES = frozenset({
+    PaymentStatus.COMPLETE.value,
+    PaymentStatus.FAILED.value,
+    PaymentStatus.CANCELLED.value,
+})
+
+Deliver = Callable[[str, Dict[str, Any]], None]
+
+
+class Subscription:
+    """Bounded queue of status events for one ``m_payment_id``"""
+
+    def __init__(self, hub: "PaymentStatusHub", key: str, queue_size: int):
+        self.hub = hub
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]) -> None:
+        # Only the latest status matters, so a slow consumer loses the oldest
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None after ``timeout`` seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class LocalBackend:
+    """Delivers events within the current process only"""
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, key: str, event: Dict[str, Any]) -> None:
+        self._deliver(key, event)
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """
+    Fans events out across worker processes through a SQLite table
+
+    Every worker polls for rows newer than the last one it delivered, so
+    latency is bounded by ``poll_interval``. Database calls run on a
+    dedicated thread so polling never blocks the event loop. Intended for
+    single-host deployments and tests; implement the same ``start``/
+    ``publish``/``close`` interface over Redis or similar for larger setups.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retention: float = 300.0):
+        """
+        Initialize SQLite backend
+
+        Args:
+            path: SQLite database file shared by the workers
+            poll_interval: Seconds between polls for new events
+            retention: Seconds events are kept before being pruned
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _db(self, fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # Only used on the database thread, after start() opened it
+        return cast(sqlite3.Connection, self._conn)
+
+    def _open(self) -> int:
+        conn = self._conn = sqlite3.connect(
+            self.path, timeout=1.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS status_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        # Replay events still within retention so late subscribers on this worker see them
+        last_id: int = conn.execute(
+            "SELECT COALESCE((SELECT MIN(id) - 1 FROM status_events WHERE created >= ?), "
+            "(SELECT MAX(id) FROM status_events), 0)",
+            (time.time() - self.retention,)
+        ).fetchone()[0]
+        return last_id
+
+    def _insert(self, key: str, payload: str) -> None:
+        self._connection.execute(
+            "INSERT INTO status_events (key, payload, created) VALUES (?, ?, ?)",
+            (key, payload, time.time())
+        )
+
+    def _fetch(self, last_id: int) -> List[Tuple[int, str, str]]:
+        rows: List[Tuple[int, str, str]] = self._connection.execute(
+            "SELECT id, key, payload FROM status_events WHERE id > ? ORDER BY id",
+            (last_id,)
+        ).fetchall()
+        return rows
+
+    def _prune(self) -> None:
+        self._connection.execute(
+            "DELETE FROM status_events WHERE created < ?", (time.time() - self.retention,)
+        )
+
+    async def start(self, deliver: Deliver) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payfast-pubsub")
+        self._last_id = await self._db(self._open)
+        self._task = asyncio.get_running_loop().create_task(self._poll(deliver))
+
+    async def publish(self, key: str, event: Dict[str, Any]) -> None:
+        await self._db(self._insert, key, json.dumps(event))
+
+    async def _poll(self, deliver: Deliver) -> None:
+        polls = 0
+        while True:
+            for row_id, key, payload in await self._db(self._fetch, self._last_id):
+                self._last_id = row_id
+                deliver(key, json.loads(payload))
+            polls += 1
+            if polls % 1000 == 0:
+                await self._db(self._prune)
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            if self._conn is not None:
+                await self._db(self._conn.close)
+                self._conn = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class PaymentStatusHub:
+    """
+    Publishes verified ITN statuses to subscribers keyed by ``m_payment_id``
+
+    The most recent event per order is retained (up to ``retain``
+    orders), so a browser that subscribes after its ITN landed still
+    receives the status immediately. The hub is itself an ITN handler.
+    """
+
+    def __init__(
+        self,
+        backend: Any = None,
+        queue_size: int = 8,
+        idle_timeout: float = 300.0,
+        heartbeat: float = 15.0,
+        retain: int = 10000
+    ):
+        """
+        Initialize status hub
+
+        Args:
+            backend: ``LocalBackend`` (default), ``SQLiteBackend`` or any
+                object with async ``start``/``publish``/``close``
+            queue_size: Events buffered per connection
+            idle_timeout: Seconds without events before a stream is closed
+            heartbeat: Seconds between SSE keep-alive comments
+            retain: Orders whose latest event is kept for late subscribers
+        """
+        self.backend = backend if backend is not None else LocalBackend()
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.heartbeat = heartbeat
+        self.retain = retain
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._started = False
+
+    async def _ensure_started(self) -> None:
+        if not self._started:
+            self._started = True
+            await self.backend.start(self._deliver)
+
+    def _deliver(self, key: str, event: Dict[str, Any]) -> None:
+        self._recent[key] = event
+        self._recent.move_to_end(key)
+        if len(self._recent) > self.retain:
+            self._recent.popitem(last=False)
+        for subscription in self._subscribers.get(key, ()):
+            subscription.put(event)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.key)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.key]
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    async def subscribe(self, m_payment_id: str) -> Subscription:
+        """Subscribe to an order; close the subscription when done"""
+        await self._ensure_started()
+        subscription = Subscription(self, m_payment_id, self.queue_size)
+        self._subscribers.setdefault(m_payment_id, set()).add(subscription)
+        recent = self._recent.get(m_payment_id)
+        if recent is not None:
+            subscription.put(recent)
+        return subscription
+
+    async def publish(self, m_payment_id: str, event: Dict[str, Any]) -> None:
+        """Publish an event to every worker's subscribers for an order"""
+        await self._ensure_started()
+        await self.backend.publish(m_payment_id, event)
+
+    async def publish_itn(self, itn: PayFastITNData) -> None:
+        """
+        Publish the status of a verified ITN
+
+        ITNs without an ``m_payment_id`` have no order to subscribe to
+        and are ignored.
+        """
+        if not itn.m_payment_id:
+            return
+        await self.publish(itn.m_payment_id, {
+            'm_payment_id': itn.m_payment_id,
+            'pf_payment_id': itn.pf_payment_id,
+            'payment_status': itn.payment_status,
+        })
+
+    async def __call__(self, itn: PayFastITNData) -> None:
+        await self.publish_itn(itn)
+
+    async def aclose(self) -> None:
+        if self._started:
+            await self.backend.close()
+            self._started = False
+
+
+def _is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get('payment_status') in TERMINAL_STATUSES
+
+
+def create_status_router(
+    hub: PaymentStatusHub,
+    prefix: str = "/payfast/status",
+    dependencies: Optional[List[Any]] = None
+) -> "APIRouter":
+    """
+    Create a router streaming order status to browsers
+
+    ``GET {prefix}/{m_payment_id}/events`` is a Server-Sent Events stream
+    and ``{prefix}/{m_payment_id}/ws`` a WebSocket sending JSON events.
+    Both close after a terminal status (COMPLETE, FAILED, CANCELLED) or
+    ``hub.idle_timeout`` seconds without events. Order IDs are often
+    guessable; pass ``dependencies`` to authorise subscribers.
+
+    Args:
+        hub: Status hub fed by your ITN handler
+        prefix: Route prefix
+        dependencies: FastAPI dependencies applied to both routes
+
+    Returns:
+        FastAPI APIRouter to include in your app
+    """
+    from fastapi import APIRouter, WebSocket
+    from fastapi.responses import StreamingResponse
+
+    router = APIRouter(prefix=prefix, dependencies=dependencies or [])
+
+    @router.get("/{m_payment_id}/events")
+    async def status_events(m_payment_id: str) -> StreamingResponse:
+        async def stream() -> AsyncIterator[bytes]:
+            # Subscribe only once streaming starts, so a client that leaves
+            # before the first chunk never leaves a queue behind
+            with await hub.subscribe(m_payment_id) as subscription:
+                yield b"retry: 3000\n\n"
+                deadline = time.monotonic() + hub.idle_timeout
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    event = await subscription.get(min(hub.heartbeat, remaining))
+                    if event is None:
+                        yield b": keep-alive\n\n"
+                        continue
+                    yield f"event: status\ndata: {json.dumps(event)}\n\n".encode()
+                    if _is_terminal(event):
+                        return
+                    deadline = time.monotonic() + hub.idle_timeout
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={'Cache-Control': "no-cache", 'X-Accel-Buffering': "no"}
+        )
+
+    @router.websocket("/{m_payment_id}/ws")
+    async def status_socket(websocket: WebSocket, m_payment_id: str) -> None:
+        await websocket.accept()
+        with await hub.subscribe(m_payment_id) as subscription:
+            # Watch the socket too, so a closed tab frees its subscription at once
+            receiver = asyncio.ensure_future(websocket.receive())
+            try:
+                while True:
+                    getter = asyncio.ensure_future(subscription.get())
+                    done, _ = await asyncio.wait(
+                        {getter, receiver},
+                        timeout=hub.idle_timeout,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if receiver in done and receiver.result()['type'] == 'websocket.disconnect':
+                        getter.cancel()
+                        return
+                    if getter in done:
+                        # Without a timeout get() only returns events
+                        event = cast(Dict[str, Any], getter.result())
+                        await websocket.send_json(event)
+                        if _is_terminal(event):
+                            await websocket.close()
+                            return
+                    else:
+                        getter.cancel()
+                        if not done:
+                            await websocket.close()
+                            return
+                    if receiver in done:
+                        # Client messages are ignored
+                        receiver = asyncio.ensure_future(websocket.receive())
+            finally:
+                receiver.cancel()
+
+    return router
@@ -0,0 +1,261 @@
+"""Token-bucket admission control for checkout and ITN routes"""
+
+import ipaddress
+import logging
+import sqlite3
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+# PayFast's published ITN source ranges
+PAYFAST_NETWORKS = (
+    "197.97.145.144/28",
+    "41.74.179.192/27",
+    "102.216.36.0/28",
+    "102.216.36.128/28",
+    "144.126.193.139/32",
+)
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class RateLimit(NamedTuple):
+    """Refill ``rate`` tokens per second up to ``burst``; each request takes one"""
+    rate: float
+    burst: int
+
+
+def parse_networks(networks: Iterable[str]) -> List[Network]:
+    return [ipaddress.ip_network(network, strict=False) for network in networks]
+
+
+def ip_in_networks(ip: Optional[str], networks: Sequence[Network]) -> bool:
+    """Check whether ``ip`` falls in any of ``networks`` (False if unparseable)"""
+    if not ip or not networks:
+        return False
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def resolve_client_ip(
+    scope: Dict[str, Any],
+    trusted_proxies: Sequence[Network] = ()
+) -> Optional[str]:
+    """
+    Resolve the originating client address of an ASGI request
+
+    ``X-Forwarded-For`` is only honoured when the direct peer is a
+    trusted proxy; hops are then walked right to left and the first
+    untrusted one is the client, so a spoofed left-most entry is ignored.
+
+    Args:
+        scope: ASGI connection scope
+        trusted_proxies: Networks of reverse proxies allowed to set the header
+
+    Returns:
+        Client IP address, or None if unknown
+    """
+    client = scope.get('client')
+    peer = client[0] if client else None
+    if not trusted_proxies or not ip_in_networks(peer, trusted_proxies):
+        return peer
+    forwarded: Optional[str] = None
+    for name, value in scope.get('headers', ()):
+        if name == b"x-forwarded-for":
+            header = value.decode('latin-1')
+            forwarded = header if forwarded is None else f"{forwarded},{header}"
+    if not forwarded:
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not ip_in_networks(hop, trusted_proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+class MemoryBuckets:
+    """
+    In-process token buckets
+
+    Updates are plain list operations with no await in between, so they
+    are atomic on the event loop without locks. Memory is bounded by
+    ``max_keys``; idle buckets are dropped first. Each bucket is
+    ``[tokens, updated, refill]``, where ``refill`` is the seconds its own
+    limit takes to refill completely.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, List[float]] = {}
+
+    def allow(self, key: str, limit: RateLimit, now: Optional[float] = None) -> bool:
+        """Take a token from ``key``'s bucket if one is available"""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict(now)
+            refill = limit.burst / limit.rate if limit.rate else float('inf')
+            self._buckets[key] = [limit.burst - 1, now, refill]
+            return limit.burst >= 1
+        tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _evict(self, now: float) -> None:
+        # A bucket idle long enough to refill is indistinguishable from a new one
+        stale = [
+            key for key, (_, updated, refill) in self._buckets.items()
+            if now - updated >= refill
+        ]
+        if not stale:
+            stale = list(islice(self._buckets, max(1, self.max_keys // 4)))
+        for key in stale:
+            del self._buckets[key]
+
+
+class SQLiteBuckets:
+    """
+    Token buckets shared across worker processes through SQLite
+
+    Each check is a single atomic UPSERT, so concurrent workers need no
+    explicit transaction. Use a file on local disk; every check is a
+    small synchronous write on the event loop, so the lock wait is kept
+    short. A check that cannot get the lock, or fails for any other
+    database reason, lets the request through (fails open) and is logged.
+    """
+
+    _UPSERT = """
+        INSERT INTO rate_buckets (key, tokens, updated) VALUES (?1, ?2 - 1, ?3)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = MIN(?2, tokens + (excluded.updated - updated) * ?4) - 1,
+            updated = excluded.updated
+        WHERE MIN(?2, tokens + (excluded.updated - updated) * ?4) >= 1
+    """
+
+    def __init__(self, path: str, timeout: float = 0.01, prune_every: int = 10000):
+        """
+        Initialize shared buckets
+
+        Args:
+            path: SQLite database file shared by the workers
+            timeout: Seconds to wait for another worker's write lock
+            prune_every: Checks between deletions of idle buckets
+        """
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID"
+        )
+        self.prune_every = prune_every
+        self._checks = 0
+
+    def allow(self, key: str, limit: RateLimit, now: Optional[float] = None) -> bool:
+        """Take a token from ``key``'s bucket if one is available"""
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        self._checks += 1
+        try:
+            if self._checks % self.prune_every == 0:
+                self.prune(now - 3600)
+            cursor = self._conn.execute(self._UPSERT, (key, limit.burst, now, limit.rate))
+        except sqlite3.Error as e:
+            # Blocking the loop or answering 500 under a flood is worse than admitting
+            logger.warning("Rate limit check for %s failed open: %s", key, e)
+            return True
+        return cursor.rowcount == 1
+
+    def prune(self, before: float) -> None:
+        """Delete buckets not touched since ``before``"""
+        self._conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (before,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _response(
+    status: int,
+    body: bytes,
+    headers: Iterable[Tuple[bytes, bytes]] = ()
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    start = {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    }
+    return start, {'type': 'http.response.body', 'body': body}
+
+
+_TOO_MANY_REQUESTS = _response(429, b"Too Many Requests", [(b"retry-after", b"1")])
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware rejecting over-limit requests before the body is read
+
+    Buckets are keyed by route path and client IP. Requests from PayFast's
+    published ranges bypass the limiter so a flood of junk posts cannot
+    crowd out genuine ITNs.
+
+    Example:
+        app.add_middleware(
+            RateLimitMiddleware,
+            limits={"/checkout": RateLimit(1, 5), "/payfast/itn": RateLimit(5, 20)},
+            trusted_proxies=["10.0.0.0/8"],
+        )
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        limits: Dict[str, RateLimit],
+        backend: Any = None,
+        trusted_proxies: Iterable[str] = (),
+        bypass_networks: Iterable[str] = PAYFAST_NETWORKS
+    ):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped ASGI application
+            limits: Limit per exact request path; other paths pass through
+            backend: ``MemoryBuckets`` (default) or ``SQLiteBuckets``
+            trusted_proxies: Proxy networks whose ``X-Forwarded-For`` is honoured
+            bypass_networks: Client networks that are never limited
+        """
+        self.app = app
+        self.limits = dict(limits)
+        self.backend = backend if backend is not None else MemoryBuckets()
+        self.trusted_proxies = parse_networks(trusted_proxies)
+        self.bypass_networks = parse_networks(bypass_networks)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'http':
+            limit = self.limits.get(scope['path'])
+            if limit is not None:
+                ip = resolve_client_ip(scope, self.trusted_proxies)
+                if not ip_in_networks(ip, self.bypass_networks):
+                    if not self.backend.allow(f"{scope['path']}|{ip}", limit):
+                        start, body = _TOO_MANY_REQUESTS
+                        await send(start)
+                        await send(body)
+                        return
+        await self.app(scope, receive, send)
@@ -0,0 +1,260 @@
+"""PayFast ITN reconciliation against an order ledger"""
+
+from collections import Counter
+from collections.abc import Mapping
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
+
+from .models import PaymentStatus
+from .utils import parse_cents
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+
+class Category(str, Enum):
+    """Reconciliation outcome categories"""
+    MATCHED = "MATCHED"
+    AMOUNT_MISMATCH = "AMOUNT_MISMATCH"
+    FEE_ANOMALY = "FEE_ANOMALY"
+    DUPLICATE = "DUPLICATE"
+    UNKNOWN_ORDER = "UNKNOWN_ORDER"
+    MISSING_ITN = "MISSING_ITN"
+    NOT_COMPLETE = "NOT_COMPLETE"
+
+
+class FeeSchedule(NamedTuple):
+    """Expected PayFast fee: ``gross * rate + fixed`` cents, within ``tolerance``"""
+    rate: float
+    fixed: int = 0
+    tolerance: int = 1
+
+
+class ReconciliationItem(NamedTuple):
+    """One line of the reconciliation report; amounts in cents"""
+    category: Category
+    m_payment_id: Optional[str]
+    pf_payment_id: Optional[str] = None
+    expected: Optional[int] = None
+    received: Optional[int] = None
+    detail: Optional[str] = None
+
+
+def _to_cents(value: Any) -> Optional[int]:
+    """Convert an ITN amount in rands (string or number) to cents"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        return parse_cents(value)
+    return round(float(value) * 100)
+
+
+def _itn_fields(itn: Any) -> Tuple[Any, ...]:
+    get: Callable[[str], Any]
+    if isinstance(itn, Mapping):
+        get = itn.get
+    else:
+        def get(name: str) -> Any:
+            return getattr(itn, name, None)
+    return (
+        get('m_payment_id'),
+        get('pf_payment_id'),
+        get('payment_status'),
+        _to_cents(get('amount_gross')),
+        _to_cents(get('amount_fee')),
+    )
+
+
+class Reconciler:
+    """Hash-join ITN streams against ledger rows"""
+
+    def __init__(
+        self,
+        fee_schedule: Optional[FeeSchedule] = None,
+        batch_size: int = 65536,
+        use_numpy: Optional[bool] = None
+    ):
+        """
+        Initialize reconciler
+
+        Args:
+            fee_schedule: Expected fee model; fee checks are skipped when None
+            batch_size: Matched rows buffered per vectorised fee check
+            use_numpy: Force or disable the NumPy fee check (default: if installed)
+        """
+        if use_numpy and np is None:
+            raise ImportError(
+                "NumPy is not installed. Install with: pip install fastapi-payfast[numpy]"
+            )
+        self.fee_schedule = fee_schedule
+        self.batch_size = batch_size
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self.counts: Counter = Counter()
+
+    def reconcile(
+        self,
+        itns: Iterable[Any],
+        ledger: Iterable[Any]
+    ) -> Iterator[ReconciliationItem]:
+        """
+        Reconcile ITNs against ledger rows, streaming categorised results
+
+        The ledger is the build side of the hash join and is held as a
+        compact ``m_payment_id -> cents`` dict. ITNs are streamed: memory
+        grows with the ledger (each settled order keeps the
+        ``pf_payment_id`` that settled it, to tell retries from second
+        payments) plus the ITNs for unknown orders, never with the number
+        of ITNs. Only COMPLETE ITNs settle an order; other statuses are
+        reported as ``NOT_COMPLETE``.
+
+        Args:
+            itns: ``PayFastITNData`` objects or raw ITN field mappings
+            ledger: Mappings with ``m_payment_id`` and ``amount`` (cents),
+                or ``(m_payment_id, amount)`` tuples
+
+        Yields:
+            ReconciliationItem per ITN and per unsettled ledger row
+        """
+        orders: Dict[str, int] = {}
+        for row in ledger:
+            if isinstance(row, Mapping):
+                key, amount = row['m_payment_id'], row['amount']
+            else:
+                key, amount = row[0], row[1]
+            if key in orders:
+                yield self._emit(ReconciliationItem(
+                    Category.DUPLICATE, key, expected=amount, detail="Duplicate ledger row"
+                ))
+            orders[key] = int(amount)
+
+        complete = PaymentStatus.COMPLETE.value
+        # Settled orders move here, keyed to the payment that settled them
+        settled: Dict[str, Any] = {}
+        unknown: Set[Any] = set()
+        pending: List[ReconciliationItem] = []
+        pending_fees: List[int] = []
+
+        for itn in itns:
+            m_payment_id, pf_payment_id, status, gross, fee = _itn_fields(itn)
+            if status != complete:
+                yield self._emit(ReconciliationItem(
+                    Category.NOT_COMPLETE, m_payment_id, pf_payment_id, received=gross,
+                    detail=str(status)
+                ))
+                continue
+
+            if m_payment_id in settled:
+                if settled[m_payment_id] == pf_payment_id:
+                    detail = "Duplicate pf_payment_id"
+                else:
+                    detail = "Order already settled by another payment"
+                yield self._emit(ReconciliationItem(
+                    Category.DUPLICATE, m_payment_id, pf_payment_id, received=gross, detail=detail
+                ))
+                continue
+            expected = orders.pop(m_payment_id, None)
+            if expected is None:
+                if pf_payment_id in unknown:
+                    yield self._emit(ReconciliationItem(
+                        Category.DUPLICATE, m_payment_id, pf_payment_id, received=gross,
+                        detail="Duplicate pf_payment_id"
+                    ))
+                else:
+                    unknown.add(pf_payment_id)
+                    yield self._emit(ReconciliationItem(
+                        Category.UNKNOWN_ORDER, m_payment_id, pf_payment_id, received=gross
+                    ))
+                continue
+            settled[m_payment_id] = pf_payment_id
+
+            if gross != expected:
+                yield self._emit(ReconciliationItem(
+                    Category.AMOUNT_MISMATCH, m_payment_id, pf_payment_id, expected, gross
+                ))
+                continue
+
+            item = ReconciliationItem(
+                Category.MATCHED, m_payment_id, pf_payment_id, expected, gross
+            )
+            if self.fee_schedule is None or fee is None:
+                yield self._emit(item)
+                continue
+            pending.append(item)
+            pending_fees.append(abs(fee))
+            if len(pending) >= self.batch_size:
+                yield from self._check_fees(pending, pending_fees)
+                pending, pending_fees = [], []
+
+        yield from self._check_fees(pending, pending_fees)
+
+        for m_payment_id, amount in orders.items():
+            yield self._emit(ReconciliationItem(
+                Category.MISSING_ITN, m_payment_id, expected=amount
+            ))
+
+    def _check_fees(
+        self,
+        items: List[ReconciliationItem],
+        fees: List[int]
+    ) -> Iterator[ReconciliationItem]:
+        if not items:
+            return
+        # Only called with items queued while a schedule is set
+        schedule = cast(FeeSchedule, self.fee_schedule)
+        if self.use_numpy:
+            gross = np.fromiter(
+                (item.received for item in items), dtype=np.int64, count=len(items)
+            )
+            expected = np.rint(gross * schedule.rate).astype(np.int64) + schedule.fixed
+            deviation = np.abs(np.asarray(fees, dtype=np.int64) - expected)
+            flags = (deviation > schedule.tolerance).tolist()
+            expected = expected.tolist()
+        else:
+            expected = [
+                round(cast(int, item.received) * schedule.rate) + schedule.fixed for item in items
+            ]
+            flags = [abs(fee - exp) > schedule.tolerance for fee, exp in zip(fees, expected)]
+        for item, fee, exp, anomalous in zip(items, fees, expected, flags):
+            if anomalous:
+                item = ReconciliationItem(
+                    Category.FEE_ANOMALY, item.m_payment_id, item.pf_payment_id, exp, fee,
+                    detail="Fee outside expected rate"
+                )
+            yield self._emit(item)
+
+    def _emit(self, item: ReconciliationItem) -> ReconciliationItem:
+        self.counts[item.category] += 1
+        return item
+
+
+def reconcile(
+    itns: Iterable[Any],
+    ledger: Iterable[Any],
+    fee_schedule: Optional[FeeSchedule] = None
+) -> Iterator[ReconciliationItem]:
+    """
+    Reconcile ITNs against ledger rows with default settings
+
+    Args:
+        itns: ``PayFastITNData`` objects or raw ITN field mappings
+        ledger: Ledger rows (see ``Reconciler.reconcile``)
+        fee_schedule: Optional expected fee model
+
+    Yields:
+        ReconciliationItem per ITN and per unsettled ledger row
+    """
+    return Reconciler(fee_schedule).reconcile(itns, ledger)
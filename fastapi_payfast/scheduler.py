@@ -0,0 +1,297 @@
+"""PayFast recurring billing scheduler"""
+
+import calendar
+import heapq
+import itertools
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .models import FrequencyType, PayFastITNData, PayFastPaymentData, PaymentStatus
+
+
+FREQUENCY_MONTHS: Dict[int, int] = {
+    FrequencyType.MONTHLY.value: 1,
+    FrequencyType.QUARTERLY.value: 3,
+    FrequencyType.BIANNUAL.value: 6,
+    FrequencyType.ANNUAL.value: 12,
+}
+
+
+def add_months(start: date, months: int, anchor_day: Optional[int] = None) -> date:
+    """
+    Add calendar months to a date, clamping to the end of the month
+
+    Args:
+        start: Starting date
+        months: Number of months to add
+        anchor_day: Preferred day of month (defaults to ``start.day``)
+
+    Returns:
+        Date ``months`` later, e.g. Jan 31 + 1 month -> Feb 28/29
+    """
+    index = start.year * 12 + start.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    day = min(anchor_day or start.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def billing_date_for(start: date, frequency: int, cycle: int) -> date:
+    """
+    Get the date of a given billing cycle
+
+    Dates are always derived from the original billing date, so month-end
+    anchors survive short months (Jan 31 -> Feb 28 -> Mar 31).
+
+    Args:
+        start: First billing date (cycle 0)
+        frequency: ``FrequencyType`` value
+        cycle: Zero-based cycle number
+
+    Returns:
+        Billing date for ``cycle``
+    """
+    return add_months(start, cycle * FREQUENCY_MONTHS[int(frequency)], start.day)
+
+
+class Subscription:
+    """Billing state of a single recurring subscription"""
+
+    __slots__ = (
+        'key', 'start', 'frequency', 'cycles', 'billed', 'amount', 'next_date', 'last_payment_id'
+    )
+
+    def __init__(
+        self,
+        key: str,
+        start: date,
+        frequency: int,
+        cycles: int = 0,
+        billed: int = 0,
+        amount: Optional[int] = None
+    ):
+        self.key = key
+        self.start = start
+        self.frequency = FrequencyType(frequency)
+        self.cycles = cycles
+        self.billed = billed
+        self.amount = amount
+        self.next_date = billing_date_for(start, frequency, billed)
+        # pf_payment_id of the last COMPLETE ITN applied, to ignore PayFast's retries
+        self.last_payment_id: Optional[str] = None
+
+    @property
+    def remaining_cycles(self) -> Optional[int]:
+        """Cycles left to bill, or None for indefinite subscriptions"""
+        if not self.cycles:
+            return None
+        return max(self.cycles - self.billed, 0)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every cycle has been billed"""
+        return bool(self.cycles) and self.billed >= self.cycles
+
+    def __repr__(self) -> str:
+        return (
+            f"Subscription(key={self.key!r}, next_date={self.next_date}, "
+            f"billed={self.billed}, cycles={self.cycles})"
+        )
+
+
+class BillingScheduler:
+    """Min-heap of subscriptions keyed on next billing date"""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[date, int, str]] = []
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._entries: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._subscriptions
+
+    def get(self, key: str) -> Optional[Subscription]:
+        """Get a subscription by key"""
+        return self._subscriptions.get(key)
+
+    def add(
+        self,
+        key: str,
+        billing_date: Union[date, str],
+        frequency: int,
+        cycles: int = 0,
+        billed: int = 0,
+        amount: Optional[int] = None
+    ) -> Subscription:
+        """
+        Add or replace a subscription
+
+        Args:
+            key: Subscription key (usually the PayFast token)
+            billing_date: First billing date
+            frequency: ``FrequencyType`` value
+            cycles: Total number of cycles, 0 for indefinite
+            billed: Cycles already billed
+            amount: Optional recurring amount in cents
+
+        Returns:
+            The scheduled subscription
+        """
+        if isinstance(billing_date, str):
+            billing_date = date.fromisoformat(billing_date)
+        subscription = Subscription(key, billing_date, frequency, cycles, billed, amount)
+        self._subscriptions[key] = subscription
+        if subscription.exhausted:
+            self.remove(key)
+        else:
+            self._push(subscription)
+        return subscription
+
+    def add_payment_data(
+        self,
+        key: str,
+        payment_data: PayFastPaymentData,
+        billed: int = 0
+    ) -> Subscription:
+        """
+        Schedule a subscription from the payment data used to create it
+
+        Args:
+            key: Subscription key (usually the PayFast token)
+            payment_data: Payment data with ``frequency`` set
+            billed: Cycles already billed
+
+        Returns:
+            The scheduled subscription
+        """
+        if payment_data.frequency is None:
+            raise ValueError("Payment data has no frequency")
+        amount = payment_data.recurring_amount or payment_data.amount
+        return self.add(
+            key,
+            payment_data.billing_date or date.today(),
+            payment_data.frequency,
+            payment_data.cycles or 0,
+            billed,
+            round(amount * 100)
+        )
+
+    def remove(self, key: str) -> Optional[Subscription]:
+        """Remove a subscription; its heap entry is discarded lazily"""
+        self._entries.pop(key, None)
+        return self._subscriptions.pop(key, None)
+
+    def peek(self) -> Optional[Subscription]:
+        """Get the subscription with the earliest billing date"""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return self._subscriptions[self._heap[0][2]]
+
+    def pop_due(self, on: Optional[date] = None) -> Iterator[Subscription]:
+        """
+        Pop every subscription due on or before ``on``
+
+        Popped subscriptions stay registered but leave the heap until
+        ``advance`` (after a successful charge) or ``requeue`` is called.
+        Cost is O(k log n) for k due items.
+
+        Args:
+            on: Cut-off date (defaults to today)
+
+        Yields:
+            Due subscriptions in billing-date order
+        """
+        on = on or date.today()
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > on:
+                return
+            _, _, key = heapq.heappop(self._heap)
+            del self._entries[key]
+            yield self._subscriptions[key]
+
+    def advance(self, key: str) -> Optional[Subscription]:
+        """
+        Record one billed cycle and reschedule
+
+        Args:
+            key: Subscription key
+
+        Returns:
+            The subscription, or None if unknown or now exhausted
+        """
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            return None
+        subscription.billed += 1
+        if subscription.exhausted:
+            self.remove(key)
+            return None
+        subscription.next_date = billing_date_for(
+            subscription.start, subscription.frequency, subscription.billed
+        )
+        self._push(subscription)
+        return subscription
+
+    def requeue(self, key: str) -> Optional[Subscription]:
+        """Put a popped subscription back at its current billing date"""
+        subscription = self._subscriptions.get(key)
+        if subscription is not None and key not in self._entries:
+            self._push(subscription)
+        return subscription
+
+    def apply_itn(
+        self,
+        itn_data: PayFastITNData,
+        key: Optional[str] = None
+    ) -> Optional[Subscription]:
+        """
+        Update the schedule from a verified ITN
+
+        COMPLETE advances one cycle, FAILED requeues the current cycle and
+        CANCELLED removes the subscription. A COMPLETE ITN carrying the
+        same ``pf_payment_id`` as the last one applied is a PayFast retry
+        and leaves the schedule unchanged.
+
+        Args:
+            itn_data: Verified ITN data
+            key: Subscription key (defaults to the ITN token, then m_payment_id)
+
+        Returns:
+            The affected subscription, if still scheduled
+        """
+        key = key or itn_data.token or itn_data.m_payment_id
+        if key is None or key not in self._subscriptions:
+            return None
+        status = itn_data.payment_status
+        if status == PaymentStatus.COMPLETE:
+            subscription = self._subscriptions[key]
+            if itn_data.pf_payment_id == subscription.last_payment_id:
+                return subscription
+            subscription.last_payment_id = itn_data.pf_payment_id
+            return self.advance(key)
+        if status == PaymentStatus.CANCELLED:
+            self.remove(key)
+            return None
+        if status == PaymentStatus.FAILED:
+            return self.requeue(key)
+        return self._subscriptions[key]
+
+    def _push(self, subscription: Subscription) -> None:
+        entry = next(self._counter)
+        self._entries[subscription.key] = entry
+        heapq.heappush(self._heap, (subscription.next_date, entry, subscription.key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Too many superseded entries; rebuild from live ones only
+            self._heap = [item for item in self._heap if self._entries.get(item[2]) == item[1]]
+            heapq.heapify(self._heap)
+
+    def _discard_stale(self) -> None:
+        heap = self._heap
+        while heap and self._entries.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
@@ -0,0 +1 @@
+"""Local stand-ins for PayFast services, for tests and benchmarks"""
@@ -0,0 +1,302 @@
+"""Local PayFast simulator for end-to-end load testing"""
+
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, cast
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, Response
+
+from ..config import PayFastConfig
+from ..models import PaymentStatus
+from ..utils import generate_signature
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+
+# Simulated PayFast fee: 3.5% plus R2.00
+FEE_RATE = 0.035
+FEE_FIXED = 2.00
+
+# Checkout fields PayFast echoes back in the ITN, in ITN order
+ECHOED_FIELDS = (
+    'item_name', 'item_description',
+    'custom_str1', 'custom_str2', 'custom_str3', 'custom_str4', 'custom_str5',
+    'custom_int1', 'custom_int2', 'custom_int3', 'custom_int4', 'custom_int5',
+    'name_first', 'name_last', 'email_address',
+)
+
+
+def _unsigned(fields: Dict[str, str]) -> Dict[str, str]:
+    return {k: v for k, v in fields.items() if k != 'signature'}
+
+
+class PayFastSimulator:
+    """
+    Accepts checkouts and delivers signed ITNs from a pool of workers
+
+    Use ``create_simulator`` to get the ASGI app; the simulator is on
+    ``app.state.simulator``.
+    """
+
+    def __init__(
+        self,
+        config: PayFastConfig,
+        notify_url: Optional[str] = None,
+        notify_transport: Any = None,
+        concurrency: int = 8,
+        retries: int = 3,
+        retry_backoff: float = 0.1,
+        duplicate_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        corrupt_rate: float = 0.0,
+        delay: Optional[Callable[[], float]] = None,
+        timeout: float = 10.0,
+        seed: Optional[int] = None,
+        max_sent: int = 100000
+    ):
+        """
+        Initialize simulator
+
+        Args:
+            config: Merchant configuration checkouts must be signed with
+            notify_url: ITN destination overriding each checkout's ``notify_url``
+            notify_transport: httpx transport for ITN delivery, e.g.
+                ``httpx.ASGITransport(app=merchant_app)`` to stay in-process
+            concurrency: ITN delivery workers
+            retries: Redeliveries after a non-200 response or transport error
+            retry_backoff: Base backoff in seconds, doubled per attempt
+            duplicate_rate: Probability an ITN is delivered twice
+            failure_rate: Probability a payment completes as FAILED
+            corrupt_rate: Probability an ITN is sent with a bad signature
+            delay: Callable returning seconds to wait before each delivery,
+                e.g. ``lambda: random.expovariate(20)``
+            timeout: ITN request timeout in seconds
+            seed: Seed for the injection probabilities
+            max_sent: ITNs remembered for ``validate_url`` postbacks; the
+                oldest are forgotten first
+        """
+        self.config = config
+        self.notify_url = notify_url
+        self.notify_transport = notify_transport
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.duplicate_rate = duplicate_rate
+        self.failure_rate = failure_rate
+        self.corrupt_rate = corrupt_rate
+        self.delay = delay
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.max_sent = max_sent
+        self.stats: Counter = Counter()
+        # Seconds from checkout acceptance to the merchant's 200 response
+        self.latencies: List[float] = []
+        self.sent: Dict[str, Dict[str, str]] = {}
+        self._ids = itertools.count(1000001)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._http: Optional["AsyncClient"] = None
+
+    def verify_checkout(self, data: Dict[str, str]) -> Optional[str]:
+        """
+        Verify a checkout form with PayFast's rules
+
+        Returns:
+            Error message, or None if the checkout is valid
+        """
+        received = data.get('signature')
+        if not received:
+            return "Missing signature"
+        unsigned = {k: v for k, v in data.items() if k != 'signature'}
+        if generate_signature(unsigned, self.config.passphrase) != received:
+            return "Signature mismatch"
+        if data.get('merchant_id') != self.config.merchant_id:
+            return "Invalid merchant ID"
+        if data.get('merchant_key') != self.config.merchant_key:
+            return "Invalid merchant key"
+        try:
+            if float(data.get('amount', '')) <= 0:
+                raise ValueError
+        except ValueError:
+            return "Invalid amount"
+        if not data.get('item_name'):
+            return "Missing item_name"
+        return None
+
+    def build_itn(self, checkout: Dict[str, str], pf_payment_id: str) -> Dict[str, str]:
+        """Build the signed ITN PayFast would send for a checkout"""
+        gross = round(float(checkout['amount']), 2)
+        fee = round(gross * FEE_RATE + FEE_FIXED, 2)
+        failed = self.failure_rate and self.random.random() < self.failure_rate
+        itn = {
+            'm_payment_id': checkout.get('m_payment_id', ''),
+            'pf_payment_id': pf_payment_id,
+            'payment_status': (PaymentStatus.FAILED if failed else PaymentStatus.COMPLETE).value,
+        }
+        for field in ECHOED_FIELDS:
+            if checkout.get(field):
+                itn[field] = checkout[field]
+        itn['amount_gross'] = f"{gross:.2f}"
+        itn['amount_fee'] = f"{-fee:.2f}"
+        itn['amount_net'] = f"{gross - fee:.2f}"
+        itn['merchant_id'] = self.config.merchant_id
+        if checkout.get('subscription_type'):
+            itn['token'] = f"sim-{pf_payment_id}"
+            itn['billing_date'] = checkout.get('billing_date') or time.strftime('%Y-%m-%d')
+        itn['signature'] = generate_signature(itn, self.config.passphrase)
+        if self.corrupt_rate and self.random.random() < self.corrupt_rate:
+            itn['signature'] = itn['signature'][::-1]
+            self.stats['itn_corrupted'] += 1
+        return itn
+
+    def validate(self, data: Dict[str, str]) -> bool:
+        """
+        Answer a ``validate_url`` postback: is this the ITN we sent?
+
+        Postbacks leave out ``signature``, so it is ignored on both sides.
+        """
+        sent = self.sent.get(data.get('pf_payment_id', ''))
+        if sent is None:
+            return False
+        return _unsigned(sent) == _unsigned(data)
+
+    async def accept(self, checkout: Dict[str, str]) -> str:
+        """Accept a verified checkout and queue its ITN"""
+        pf_payment_id = str(next(self._ids))
+        self.stats['payments'] += 1
+        notify_url = self.notify_url or checkout.get('notify_url')
+        if notify_url:
+            itn = self.build_itn(checkout, pf_payment_id)
+            self.sent[pf_payment_id] = itn
+            if len(self.sent) > self.max_sent:
+                # Dicts keep insertion order, so the first key is the oldest
+                del self.sent[next(iter(self.sent))]
+            queue = self._ensure_workers()
+            accepted = time.perf_counter()
+            await queue.put((notify_url, itn, accepted))
+            if self.duplicate_rate and self.random.random() < self.duplicate_rate:
+                self.stats['itn_duplicates'] += 1
+                await queue.put((notify_url, itn, accepted))
+        return pf_payment_id
+
+    async def drain(self) -> None:
+        """Wait until every queued ITN has been delivered or given up on"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Stop the delivery workers and close the HTTP client"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        # Started lazily so they run on the serving event loop
+        if self._queue is not None:
+            return self._queue
+        import httpx
+
+        http = self._http = httpx.AsyncClient(
+            transport=self.notify_transport, timeout=self.timeout
+        )
+        queue = self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.ensure_future(self._worker(queue, http)) for _ in range(self.concurrency)
+        ]
+        return queue
+
+    async def _worker(self, queue: asyncio.Queue, http: "AsyncClient") -> None:
+        while True:
+            notify_url, itn, accepted = await queue.get()
+            try:
+                await self._deliver(http, notify_url, itn, accepted)
+            finally:
+                queue.task_done()
+
+    async def _deliver(
+        self,
+        http: "AsyncClient",
+        notify_url: str,
+        itn: Dict[str, str],
+        accepted: float
+    ) -> None:
+        import httpx
+
+        if self.delay is not None:
+            await asyncio.sleep(max(0.0, self.delay()))
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats['itn_retries'] += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            self.stats['itn_sent'] += 1
+            try:
+                response = await http.post(notify_url, data=itn)
+            except httpx.HTTPError:
+                self.stats['itn_transport_errors'] += 1
+                continue
+            if response.status_code == 200:
+                self.stats['itn_delivered'] += 1
+                self.latencies.append(time.perf_counter() - accepted)
+                return
+            self.stats[f'itn_status_{response.status_code}'] += 1
+        self.stats['itn_abandoned'] += 1
+
+
+def create_simulator(config: PayFastConfig, **options: Any) -> FastAPI:
+    """
+    Create an ASGI app that mimics PayFast's process and validate endpoints
+
+    ``POST /eng/process`` verifies a checkout form exactly as PayFast
+    does, then queues a signed ITN to the checkout's ``notify_url`` (or
+    the configured one) and redirects to ``return_url``. ``POST
+    /eng/query/validate`` answers ITN postbacks with ``VALID`` or
+    ``INVALID``. Point ``PayFastConfig`` URLs at the simulator's host to
+    drive a merchant app end to end. Call ``app.state.simulator.close()``
+    when done to stop the delivery workers.
+
+    Args:
+        config: Merchant configuration checkouts must be signed with
+        **options: ``PayFastSimulator`` options (concurrency, retries,
+            duplicate_rate, failure_rate, corrupt_rate, delay, ...)
+
+    Returns:
+        FastAPI application with the simulator on ``app.state.simulator``
+    """
+    simulator = PayFastSimulator(config, **options)
+    app = FastAPI(title="PayFast simulator")
+    app.state.simulator = simulator
+
+    @app.post("/eng/process")
+    async def process(request: Request) -> Response:
+        # Checkouts are urlencoded, so every value is a string
+        checkout = cast(Dict[str, str], dict(await request.form()))
+        error = simulator.verify_checkout(checkout)
+        if error is not None:
+            simulator.stats['checkouts_rejected'] += 1
+            return JSONResponse({"status": "failed", "error": error}, status_code=400)
+        pf_payment_id = await simulator.accept(checkout)
+        headers = {'X-PF-Payment-Id': pf_payment_id}
+        if checkout.get('return_url'):
+            return RedirectResponse(checkout['return_url'], status_code=302, headers=headers)
+        return JSONResponse({"status": "success", "pf_payment_id": pf_payment_id}, headers=headers)
+
+    @app.post("/eng/query/validate")
+    async def validate(request: Request) -> PlainTextResponse:
+        data = cast(Dict[str, str], dict(await request.form()))
+        return PlainTextResponse("VALID" if simulator.validate(data) else "INVALID")
+
+    @app.get("/stats")
+    async def stats() -> Dict[str, int]:
+        return dict(simulator.stats)
+
+    return app
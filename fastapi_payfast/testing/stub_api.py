@@ -0,0 +1,96 @@
+"""Local stub of the PayFast REST API"""
+
+import asyncio
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from ..config import PayFastConfig
+from ..utils import generate_api_signature
+
+
+def create_stub_api(
+    config: PayFastConfig,
+    latency: float = 0.0,
+    reject_tokens: Iterable[str] = (),
+    fail_tokens: Iterable[str] = (),
+    history: Optional[Callable[[str, str], Iterable[str]]] = None
+) -> FastAPI:
+    """
+    Create an ASGI app that mimics the PayFast REST API
+
+    Charges are recorded on ``app.state.charges`` as ``(token, amount)``
+    tuples so tests can assert exactly what was sent.
+
+    Args:
+        config: Configuration whose credentials requests must be signed with
+        latency: Artificial delay per request in seconds
+        reject_tokens: Tokens answered with a 400 (definite rejection)
+        fail_tokens: Tokens answered with a 500 (unknown outcome)
+        history: Factory ``(from, to) -> CSV lines`` streamed by the
+            transaction history endpoint
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="PayFast stub API")
+    app.state.charges = []
+    rejected = set(reject_tokens)
+    failed = set(fail_tokens)
+
+    def verify(request: Request, body: dict) -> bool:
+        headers = request.headers
+        signed = {
+            'merchant-id': headers.get('merchant-id', ''),
+            'version': headers.get('version', ''),
+            'timestamp': headers.get('timestamp', ''),
+        }
+        signed.update({k: v for k, v in request.query_params.items() if k != 'testing'})
+        signed.update(body)
+        return (
+            headers.get('merchant-id') == config.merchant_id
+            and headers.get('signature') == generate_api_signature(signed, config.passphrase)
+        )
+
+    def error(status_code: int, message: str) -> JSONResponse:
+        return JSONResponse(
+            {"code": status_code, "status": "failed", "data": {"response": message}},
+            status_code=status_code
+        )
+
+    @app.get("/ping")
+    async def ping(request: Request) -> JSONResponse:
+        if not verify(request, {}):
+            return error(401, "Signature mismatch")
+        return JSONResponse({"code": 200, "status": "success", "data": {"response": True}})
+
+    @app.post("/subscriptions/{token}/adhoc")
+    async def charge_adhoc(token: str, request: Request) -> JSONResponse:
+        body: Dict[str, Any] = dict(await request.form())
+        if not verify(request, body):
+            return error(401, "Signature mismatch")
+        if latency:
+            await asyncio.sleep(latency)
+        if token in rejected:
+            return error(400, "Subscription not found")
+        if token in failed:
+            return error(500, "Internal error")
+        app.state.charges.append((token, int(body['amount'])))
+        return JSONResponse({
+            "code": 200,
+            "status": "success",
+            "data": {"response": True, "message": "Transaction was successful(00)"}
+        })
+
+    @app.get("/transactions/history")
+    async def transaction_history(request: Request) -> Response:
+        if not verify(request, {}):
+            return error(401, "Signature mismatch")
+        lines = history(request.query_params['from'], request.query_params['to']) if history else ()
+        return StreamingResponse(
+            (line if line.endswith('\n') else line + '\n' for line in lines),
+            media_type="text/csv"
+        )
+
+    return app
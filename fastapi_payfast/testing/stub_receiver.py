@@ -0,0 +1,42 @@
+"""Local stub of an internal webhook receiver"""
+
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_stub_receiver(
+    latency: float = 0.0,
+    fail_first: int = 0,
+    status_code: int = 200
+) -> FastAPI:
+    """
+    Create an ASGI app that accepts webhook POSTs on any path
+
+    Decoded JSON bodies are recorded on ``app.state.received`` and the
+    number of requests on ``app.state.requests``.
+
+    Args:
+        latency: Artificial delay per request in seconds
+        fail_first: Answer this many requests with a 503 before succeeding
+        status_code: Status returned once the failures are used up
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Webhook stub receiver")
+    app.state.received = []
+    app.state.requests = 0
+
+    @app.post("/{path:path}")
+    async def receive(path: str, request: Request) -> JSONResponse:
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if app.state.requests <= fail_first:
+            return JSONResponse({'detail': "unavailable"}, status_code=503)
+        app.state.received.append(await request.json())
+        return JSONResponse({}, status_code=status_code)
+
+    return app
@@ -0,0 +1,103 @@
+"""PayFast ITN stage tracing and slow-request sampling"""
+
+import logging
+from collections import deque
+from time import perf_counter, time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Stage names recorded by PayFastClient.verify_itn, in order
+STAGES = ('body', 'form', 'signature', 'merchant', 'model')
+
+
+class ITNTrace:
+    """Monotonic stage timestamps for a single ITN verification"""
+
+    __slots__ = ('started', 'wall_time', 'marks', 'outcome', 'pf_payment_id')
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.wall_time = time()
+        self.marks: List[Tuple[str, float]] = []
+        self.outcome: Optional[str] = None
+        self.pf_payment_id: Optional[str] = None
+
+    def mark(self, stage: str) -> None:
+        """Record the end of a stage"""
+        self.marks.append((stage, perf_counter()))
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to the last recorded stage"""
+        return (self.marks[-1][1] if self.marks else self.started) - self.started
+
+    def spans(self) -> List[Tuple[str, float, float]]:
+        """Get ``(stage, start, end)`` perf_counter spans"""
+        spans = []
+        previous = self.started
+        for stage, at in self.marks:
+            spans.append((stage, previous, at))
+            previous = at
+        return spans
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'timestamp': self.wall_time,
+            'outcome': self.outcome,
+            'pf_payment_id': self.pf_payment_id,
+            'duration_ms': round(self.duration * 1000, 3),
+            'stages_ms': {
+                stage: round((end - start) * 1000, 3) for stage, start, end in self.spans()
+            },
+        }
+
+
+class ITNTracer:
+    """Creates ITN traces, samples slow ones and forwards them to hooks"""
+
+    def __init__(
+        self,
+        slow_threshold: float = 0.05,
+        sample_size: int = 100,
+        hooks: Optional[List[Callable[[ITNTrace], None]]] = None
+    ):
+        """
+        Initialize tracer
+
+        Args:
+            slow_threshold: Seconds above which a trace is sampled
+            sample_size: Ring buffer capacity for slow traces
+            hooks: Callables invoked with every finished trace
+        """
+        self.slow_threshold = slow_threshold
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=sample_size)
+        self.hooks = list(hooks or [])
+
+    def add_hook(self, hook: Callable[[ITNTrace], None]) -> None:
+        """Register a callable to receive every finished trace"""
+        self.hooks.append(hook)
+
+    def start(self) -> ITNTrace:
+        return ITNTrace()
+
+    def finish(self, trace: ITNTrace, outcome: str, pf_payment_id: Optional[str] = None) -> None:
+        """
+        Complete a trace, sampling it if slow and notifying hooks
+
+        Args:
+            trace: Trace to finish
+            outcome: ``"ok"`` or the rejection exception name
+            pf_payment_id: PayFast payment ID, when known
+        """
+        trace.outcome = outcome
+        trace.pf_payment_id = pf_payment_id
+        if trace.duration >= self.slow_threshold:
+            self.samples.append(trace.as_dict())
+        for hook in self.hooks:
+            try:
+                hook(trace)
+            except Exception:
+                # A broken exporter must not reject a valid ITN
+                logger.exception("ITN trace hook failed")
@@ -1,11 +1,15 @@
 """PayFast utility functions"""
 
 import hashlib
+import re
 import urllib.parse
 from typing import Dict, Any, Optional
 
 
-def generate_signature(dataArray, passPhrase = ''):
+_AMOUNT = re.compile(r'\s*([+-]?)(\d*)\.?(\d*)\s*$')
+
+
+def generate_signature(dataArray: Dict[str, Any], passPhrase: Optional[str] = '') -> str:
     payload = ""
     for key in dataArray:
         # Get all the data from Payfast and prepare parameter string
@@ -17,6 +21,62 @@ def generate_signature(dataArray, passPhrase = ''):
     return hashlib.md5(payload.encode()).hexdigest()
 
 
+def generate_api_signature(data: Dict[str, Any], passphrase: str = '') -> str:
+    """
+    Generate signature for PayFast REST API requests
+
+    Unlike the checkout signature, API signatures are built from the
+    request headers and body parameters sorted alphabetically, with the
+    passphrase included as a regular parameter.
+
+    Args:
+        data: Header and body parameters to sign
+        passphrase: Merchant passphrase
+
+    Returns:
+        MD5 signature string
+    """
+    params = {k: str(v) for k, v in data.items() if v is not None}
+    if passphrase:
+        params['passphrase'] = passphrase
+    payload = "&".join(
+        key + "=" + urllib.parse.quote_plus(params[key].replace("+", " "))
+        for key in sorted(params)
+    )
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def parse_cents(value: str) -> int:
+    """
+    Parse a decimal amount string straight to integer cents
+
+    Avoids float rounding by splitting on the decimal point. Thousands
+    separators and surrounding whitespace are ignored.
+
+    Args:
+        value: Amount such as ``"1,234.50"`` or ``"-5.00"``
+
+    Returns:
+        Amount in cents
+
+    Raises:
+        ValueError: If the value is not a decimal amount
+    """
+    match = _AMOUNT.match(value)
+    if match is None:
+        match = _AMOUNT.match(value.replace(",", "").replace(" ", ""))
+        if match is None:
+            raise ValueError(f"Invalid amount: {value!r}")
+    sign, whole, fraction = match.groups()
+    if not (whole or fraction):
+        raise ValueError(f"Invalid amount: {value!r}")
+    cents = int(whole or "0") * 100 + int((fraction + "00")[:2])
+    if fraction[2:].strip("0"):
+        # Round half up on sub-cent precision
+        cents += int(fraction[2]) >= 5
+    return -cents if sign == "-" else cents
+
+
 def generate_payment_form_html(action_url: str, data: Dict[str, Any]) -> str:
     """
     Generate HTML form for payment submission
@@ -0,0 +1,143 @@
+"""Write-behind batching of ITN-driven order status updates"""
+
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from .models import PayFastITNData
+
+
+class StatusUpdate(NamedTuple):
+    """Latest known status of one order"""
+    m_payment_id: str
+    status: str
+    itn: Optional[PayFastITNData] = None
+
+
+BatchWriter = Callable[[List[StatusUpdate]], Awaitable[None]]
+
+
+class WriteBehindBuffer:
+    """
+    Collapses order status updates and writes them in batches
+
+    Updates are keyed by ``m_payment_id``; a later update for a pending
+    key replaces the earlier one (last arrival wins). A batch is written
+    once ``max_batch`` orders are pending or ``max_delay`` seconds after
+    the first pending update, whichever comes first. Batches are written
+    one at a time, in order.
+
+    ``submit`` only returns once the batch holding the update has been
+    written, and raises if the writer failed. An ITN handler that awaits
+    it therefore never acknowledges an ITN before its update is safe, and
+    a failed write turns into an error response that PayFast retries.
+    The buffer is itself an ITN handler, so it can be passed straight to
+    ``payfast_itn_asgi``; ITNs without an ``m_payment_id`` have no order
+    to update and are skipped (counted in ``stats['skipped']``).
+    """
+
+    def __init__(self, writer: BatchWriter, max_batch: int = 500, max_delay: float = 0.05):
+        """
+        Initialize write-behind buffer
+
+        Args:
+            writer: Async callable persisting a batch, e.g. with one
+                ``executemany`` and a single commit
+            max_batch: Pending orders that trigger an immediate write
+            max_delay: Longest an update waits for its batch to fill
+        """
+        self.writer = writer
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats: Counter = Counter()
+        self._pending: Dict[str, StatusUpdate] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._arrived: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def submit(
+        self,
+        m_payment_id: str,
+        status: str,
+        itn: Optional[PayFastITNData] = None
+    ) -> None:
+        """
+        Queue a status update and wait until it has been written
+
+        Raises:
+            ValueError: If ``m_payment_id`` is empty
+            RuntimeError: If the buffer is closed
+            Exception: Whatever the batch writer raised
+        """
+        if not m_payment_id:
+            raise ValueError("m_payment_id is required to collapse status updates")
+        if self._closed:
+            raise RuntimeError("Write-behind buffer is closed")
+        loop = asyncio.get_running_loop()
+        arrived, full = self._arrived, self._full
+        if arrived is None or full is None:
+            arrived = self._arrived = asyncio.Event()
+            full = self._full = asyncio.Event()
+            self._task = loop.create_task(self._run(arrived, full))
+
+        if m_payment_id in self._pending:
+            self.stats['collapsed'] += 1
+        self._pending[m_payment_id] = StatusUpdate(m_payment_id, status, itn)
+        self.stats['submitted'] += 1
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        arrived.set()
+        if len(self._pending) >= self.max_batch:
+            full.set()
+        await waiter
+
+    async def __call__(self, itn: PayFastITNData) -> None:
+        if not itn.m_payment_id:
+            self.stats['skipped'] += 1
+            return
+        await self.submit(itn.m_payment_id, itn.payment_status, itn)
+
+    async def _run(self, arrived: asyncio.Event, full: asyncio.Event) -> None:
+        while True:
+            await arrived.wait()
+            arrived.clear()
+            if not self._pending:
+                if self._closed:
+                    return
+                continue
+            if len(self._pending) < self.max_batch and not self._closed:
+                try:
+                    await asyncio.wait_for(full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            full.clear()
+            await self._flush()
+            if self._pending or self._closed:
+                arrived.set()
+
+    async def _flush(self) -> None:
+        batch, waiters = list(self._pending.values()), self._waiters
+        self._pending, self._waiters = {}, []
+        try:
+            await self.writer(batch)
+        except Exception as e:
+            self.stats['failed_batches'] += 1
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+        self.stats['batches'] += 1
+        self.stats['written'] += len(batch)
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def aclose(self) -> None:
+        """Write everything still pending and stop; call on shutdown"""
+        self._closed = True
+        if self._task is not None and self._arrived is not None and self._full is not None:
+            self._arrived.set()
+            self._full.set()
+            await self._task
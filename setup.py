@@ -42,7 +42,9 @@ setup(
         "Documentation": "https://github.com/yourusername/fastapi-payfast#readme",
         "Source Code": "https://github.com/yourusername/fastapi-payfast",
     },
-    packages=find_packages(exclude=["tests", "tests.*", "examples", "examples.*"]),
+    packages=find_packages(
+        exclude=["tests", "tests.*", "examples", "examples.*", "benchmarks", "benchmarks.*"]
+    ),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -63,6 +65,8 @@ setup(
     python_requires=">=3.8",
     install_requires=requirements,
     extras_require={
+        "api": ["httpx>=0.24.0"],
+        "numpy": ["numpy>=1.22"],
         "dev": dev_requirements,
         "test": [
             "pytest>=7.4.0",
@@ -86,8 +90,7 @@ setup(
     zip_safe=False,
     entry_points={
         "console_scripts": [
-            # Add CLI commands if needed
-            # "payfast-cli=fastapi_payfast.cli:main",
+            "payfast-cli=fastapi_payfast.cli:main",
         ],
     },
-)
\ No newline at end of file
+)
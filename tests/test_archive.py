@@ -0,0 +1,127 @@
+"""Tests for the memory-mapped ITN archive"""
+
+import json
+import os
+
+import pytest
+
+from fastapi_payfast import archive
+from fastapi_payfast.archive import ArchiveReader, ArchiveWriter
+from fastapi_payfast.audit import audit_archive
+from fastapi_payfast.cli import main
+from fastapi_payfast.utils import generate_signature
+
+
+def make_itn(index, status="COMPLETE"):
+    fields = {
+        'm_payment_id': f"ORD-{index}",
+        'pf_payment_id': str(1000 + index),
+        'payment_status': status,
+        'item_name': "Widget",
+        'amount_gross': "100.00",
+        'merchant_id': "10000100",
+    }
+    fields['signature'] = generate_signature(fields, "secret")
+    return fields
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    """Fixture for an archive spanning several segments"""
+    directory = str(tmp_path / "archive")
+    with ArchiveWriter(directory, records_per_segment=10) as writer:
+        for index in range(35):
+            writer.append(make_itn(index))
+        writer.append(make_itn(3, status="CANCELLED"))
+    return directory
+
+
+class TestArchive:
+    """Test suite for ArchiveWriter and ArchiveReader"""
+
+    def test_lookup_by_either_id(self, archive_dir):
+        """Test records are found by pf_payment_id or m_payment_id"""
+        with ArchiveReader(archive_dir) as reader:
+            assert len(reader) == 36
+            assert reader.lookup("1020")[0]['m_payment_id'] == "ORD-20"
+            assert reader.lookup("ORD-20", 'm_payment_id')[0]['pf_payment_id'] == "1020"
+            assert reader.get("ORD-20") == reader.get("1020")
+            assert reader.lookup("missing") == []
+
+    def test_all_records_for_an_id_oldest_first(self, archive_dir):
+        """Test every record for an ID is returned oldest first"""
+        with ArchiveReader(archive_dir) as reader:
+            statuses = [record['payment_status'] for record in reader.lookup("1003")]
+        assert statuses == ["COMPLETE", "CANCELLED"]
+
+    def test_unindexed_field_rejected(self, archive_dir):
+        """Test lookups on an unindexed field raise"""
+        with ArchiveReader(archive_dir) as reader, pytest.raises(ValueError):
+            reader.lookup("Widget", 'item_name')
+
+    def test_reader_sees_new_records(self, tmp_path):
+        """Test an open reader sees records appended after it opened"""
+        directory = str(tmp_path / "archive")
+        with ArchiveWriter(directory, records_per_segment=2) as writer:
+            with ArchiveReader(directory) as reader:
+                writer.append(make_itn(1))
+                assert reader.lookup("1001")
+                writer.append(make_itn(2))
+                writer.append(make_itn(3))
+                assert reader.lookup("1003")
+
+    def test_index_published_with_header(self, tmp_path, monkeypatch):
+        """Test a new segment's index only appears once its header is written"""
+        published = []
+
+        def replace(source, destination):
+            with open(source, "rb") as f:
+                published.append(f.read(4))
+            os.rename(source, destination)
+
+        monkeypatch.setattr(archive.os, "replace", replace)
+        directory = str(tmp_path / "archive")
+        with ArchiveWriter(directory, records_per_segment=1) as writer:
+            writer.append(make_itn(1))
+            writer.append(make_itn(2))
+        assert published == [b"PFAX", b"PFAX"]
+        assert sorted(os.listdir(directory)) == [
+            "00000001.idx", "00000001.jsonl", "00000002.idx", "00000002.jsonl"
+        ]
+
+    def test_reopen_discards_unindexed_tail(self, tmp_path):
+        """Test reopening drops a partially written record"""
+        directory = str(tmp_path / "archive")
+        with ArchiveWriter(directory) as writer:
+            writer.append(make_itn(1))
+        with open(str(tmp_path / "archive" / "00000001.jsonl"), "ab") as f:
+            f.write(b'{"pf_payment_id":"10')
+        with ArchiveWriter(directory) as writer:
+            writer.append(make_itn(2))
+        with ArchiveReader(directory) as reader:
+            assert [record['pf_payment_id'] for record in reader.get("1002")] == ["1002"]
+            assert len(reader) == 2
+
+    def test_segments_are_auditable(self, archive_dir):
+        """Test archive segments can be audited as JSONL exports"""
+        report = audit_archive(
+            f"{archive_dir}/00000001.jsonl", ["secret"], merchant_id="10000100", workers=1
+        )
+        assert report.total == 10
+        assert report.mismatches == 0
+
+
+class TestArchiveCLI:
+    """Test suite for the ``archive get`` command"""
+
+    def test_get(self, archive_dir, capsys):
+        """Test get prints the records for an ID"""
+        assert main(["archive", "get", "ORD-7", "--dir", archive_dir]) == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [record['pf_payment_id'] for record in records] == ["1007"]
+
+    def test_get_missing(self, archive_dir, capsys):
+        """Test get exits with 1 when nothing matches"""
+        argv = ["archive", "get", "1007", "--dir", archive_dir, "--field", "m_payment_id"]
+        assert main(argv) == 1
+        assert capsys.readouterr().out == ""
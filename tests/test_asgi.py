@@ -0,0 +1,110 @@
+"""Tests for the raw ASGI ITN endpoint"""
+
+import urllib.parse
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_payfast import PayFastClient, PayFastConfig
+from fastapi_payfast.asgi import payfast_itn_asgi
+from fastapi_payfast.tracing import ITNTracer
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def itn_body(config, **overrides):
+    fields = {
+        'm_payment_id': 'ORD-1',
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'item_description': '',
+        'amount_gross': '100.00',
+        'amount_fee': '-5.00',
+        'amount_net': '95.00',
+        'merchant_id': config.merchant_id,
+    }
+    fields.update(overrides)
+    fields['signature'] = generate_signature(fields, config.passphrase)
+    return urllib.parse.urlencode(fields)
+
+
+HEADERS = {'content-type': 'application/x-www-form-urlencoded'}
+
+
+class TestITNApp:
+    """Test suite for payfast_itn_asgi"""
+
+    async def test_verified_itn_reaches_async_handler(self, config):
+        """Test a valid ITN is handled and answered with a constant 200"""
+        received = []
+
+        async def handler(itn):
+            received.append(itn)
+
+        app = payfast_itn_asgi(PayFastClient(config), handler)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://m") as http:
+            response = await http.post("/", content=itn_body(config), headers=HEADERS)
+
+        assert response.status_code == 200
+        assert response.text == "OK"
+        assert received[0].pf_payment_id == '12345'
+        assert received[0].item_description == ''
+
+    async def test_rejections(self, config):
+        """Test rejections get constant responses per reason"""
+        received = []
+        app = payfast_itn_asgi(PayFastClient(config), received.append, max_body_size=2048)
+        forged = itn_body(config).replace('100.00', '1.00')
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://m") as http:
+            bad = await http.post("/", content=forged, headers=HEADERS)
+            other = await http.post("/", content=itn_body(config, merchant_id="1"), headers=HEADERS)
+            large = await http.post(
+                "/", content=itn_body(config, custom_str1="x" * 4096), headers=HEADERS
+            )
+            get = await http.get("/")
+
+        assert (bad.status_code, bad.json()) == (400, {'detail': "Signature mismatch"})
+        assert other.json()['detail'] == "Merchant ID mismatch"
+        assert large.status_code == 413
+        assert get.status_code == 405
+        assert received == []
+
+    async def test_traced(self, config):
+        """Test the raw endpoint records the same stages as verify_itn"""
+        tracer = ITNTracer(slow_threshold=0.0)
+        app = payfast_itn_asgi(PayFastClient(config, tracer=tracer), lambda itn: None)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://m") as http:
+            await http.post("/", content=itn_body(config), headers=HEADERS)
+
+        stages = list(tracer.samples[0]['stages_ms'])
+        assert stages == ['body', 'form', 'signature', 'merchant', 'model']
+
+    def test_fastapi_integration(self, config):
+        """Test the app serves an exact path via add_route and a prefix via mount"""
+        received = []
+        itn_app = payfast_itn_asgi(PayFastClient(config), received.append)
+        app = FastAPI()
+        app.add_route("/payfast/itn", itn_app, methods=["POST"])
+        app.mount("/hooks/itn", itn_app)
+        http = TestClient(app)
+
+        for path in ("/payfast/itn", "/hooks/itn/"):
+            assert http.post(path, content=itn_body(config), headers=HEADERS).status_code == 200
+        assert len(received) == 2
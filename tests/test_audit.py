@@ -0,0 +1,144 @@
+"""Tests for PayFast offline ITN signature audit"""
+
+import csv
+import json
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fastapi_payfast.audit import audit_archive, verify_payload
+from fastapi_payfast.cli import main
+from fastapi_payfast.utils import generate_signature
+
+
+MERCHANT_ID = "10000100"
+
+
+def signed_itn(i, passphrase="current", merchant_id=MERCHANT_ID):
+    data = {
+        "m_payment_id": f"ORD-{i}",
+        "pf_payment_id": str(1000 + i),
+        "payment_status": "COMPLETE",
+        "item_name": "Test Product",
+        "amount_gross": "100.00",
+        "amount_fee": "-2.30",
+        "amount_net": "97.70",
+        "merchant_id": merchant_id,
+    }
+    data["signature"] = generate_signature(data, passphrase)
+    return data
+
+
+def archive_rows():
+    rows = [signed_itn(i) for i in range(10)]
+    rows.append(signed_itn(10, passphrase="previous"))
+    forged = signed_itn(11)
+    forged["amount_gross"] = "1.00"
+    rows.append(forged)
+    rows.append(signed_itn(12, merchant_id="99999999"))
+    return rows
+
+
+@pytest.fixture
+def jsonl_archive(tmp_path):
+    path = tmp_path / "itns.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in archive_rows()) + "\n\nnot json\n")
+    return str(path)
+
+
+class TestVerifyPayload:
+    """Test suite for verify_payload"""
+
+    def test_passphrase_rotation(self):
+        """Test older passphrases are tried in turn"""
+        data = signed_itn(1, "previous")
+        assert verify_payload(data, ["current", "previous"], MERCHANT_ID) == (None, 1)
+
+    def test_missing_signature(self):
+        """Test payloads without a signature are rejected"""
+        data = signed_itn(1)
+        del data["signature"]
+        assert verify_payload(data, ["current"])[0] == "missing_signature"
+
+
+class TestAuditArchive:
+    """Test suite for audit_archive"""
+
+    def test_jsonl_inline(self, jsonl_archive):
+        """Test auditing a JSONL archive in-process"""
+        mismatches = []
+        report = audit_archive(
+            jsonl_archive, ["current", "previous"], MERCHANT_ID,
+            workers=1, chunk_size=4, on_mismatch=mismatches.append,
+        )
+
+        assert report.total == 14
+        assert report.verified == 11
+        assert dict(report.reasons) == {
+            "signature_mismatch": 1, "merchant_mismatch": 1, "unparseable": 1,
+        }
+        assert report.passphrase_usage == {0: 11, 1: 1}
+        assert {m.line for m in mismatches} == {12, 13, 15}
+
+    def test_executor_matches_inline(self, jsonl_archive):
+        """Test pooled execution yields the same report"""
+        with ThreadPoolExecutor(2) as executor:
+            report = audit_archive(jsonl_archive, ["current", "previous"], MERCHANT_ID,
+                                   chunk_size=3, executor=executor)
+        assert (report.total, report.verified) == (14, 11)
+
+    def test_process_pool(self, jsonl_archive):
+        """Test auditing across worker processes"""
+        report = audit_archive(jsonl_archive, ["current", "previous"], MERCHANT_ID,
+                               workers=2, chunk_size=5)
+        assert (report.total, report.verified) == (14, 11)
+
+    def test_csv_and_raw_formats(self, tmp_path):
+        """Test CSV and raw urlencoded archives"""
+        rows = archive_rows()
+        csv_path = tmp_path / "itns.csv"
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(rows[0].keys())
+            writer.writerows(r.values() for r in rows)
+        raw_path = tmp_path / "itns.log"
+        raw_path.write_text("\n".join(urllib.parse.urlencode(r) for r in rows) + "\n")
+
+        for path in (csv_path, raw_path):
+            report = audit_archive(str(path), ["current", "previous"], MERCHANT_ID, workers=1)
+            assert (report.total, report.verified) == (13, 11)
+
+    def test_csv_blank_rows_skipped(self, tmp_path):
+        """Test blank CSV rows are not counted as records"""
+        rows = archive_rows()[:2]
+        path = tmp_path / "itns.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(rows[0].keys())
+            writer.writerow(rows[0].values())
+            f.write("\r\n")
+            writer.writerow([""] * len(rows[0]))
+            writer.writerow(rows[1].values())
+
+        report = audit_archive(str(path), ["current", "previous"], MERCHANT_ID, workers=1)
+
+        assert (report.total, report.verified) == (2, 2)
+        assert not report.reasons
+
+
+class TestAuditCommand:
+    """Test suite for the audit CLI command"""
+
+    def test_cli_reports_mismatches(self, jsonl_archive, tmp_path, capsys):
+        """Test the command writes mismatches and exits non-zero"""
+        output = tmp_path / "mismatches.jsonl"
+        code = main([
+            "audit", jsonl_archive, "--passphrase", "current", "--passphrase", "previous",
+            "--merchant-id", MERCHANT_ID, "--workers", "1", "--output", str(output),
+        ])
+
+        assert code == 1
+        assert len(output.read_text().splitlines()) == 3
+        summary = json.loads(capsys.readouterr().err)
+        assert summary["verified"] == 11
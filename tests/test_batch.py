@@ -0,0 +1,157 @@
+"""Tests for PayFast bulk ad-hoc charge runner"""
+
+import httpx
+import pytest
+
+from fastapi_payfast import PayFastConfig
+from fastapi_payfast.api import PayFastAPI
+from fastapi_payfast.batch import (
+    AdhocCharge,
+    AdhocChargeRunner,
+    ChargeStatus,
+    CheckpointStore,
+    TokenBucket,
+)
+from fastapi_payfast.exceptions import PayFastAPIError
+from fastapi_payfast.testing.stub_api import create_stub_api
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def make_api(config, stub):
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub), base_url=config.api_url)
+    return PayFastAPI(config, http_client=http)
+
+
+class TestPayFastAPI:
+    """Test suite for the REST API client against the stub"""
+
+    async def test_charge_adhoc(self, config):
+        """Test a signed ad-hoc charge is accepted"""
+        stub = create_stub_api(config)
+        response = await make_api(config, stub).charge_adhoc("tok-1", 1500, "Monthly box")
+
+        assert response["status"] == "success"
+        assert stub.state.charges == [("tok-1", 1500)]
+
+    async def test_bad_signature_rejected(self, config):
+        """Test the stub rejects requests signed with another passphrase"""
+        stub = create_stub_api(config)
+        other = config.model_copy(update={"passphrase": "wrong"})
+
+        with pytest.raises(PayFastAPIError) as exc_info:
+            await make_api(other, stub).charge_adhoc("tok-1", 1500, "Monthly box")
+        assert exc_info.value.status_code == 401
+
+
+class TestAdhocChargeRunner:
+    """Test suite for AdhocChargeRunner"""
+
+    async def test_runs_all_charges(self, config):
+        """Test every charge is executed once and streamed back"""
+        stub = create_stub_api(config)
+        runner = AdhocChargeRunner(make_api(config, stub), concurrency=4, rate=1000)
+        charges = [(f"tok-{i}", 100 + i, "Box") for i in range(20)]
+
+        results = [r async for r in runner.run(charges)]
+
+        assert len(results) == 20
+        assert all(r.status == ChargeStatus.CHARGED for r in results)
+        assert sorted(stub.state.charges) == sorted((t, a) for t, a, _ in charges)
+
+    async def test_rejections_and_failures_classified(self, config):
+        """Test 4xx is a rejection and 5xx an unknown outcome"""
+        stub = create_stub_api(config, reject_tokens=["bad"], fail_tokens=["flaky"])
+        runner = AdhocChargeRunner(make_api(config, stub), rate=1000)
+
+        results = {r.charge.token: r.status async for r in runner.run(
+            [("ok", 100, "Box"), ("bad", 100, "Box"), ("flaky", 100, "Box")]
+        )}
+
+        assert results == {
+            "ok": ChargeStatus.CHARGED,
+            "bad": ChargeStatus.REJECTED,
+            "flaky": ChargeStatus.UNCERTAIN,
+        }
+
+    async def test_resume_does_not_double_charge(self, config, tmp_path):
+        """Test a resumed run skips charged and in-flight items"""
+        checkpoint = CheckpointStore(str(tmp_path / "charges.db"))
+        charges = [AdhocCharge(f"tok-{i}", 100, "Box") for i in range(4)]
+        checkpoint.mark(charges[0].checkpoint_key, ChargeStatus.CHARGED)
+        checkpoint.mark(charges[1].checkpoint_key, ChargeStatus.STARTED)
+        checkpoint.mark(charges[2].checkpoint_key, ChargeStatus.REJECTED)
+        stub = create_stub_api(config)
+        runner = AdhocChargeRunner(make_api(config, stub), checkpoint=checkpoint, rate=1000)
+
+        results = {r.charge.token: r.status async for r in runner.run(charges)}
+
+        assert results == {
+            "tok-0": ChargeStatus.SKIPPED,
+            "tok-1": ChargeStatus.UNCERTAIN,
+            "tok-2": ChargeStatus.CHARGED,
+            "tok-3": ChargeStatus.CHARGED,
+        }
+        assert sorted(stub.state.charges) == [("tok-2", 100), ("tok-3", 100)]
+        assert checkpoint.status(charges[3].checkpoint_key) == ChargeStatus.CHARGED
+
+    async def test_queued_duplicate_not_charged_twice(self, config, tmp_path):
+        """Test a duplicate waiting on the rate limiter is skipped, not sent"""
+        checkpoint = CheckpointStore(str(tmp_path / "charges.db"))
+        stub = create_stub_api(config)
+        runner = AdhocChargeRunner(
+            make_api(config, stub), checkpoint=checkpoint, rate=5, burst=1
+        )
+
+        results = [r.status async for r in runner.run(
+            [("x", 1, "a"), ("tok", 100, "a"), ("tok", 100, "a")]
+        )]
+
+        assert sorted(results) == sorted(
+            [ChargeStatus.CHARGED, ChargeStatus.CHARGED, ChargeStatus.SKIPPED]
+        )
+        assert sorted(stub.state.charges) == [("tok", 100), ("x", 1)]
+
+    async def test_charge_reference_distinguishes_charges(self, config, tmp_path):
+        """Test the same token can be charged again under another reference"""
+        checkpoint = CheckpointStore(str(tmp_path / "charges.db"))
+        stub = create_stub_api(config)
+        runner = AdhocChargeRunner(make_api(config, stub), checkpoint=checkpoint, rate=1000)
+        charges = [AdhocCharge("tok", 100, "Box", key="2024-01"),
+                   AdhocCharge("tok", 100, "Box", key="2024-02")]
+
+        results = [r.status async for r in runner.run(charges)]
+        rerun = [r.status async for r in runner.run(charges)]
+
+        assert results == [ChargeStatus.CHARGED, ChargeStatus.CHARGED]
+        assert rerun == [ChargeStatus.SKIPPED, ChargeStatus.SKIPPED]
+        assert stub.state.charges == [("tok", 100), ("tok", 100)]
+
+    async def test_invalid_input_propagates(self, config):
+        """Test malformed input surfaces to the caller"""
+        runner = AdhocChargeRunner(make_api(config, create_stub_api(config)), rate=1000)
+
+        with pytest.raises(TypeError):
+            [r async for r in runner.run([("tok-only",)])]
+
+
+class TestTokenBucket:
+    """Test suite for TokenBucket"""
+
+    async def test_paces_after_burst(self):
+        """Test acquisitions beyond the burst are delayed"""
+        import time
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        assert time.monotonic() - start >= 0.09
@@ -0,0 +1,43 @@
+"""Tests for the benchmark harness"""
+
+import pytest
+
+from benchmarks.harness import compare, measure_memory, measure_time
+
+
+def document(**results):
+    return {
+        "suite": "time",
+        "results": {name: {"ns_per_op": value} for name, value in results.items()},
+    }
+
+
+class TestHarness:
+    """Test suite for benchmark timing and comparison"""
+
+    def test_measure_time(self):
+        """Test timing calibrates iterations and reports per-op figures"""
+        calls = []
+        result = measure_time(lambda n: calls.extend(range(n)), min_time=0.001, repeat=3)
+
+        assert result["iterations"] >= 1
+        assert 0 < result["ns_per_op"] <= result["median_ns_per_op"]
+
+    def test_measure_memory(self):
+        """Test retained bytes reflect the objects an operation returns"""
+        result = measure_memory(lambda: bytearray(4096), batch=100, repeat=2)
+
+        assert 4096 <= result["retained_bytes_per_op"] < 8192
+        assert 4096 <= result["retained_bytes_per_op_10k"] < 8192
+        assert result["peak_bytes_per_op"] >= result["retained_bytes_per_op"]
+
+    def test_compare_flags_regressions(self):
+        """Test comparisons report percentage change per benchmark"""
+        comparisons = compare(document(a=100, b=100, old=5), document(a=120, b=90, new=1))
+
+        assert [(c.name, round(c.change_pct)) for c in comparisons] == [("a", 20), ("b", -10)]
+
+    def test_compare_rejects_other_suite(self):
+        """Test result documents from different suites are not compared"""
+        with pytest.raises(ValueError):
+            compare({"suite": "memory", "results": {}}, document())
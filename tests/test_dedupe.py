@@ -0,0 +1,134 @@
+"""Tests for the shared-memory ITN dedupe table"""
+
+import multiprocessing
+import time
+import urllib.parse
+
+import httpx
+import pytest
+
+from fastapi_payfast import PayFastClient, PayFastConfig
+from fastapi_payfast.asgi import payfast_itn_asgi
+from fastapi_payfast.dedupe import ITNDedupeTable
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def table():
+    """Fixture for a small dedupe table"""
+    table = ITNDedupeTable(slots=64, ttl=60)
+    yield table
+    table.close()
+    table.unlink()
+
+
+def _claim_in_child(name, queue):
+    table = ITNDedupeTable.attach(name)
+    queue.put([table.claim("1001", "COMPLETE"), table.claim("1002", "COMPLETE")])
+    table.close()
+
+
+class TestITNDedupeTable:
+    """Test suite for ITNDedupeTable"""
+
+    def test_duplicate_rejected(self, table):
+        """Test a second claim of the same ITN fails"""
+        assert table.claim("1001", "COMPLETE")
+        assert not table.claim("1001", "COMPLETE")
+
+    def test_status_is_part_of_key(self, table):
+        """Test each payment status is claimed separately"""
+        assert table.claim("1001", "PENDING")
+        assert table.claim("1001", "COMPLETE")
+
+    def test_release(self, table):
+        """Test a released ITN can be claimed again"""
+        table.claim("1001", "COMPLETE")
+        table.release("1001", "COMPLETE")
+        assert table.claim("1001", "COMPLETE")
+
+    def test_ttl_expiry(self):
+        """Test claims expire after the ttl"""
+        table = ITNDedupeTable(slots=8, ttl=0.01)
+        try:
+            assert table.claim("1001", "COMPLETE")
+            time.sleep(0.02)
+            assert table.claim("1001", "COMPLETE")
+            assert not table.claim("1001", "COMPLETE")
+        finally:
+            table.close()
+            table.unlink()
+
+    def test_full_table_fails_open(self):
+        """Test a full table accepts new ITNs rather than dropping them"""
+        table = ITNDedupeTable(slots=4, ttl=60)
+        try:
+            assert all(table.claim(str(i), "COMPLETE") for i in range(10))
+        finally:
+            table.close()
+            table.unlink()
+
+    def test_shared_between_processes(self, table):
+        """Test claims are visible to an attached process"""
+        table.claim("1001", "COMPLETE")
+        queue = multiprocessing.get_context("spawn").Queue()
+        process = multiprocessing.get_context("spawn").Process(
+            target=_claim_in_child, args=(table.name, queue)
+        )
+        process.start()
+        result = queue.get(timeout=30)
+        process.join(timeout=30)
+        assert result == [False, True]
+        assert not table.claim("1002", "COMPLETE")
+
+    def test_attach_rejects_foreign_segment(self):
+        """Test attaching to memory that is not a dedupe table fails"""
+        from multiprocessing import shared_memory
+        segment = shared_memory.SharedMemory(create=True, size=64)
+        try:
+            with pytest.raises(ValueError):
+                ITNDedupeTable.attach(segment.name)
+        finally:
+            segment.close()
+            segment.unlink()
+
+
+class TestDedupedITNEndpoint:
+    """Test suite for the raw ASGI endpoint with a dedupe table"""
+
+    async def test_acknowledges_duplicates_without_handler(self, table):
+        """Test redelivered ITNs are acknowledged without calling the handler again"""
+        config = PayFastConfig(
+            merchant_id="10000100",
+            merchant_key="46f0cd694581a",
+            passphrase="jt7NOE43FZPn",
+            validate_ip=False
+        )
+        fields = {
+            'm_payment_id': 'ORD-1',
+            'pf_payment_id': '12345',
+            'payment_status': 'COMPLETE',
+            'item_name': 'Test Product',
+            'amount_gross': '100.00',
+            'amount_fee': '-5.00',
+            'amount_net': '95.00',
+            'merchant_id': config.merchant_id,
+        }
+        fields['signature'] = generate_signature(fields, config.passphrase)
+        handled = []
+        failures = [RuntimeError("database down")]
+
+        def handler(itn):
+            if failures:
+                raise failures.pop()
+            handled.append(itn.pf_payment_id)
+
+        app = payfast_itn_asgi(PayFastClient(config), handler, dedupe=table)
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        body = urllib.parse.urlencode(fields)
+        headers = {'content-type': 'application/x-www-form-urlencoded'}
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            assert (await http.post("/", content=body, headers=headers)).status_code == 500
+            for _ in range(3):
+                assert (await http.post("/", content=body, headers=headers)).status_code == 200
+        assert handled == ['12345']
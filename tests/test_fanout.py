@@ -0,0 +1,176 @@
+"""Tests for webhook fan-out"""
+
+import asyncio
+
+import httpx
+
+from fastapi_payfast.fanout import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    Destination,
+    WebhookFanout,
+)
+from fastapi_payfast.metrics import MetricsRegistry
+from fastapi_payfast.testing.stub_receiver import create_stub_receiver
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker"""
+
+    def test_opens_and_half_opens(self):
+        """Test the breaker opens after failures and allows one trial after reset"""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        assert not breaker.record_failure()
+        assert breaker.record_failure()
+        assert breaker.state == OPEN and not breaker.allow()
+        assert breaker.retry_after() == 10
+        now[0] = 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()  # one trial at a time
+        assert breaker.record_failure()
+        assert breaker.state == OPEN
+        now[0] = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_released_trial_allows_another(self):
+        """Test a half-open trial given up without an outcome lets the next call through"""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.release_trial()
+        assert breaker.allow()
+
+
+class TestWebhookFanout:
+    """Test suite for WebhookFanout"""
+
+    async def test_delivers_to_every_destination(self):
+        """Test every destination receives each event, batched where configured"""
+        fulfilment, accounting = create_stub_receiver(), create_stub_receiver()
+        metrics = MetricsRegistry()
+        fanout = WebhookFanout([
+            Destination(
+                "fulfilment",
+                "http://fulfilment/itn",
+                transport=httpx.ASGITransport(app=fulfilment)
+            ),
+            Destination(
+                "accounting",
+                "http://accounting/itn",
+                transport=httpx.ASGITransport(app=accounting),
+                batch_size=10,
+                max_delay=0.01
+            ),
+        ], metrics=metrics)
+        for index in range(3):
+            fanout.publish({'pf_payment_id': str(index)})
+        await fanout.aclose()
+
+        received = sorted(event['pf_payment_id'] for event in fulfilment.state.received)
+        assert received == ["0", "1", "2"]
+        assert accounting.state.requests == 1
+        assert len(accounting.state.received[0]['events']) == 3
+        assert fanout.stats['accounting']['delivered'] == 3
+        assert (
+            'payfast_webhook_events_total{destination="fulfilment",outcome="delivered"} 3'
+            in metrics.render()
+        )
+
+    async def test_retries_transient_failures(self):
+        """Test 5xx responses are retried until delivered"""
+        receiver = create_stub_receiver(fail_first=2)
+        fanout = WebhookFanout([Destination(
+            "crm",
+            "http://crm/itn",
+            transport=httpx.ASGITransport(app=receiver),
+            concurrency=1,
+            backoff=0.001
+        )])
+        fanout.publish({'pf_payment_id': "1"})
+        await fanout.aclose()
+
+        assert receiver.state.requests == 3
+        assert fanout.stats['crm']['delivered'] == 1
+
+    async def test_client_errors_are_not_retried(self):
+        """Test a 4xx response counts as rejected without a retry"""
+        receiver = create_stub_receiver(status_code=422)
+        fanout = WebhookFanout([Destination(
+            "crm", "http://crm/itn", transport=httpx.ASGITransport(app=receiver), concurrency=1
+        )])
+        fanout.publish({'pf_payment_id': "1"})
+        await fanout.aclose()
+
+        assert receiver.state.requests == 1
+        assert fanout.stats['crm']['rejected'] == 1
+
+    async def test_open_circuit_stops_calls(self):
+        """Test an open circuit stops further requests to a failing destination"""
+        receiver = create_stub_receiver(fail_first=100)
+        fanout = WebhookFanout([Destination(
+            "crm",
+            "http://crm/itn",
+            transport=httpx.ASGITransport(app=receiver),
+            concurrency=1,
+            retries=5,
+            backoff=0.001,
+            failure_threshold=2,
+            reset_timeout=60
+        )])
+        fanout.publish({'pf_payment_id': "1"})
+        await asyncio.sleep(0.1)
+
+        assert receiver.state.requests == 2
+        assert fanout.sender("crm").breaker.state == OPEN
+        await fanout.aclose(timeout=0.01)
+
+    async def test_cancelled_trial_is_released(self):
+        """Test cancelling a worker during a half-open trial does not wedge the breaker"""
+        receiver = create_stub_receiver(latency=1.0)
+        fanout = WebhookFanout([Destination(
+            "crm",
+            "http://crm/itn",
+            transport=httpx.ASGITransport(app=receiver),
+            concurrency=1,
+            failure_threshold=1,
+            reset_timeout=0
+        )])
+        breaker = fanout.sender("crm").breaker
+        breaker.record_failure()
+        fanout.publish({'pf_payment_id': "1"})
+        await asyncio.sleep(0.05)
+        assert breaker._trial
+
+        await fanout.aclose(timeout=0.01)
+        assert not breaker._trial
+        assert breaker.allow()
+
+    async def test_slow_destination_does_not_block_publish_or_others(self):
+        """Test a slow destination drops its own overflow without delaying others"""
+        slow, fast = create_stub_receiver(latency=0.5), create_stub_receiver()
+        fanout = WebhookFanout([
+            Destination(
+                "slow",
+                "http://slow/itn",
+                transport=httpx.ASGITransport(app=slow),
+                concurrency=1,
+                queue_size=2
+            ),
+            Destination("fast", "http://fast/itn", transport=httpx.ASGITransport(app=fast)),
+        ])
+        for index in range(5):
+            fanout.publish({'pf_payment_id': str(index)})
+        await asyncio.sleep(0.1)
+
+        assert len(fast.state.received) == 5
+        assert fanout.stats['slow']['dropped'] >= 2
+        await fanout.aclose(timeout=0.01)
@@ -0,0 +1,132 @@
+"""Tests for PayFast transaction history parsing"""
+
+import itertools
+
+import httpx
+import pytest
+
+from fastapi_payfast import PayFastConfig
+from fastapi_payfast.api import PayFastAPI
+from fastapi_payfast.history import (
+    aiter_transaction_records,
+    iter_transaction_records,
+    normalize_column,
+    read_transaction_history,
+)
+from fastapi_payfast.testing.stub_api import create_stub_api
+from fastapi_payfast.utils import parse_cents
+
+
+HEADER = '"Date","Type","Name","Description","Gross","Fee","Net","M Payment ID","PF Payment ID"'
+
+
+def export_lines(rows=None):
+    """Generate CSV export lines, endlessly when rows is None"""
+    yield HEADER
+    counter = itertools.count() if rows is None else range(rows)
+    for i in counter:
+        yield (
+            f'"2024-01-01","PAYMENT","Buyer {i}","Order {i}",'
+            f'"1,000.50","-23.01","977.49","ORD-{i}","{i}"'
+        )
+
+
+class TestParseCents:
+    """Test suite for parse_cents"""
+
+    def test_parse_cents_values(self):
+        """Test amounts are parsed exactly to cents"""
+        assert parse_cents("1,234.50") == 123450
+        assert parse_cents("-5.00") == -500
+        assert parse_cents("0.1") == 10
+        assert parse_cents("12") == 1200
+        assert parse_cents("1.005") == 101
+
+    def test_parse_cents_invalid(self):
+        """Test non-numeric amounts are rejected"""
+        with pytest.raises(ValueError):
+            parse_cents("abc")
+
+
+class TestIterTransactionRecords:
+    """Test suite for the CSV record parser"""
+
+    def test_normalize_column(self):
+        """Test header normalization"""
+        assert normalize_column("PF Payment ID") == "pf_payment_id"
+        assert normalize_column("\ufeffDate") == "date"
+
+    def test_typed_records(self):
+        """Test amount columns become integer cents"""
+        record = next(iter_transaction_records(export_lines(1)))
+
+        assert record.gross == 100050
+        assert record.fee == -2301
+        assert record.net == 97749
+        assert record.pf_payment_id == "0"
+
+    def test_column_projection(self):
+        """Test only requested columns are kept"""
+        record = next(iter_transaction_records(export_lines(1), ["m_payment_id", "net"]))
+
+        assert record._fields == ("m_payment_id", "net")
+        assert record == ("ORD-0", 97749)
+
+    def test_awkward_headers_renamed(self):
+        """Test duplicate and non-identifier headers get positional names"""
+        lines = ['"Date","Fee","Fee","1st","#"', '"2024-01-01","1.00","2.00","x","y"']
+        record = next(iter_transaction_records(lines))
+
+        assert record._fields == ("date", "fee", "_2", "_3", "_4")
+        assert record == ("2024-01-01", 100, 200, "x", "y")
+
+    def test_unknown_column(self):
+        """Test requesting a missing column fails fast"""
+        with pytest.raises(ValueError, match="Unknown columns"):
+            next(iter_transaction_records(export_lines(1), ["nope"]))
+
+    def test_streams_lazily(self):
+        """Test records are produced without consuming the whole input"""
+        records = list(itertools.islice(iter_transaction_records(export_lines()), 3))
+        assert [r.m_payment_id for r in records] == ["ORD-0", "ORD-1", "ORD-2"]
+
+    def test_read_from_file(self, tmp_path):
+        """Test reading an export from disk"""
+        path = tmp_path / "history.csv"
+        path.write_text("\n".join(export_lines(5)) + "\n", encoding="utf-8-sig")
+
+        records = list(read_transaction_history(str(path), ["date", "gross"]))
+        assert len(records) == 5
+        assert records[0].date == "2024-01-01"
+
+    async def test_async_multiline_field(self):
+        """Test quoted fields spanning lines in streamed input"""
+        async def lines():
+            yield HEADER
+            yield '"2024-01-01","PAYMENT","A","two'
+            yield 'lines","1.00","0","1.00","X","1"'
+
+        records = [r async for r in aiter_transaction_records(lines())]
+        assert records[0].description == "two\nlines"
+        assert records[0].gross == 100
+
+
+class TestStreamTransactionHistory:
+    """Test suite for PayFastAPI.stream_transaction_history"""
+
+    async def test_stream_from_stub(self):
+        """Test streaming the export from the stub API"""
+        config = PayFastConfig(
+            merchant_id="10000100",
+            merchant_key="46f0cd694581a",
+            passphrase="jt7NOE43FZPn",
+        )
+        stub = create_stub_api(config, history=lambda start, end: export_lines(100))
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub), base_url=config.api_url)
+        api = PayFastAPI(config, http_client=http)
+
+        total = 0
+        async for record in api.stream_transaction_history("2024-01-01", "2024-01-31", ["net"]):
+            total += record.net
+
+        assert total == 100 * 97749
@@ -0,0 +1,70 @@
+"""Tests for lazy package imports"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import fastapi_payfast
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def loaded_modules(statement):
+    code = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyImports:
+    """Test suite for PEP 562 lazy loading"""
+
+    @pytest.mark.parametrize("statement", [
+        "import fastapi_payfast",
+        "from fastapi_payfast.utils import generate_signature",
+        "from fastapi_payfast.core import verify_itn_data",
+        "import fastapi_payfast.cli",
+    ])
+    def test_framework_not_imported(self, statement):
+        """Test signing, core and CLI imports do not load FastAPI"""
+        modules = loaded_modules(statement)
+        assert 'fastapi' not in modules
+        assert 'starlette' not in modules
+
+    def test_public_names_resolve(self):
+        """Test lazy attributes resolve to the defining module's objects"""
+        from fastapi_payfast.client import PayFastClient
+
+        assert fastapi_payfast.PayFastClient is PayFastClient
+        assert set(fastapi_payfast.__all__) <= set(dir(fastapi_payfast))
+
+    def test_unknown_attribute(self):
+        """Test unknown attributes still raise AttributeError"""
+        with pytest.raises(AttributeError):
+            fastapi_payfast.NotAThing
+
+
+class TestCore:
+    """Test suite for framework-free verification"""
+
+    def test_verify_itn_data(self, sample_itn_data):
+        """Test dict-based verification matches the client's rules"""
+        from fastapi_payfast.core import PayFastConfig, verify_itn_data, verify_signature
+        from fastapi_payfast.exceptions import InvalidMerchantError, SignatureVerificationError
+        from fastapi_payfast.utils import generate_signature
+
+        config = PayFastConfig(merchant_id="10000100", merchant_key="k", passphrase="pp")
+        data = dict(sample_itn_data, merchant_id="10000100")
+        data.pop('signature', None)
+        data['signature'] = generate_signature(data, "pp")
+
+        assert verify_signature(data, "pp")
+        assert verify_itn_data(data, config).pf_payment_id == data['pf_payment_id']
+        with pytest.raises(SignatureVerificationError, match="Signature mismatch"):
+            verify_itn_data(dict(data, amount_gross="1.00"), config)
+        with pytest.raises(InvalidMerchantError):
+            verify_itn_data(data, config.copy(update={'merchant_id': "other"}))
@@ -0,0 +1,129 @@
+"""Tests for the ITN load generator"""
+
+import json
+import sys
+import types
+import urllib.parse
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from fastapi_payfast import PayFastClient, PayFastConfig, PayFastException
+from fastapi_payfast.cli import main
+from fastapi_payfast.core import REJECTION_EXCEPTIONS, REJECTION_MESSAGES
+from fastapi_payfast.loadtest import ITNGenerator, TrafficMix, classify, run_load_test
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+@pytest.fixture
+def merchant(config):
+    """Merchant app verifying ITNs"""
+    client = PayFastClient(config)
+    app = FastAPI()
+
+    @app.post("/itn")
+    async def itn(request: Request):
+        try:
+            await client.verify_itn(request)
+        except PayFastException as e:
+            raise e.to_http_exception()
+        return {}
+
+    return app
+
+
+class TestITNGenerator:
+    """Test suite for ITN body generation"""
+
+    def test_mix_kinds(self, config):
+        """Test every requested kind is generated and duplicates replay bodies"""
+        generator = ITNGenerator(config, TrafficMix(duplicate_rate=0.2, oversized_rate=0.2,
+                                                    oversized_bytes=1000), seed=3)
+        generated = [generator.next(i) for i in range(200)]
+        kinds = {kind for kind, _ in generated}
+        valid = {body for kind, body in generated if kind == 'valid'}
+
+        assert kinds == {'valid', 'duplicate', 'oversized'}
+        assert all(body in valid for kind, body in generated if kind == 'duplicate')
+        assert all(len(body) > 1000 for kind, body in generated if kind == 'oversized')
+
+    def test_bodies_are_form_encoded(self, config):
+        """Test generated bodies parse back into PayFast ITN fields"""
+        _, body = ITNGenerator(config, seed=1).next(7)
+        fields = dict(urllib.parse.parse_qsl(body.decode()))
+
+        assert fields['pf_payment_id'] == '2000007'
+        assert fields['merchant_id'] == config.merchant_id
+
+    def test_rates_bounded(self, config):
+        """Test rates adding up to more than 1 are rejected"""
+        with pytest.raises(ValueError):
+            ITNGenerator(config, TrafficMix(duplicate_rate=0.6, invalid_signature_rate=0.6))
+
+
+class TestLoadTest:
+    """Test suite for running load tests"""
+
+    def test_classify(self):
+        """Test rejections map back to exception types"""
+        assert classify(200, b"{}") == "ok"
+        assert classify(400, b'{"detail": "Signature mismatch"}') == "SignatureVerificationError"
+        mismatch = b'{"detail": "Merchant ID mismatch: expected 1"}'
+        assert classify(400, mismatch) == "InvalidMerchantError"
+        assert classify(502, b"Bad gateway") == "HTTP 502"
+
+    def test_classify_covers_every_rejection(self):
+        """Test each rejection message in core maps to its exception"""
+        for reason, message in REJECTION_MESSAGES.items():
+            body = json.dumps({'detail': message}).encode()
+            assert classify(400, body) == REJECTION_EXCEPTIONS[reason].__name__
+
+    async def test_closed_loop(self, config, merchant):
+        """Test outcomes are broken down by traffic kind"""
+        mix = TrafficMix(invalid_signature_rate=0.25, wrong_merchant_rate=0.25)
+        report = await run_load_test(
+            "http://merchant/itn", config, requests=200, concurrency=8, mix=mix, seed=5,
+            transport=httpx.ASGITransport(app=merchant)
+        )
+
+        assert report.total == 200
+        assert set(report.by_kind['valid']) == {'ok'}
+        assert set(report.by_kind['invalid_signature']) == {'SignatureVerificationError'}
+        assert set(report.by_kind['wrong_merchant']) == {'InvalidMerchantError'}
+        latency = report.as_dict()['latency_ms']
+        assert latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['p999']
+
+    async def test_open_loop_rate(self, config, merchant):
+        """Test rate mode paces requests"""
+        report = await run_load_test(
+            "http://merchant/itn", config, requests=20, rate=200,
+            transport=httpx.ASGITransport(app=merchant)
+        )
+
+        assert report.outcomes['ok'] == 20
+        assert report.elapsed >= 19 / 200
+
+    def test_cli(self, config, merchant, capsys, monkeypatch):
+        """Test the loadtest subcommand against an in-process app"""
+        module = types.ModuleType("loadtest_target")
+        module.app = merchant
+        monkeypatch.setitem(sys.modules, "loadtest_target", module)
+
+        code = main([
+            "loadtest", "/itn", "--app", "loadtest_target:app", "-n", "10",
+            "--merchant-id", config.merchant_id, "--passphrase", config.passphrase
+        ])
+
+        assert code == 0
+        assert '"ok": 10' in capsys.readouterr().out
@@ -0,0 +1,201 @@
+"""Tests for PayFast metrics"""
+
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from fastapi_payfast import (
+    PayFastClient,
+    PayFastConfig,
+    PayFastPaymentData,
+    SignatureVerificationError,
+)
+from fastapi_payfast import metrics as m
+from fastapi_payfast.metrics import MetricsRegistry, create_metrics_router
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def make_request(form_data):
+    request = Mock(spec=Request)
+    request.form = AsyncMock(return_value=form_data)
+    request.client = Mock()
+    request.client.host = "197.97.145.144"
+    return request
+
+
+def itn_form(config, **overrides):
+    data = {
+        'merchant_id': config.merchant_id,
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'amount_gross': '100.00',
+        'amount_fee': '5.00',
+        'amount_net': '95.00',
+    }
+    data.update(overrides)
+    data['signature'] = generate_signature(data, config.passphrase)
+    return data
+
+
+class TestMetricsRegistry:
+    """Test suite for MetricsRegistry"""
+
+    def test_render_prometheus_text(self):
+        """Test counters and cumulative histogram buckets are rendered"""
+        registry = MetricsRegistry(buckets=(0.001, 0.01))
+        registry.inc(m.ITN_TOTAL, (("status", "COMPLETE"),))
+        registry.inc(m.ITN_TOTAL, (("status", "COMPLETE"),))
+        registry.observe(m.OPERATION_SECONDS, 0.0005, m.SIGN)
+        registry.observe(m.OPERATION_SECONDS, 0.5, m.SIGN)
+
+        text = registry.render()
+
+        assert "# TYPE payfast_itn_total counter" in text
+        assert 'payfast_itn_total{status="COMPLETE"} 2' in text
+        assert 'payfast_operation_seconds_bucket{operation="sign",le="0.001"} 1' in text
+        assert 'payfast_operation_seconds_bucket{operation="sign",le="+Inf"} 2' in text
+        assert 'payfast_operation_seconds_count{operation="sign"} 2' in text
+
+    def test_multiprocess_merge(self, tmp_path):
+        """Test snapshots from several workers are summed"""
+        worker = MetricsRegistry(multiprocess_dir=str(tmp_path))
+        worker.inc(m.SIGNATURE_FAILURES, value=3)
+        worker.flush()
+
+        collector = MetricsRegistry(multiprocess_dir=str(tmp_path))
+        collector.inc(m.SIGNATURE_FAILURES)
+
+        assert "payfast_signature_failures_total 4" in collector.render()
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+    def test_pending_updates_written_after_interval(self, tmp_path):
+        """Test updates made between snapshot writes are written when the interval ends"""
+        worker = MetricsRegistry(multiprocess_dir=str(tmp_path), flush_interval=0.05)
+        worker.inc(m.SIGNATURE_FAILURES)
+        worker.inc(m.SIGNATURE_FAILURES)
+        time.sleep(0.2)
+
+        collector = MetricsRegistry(multiprocess_dir=str(tmp_path))
+        assert "payfast_signature_failures_total 2" in collector.render()
+
+    def test_worker_totals_kept_after_close(self, tmp_path):
+        """Test a worker's counts, including unwritten ones, survive its exit once"""
+        worker = MetricsRegistry(multiprocess_dir=str(tmp_path), flush_interval=60)
+        worker.inc(m.SIGNATURE_FAILURES, value=3)
+        worker.inc(m.SIGNATURE_FAILURES)
+        worker.close()
+        worker.close()
+
+        collector = MetricsRegistry(multiprocess_dir=str(tmp_path))
+        collector.inc(m.SIGNATURE_FAILURES)
+
+        assert "payfast_signature_failures_total 5" in collector.render()
+        assert "payfast_signature_failures_total 5" in collector.render()
+
+    @pytest.mark.skipif(os.name != "posix", reason="dead workers are only detected on POSIX")
+    def test_dead_worker_snapshot_folded_into_total(self, tmp_path):
+        """Test snapshots left by crashed workers keep counting from the saved total"""
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True, check=True)
+        stale = tmp_path / f"payfast-metrics-{dead.stdout.strip()}-0123abcd.json"
+        stale.write_text('{"buckets": [], "counters": [["payfast_itn_total", [], 5]], '
+                         '"histograms": []}')
+
+        collector = MetricsRegistry(multiprocess_dir=str(tmp_path), buckets=())
+        collector.inc(m.SIGNATURE_FAILURES)
+
+        assert "payfast_itn_total 5" in collector.render()
+        assert "payfast_itn_total 5" in collector.render()
+        assert not stale.exists()
+        assert (tmp_path / "payfast-metrics-total.json").exists()
+
+    @pytest.mark.skipif(os.name != "posix", reason="folding needs fcntl")
+    def test_total_not_counted_twice_after_crash(self, tmp_path):
+        """Test retired snapshots already folded into the total are only removed"""
+        retired = tmp_path / "payfast-metrics-retired-1-0123abcd.json"
+        retired.write_text('{"buckets": [], "counters": [["payfast_itn_total", [], 5]], '
+                           '"histograms": []}')
+        (tmp_path / "payfast-metrics-total.json").write_text(
+            '{"buckets": [], "counters": [["payfast_itn_total", [], 5]], '
+            '"histograms": [], "merged": ["payfast-metrics-retired-1-0123abcd.json"]}'
+        )
+
+        collector = MetricsRegistry(multiprocess_dir=str(tmp_path), buckets=())
+        assert "payfast_itn_total 5" in collector.render()
+        assert not retired.exists()
+
+
+class TestClientInstrumentation:
+    """Test suite for client instrumentation"""
+
+    async def test_itn_outcomes_counted(self, config):
+        """Test ITN outcomes and failures are counted"""
+        registry = MetricsRegistry()
+        client = PayFastClient(config, metrics=registry)
+
+        await client.verify_itn(make_request(itn_form(config)))
+        bad = itn_form(config)
+        bad['signature'] = 'forged'
+        with pytest.raises(SignatureVerificationError):
+            await client.verify_itn(make_request(bad))
+
+        counters, histograms = registry.collect()
+        assert counters[(m.ITN_TOTAL, (("status", "COMPLETE"),))] == 1
+        assert counters[(m.SIGNATURE_FAILURES, ())] == 1
+        assert histograms[(m.OPERATION_SECONDS, m.PARSE)][-1] == 2
+
+    def test_invalid_data_counted(self, config):
+        """Test signed ITNs that fail model validation are counted"""
+        registry = MetricsRegistry()
+        client = PayFastClient(config, metrics=registry)
+
+        result = client.try_verify_itn_data(itn_form(config, amount_gross='lots'))
+
+        assert not result.ok
+        assert registry.collect()[0][(m.INVALID_DATA_FAILURES, ())] == 1
+
+    def test_checkout_latency_recorded(self, config):
+        """Test sign and render latencies are observed"""
+        registry = MetricsRegistry()
+        client = PayFastClient(config, metrics=registry)
+        client.generate_payment_form(PayFastPaymentData(
+            merchant_id=config.merchant_id,
+            merchant_key=config.merchant_key,
+            amount=10.0,
+            item_name="Test",
+        ))
+
+        _, histograms = registry.collect()
+        assert histograms[(m.OPERATION_SECONDS, m.SIGN)][-1] == 1
+        assert histograms[(m.OPERATION_SECONDS, m.RENDER)][-1] == 1
+
+    def test_metrics_route(self, config):
+        """Test the mountable metrics route"""
+        registry = MetricsRegistry()
+        registry.inc(m.MERCHANT_MISMATCHES)
+        app = FastAPI()
+        app.include_router(create_metrics_router(registry))
+
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "payfast_merchant_mismatches_total 1" in response.text
@@ -0,0 +1,204 @@
+"""Tests for the transactional outbox"""
+
+import asyncio
+
+import pytest
+
+from fastapi_payfast.outbox import Outbox, OutboxDispatcher, OutboxTask
+
+
+def make_itn(pf_payment_id="1001", status="COMPLETE"):
+    return {
+        'm_payment_id': f"ORD-{pf_payment_id}",
+        'pf_payment_id': pf_payment_id,
+        'payment_status': status,
+        'amount_gross': "100.00",
+    }
+
+
+async def wait_for_counts(outbox, expected, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        counts = await outbox.counts()
+        if counts == expected or asyncio.get_running_loop().time() > deadline:
+            return counts
+        await asyncio.sleep(0.01)
+
+
+class TestOutbox:
+    """Test suite for Outbox"""
+
+    async def test_records_itn_and_tasks_once(self, tmp_path):
+        """Test a redelivered ITN does not record its tasks again"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        tasks = [OutboxTask("email"), OutboxTask("fulfil", {'warehouse': "JHB"})]
+        assert await outbox.record(make_itn(), tasks)
+        assert not await outbox.record(make_itn(), tasks)
+        assert await outbox.counts() == {'pending': 2}
+        await outbox.aclose()
+
+    async def test_concurrent_records_share_commits(self, tmp_path):
+        """Test concurrent records are group committed"""
+        outbox = Outbox(str(tmp_path / "outbox.db"), commit_interval=0.01)
+        results = await asyncio.gather(*(
+            outbox.record(make_itn(str(index)), [OutboxTask("email")]) for index in range(50)
+        ))
+        assert all(results)
+        assert outbox.stats['commits'] < 5
+        assert await outbox.counts() == {'pending': 50}
+        await outbox.aclose()
+
+    async def test_closed_outbox_rejects_records(self, tmp_path):
+        """Test recording after aclose raises"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        await outbox.aclose()
+        with pytest.raises(RuntimeError):
+            await outbox.record(make_itn())
+
+
+class TestOutboxDispatcher:
+    """Test suite for OutboxDispatcher"""
+
+    async def test_runs_tasks_with_itn(self, tmp_path):
+        """Test handlers receive the task with its ITN fields"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        seen = []
+
+        async def email(task):
+            seen.append((task.kind, task.itn['m_payment_id'], task.payload))
+
+        dispatcher = OutboxDispatcher(outbox, {'email': email}, poll_interval=0.01)
+        await dispatcher.start()
+        await outbox.record(make_itn(), [OutboxTask("email", {'template': "receipt"})])
+        assert await wait_for_counts(outbox, {'done': 1}) == {'done': 1}
+        assert seen == [("email", "ORD-1001", {'template': "receipt"})]
+        await dispatcher.aclose()
+        await outbox.aclose()
+
+    async def test_retries_then_fails(self, tmp_path):
+        """Test failing tasks are retried up to max_attempts"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        attempts = {'flaky': 0, 'broken': 0}
+
+        async def flaky(task):
+            attempts['flaky'] += 1
+            if task.attempts < 2:
+                raise ConnectionError("smtp down")
+
+        async def broken(task):
+            attempts['broken'] += 1
+            raise ValueError("bad template")
+
+        dispatcher = OutboxDispatcher(
+            outbox,
+            {'flaky': flaky, 'broken': broken},
+            poll_interval=0.01,
+            max_attempts=3,
+            backoff=0.001
+        )
+        await dispatcher.start()
+        tasks = [OutboxTask("flaky"), OutboxTask("broken"), OutboxTask("unknown")]
+        await outbox.record(make_itn(), tasks)
+        expected = {'done': 1, 'failed': 2}
+        assert await wait_for_counts(outbox, expected) == expected
+        assert attempts == {'flaky': 2, 'broken': 3}
+        await dispatcher.aclose()
+        await outbox.aclose()
+
+    async def test_concurrency_limit(self, tmp_path):
+        """Test no more than concurrency tasks run at once"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        running = []
+        peak = []
+
+        async def slow(task):
+            running.append(task.id)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.remove(task.id)
+
+        dispatcher = OutboxDispatcher(outbox, {'slow': slow}, concurrency=2, poll_interval=0.01)
+        await dispatcher.start()
+        await outbox.record(make_itn(), [OutboxTask("slow") for _ in range(6)])
+        assert await wait_for_counts(outbox, {'done': 6}) == {'done': 6}
+        assert max(peak) == 2
+        await dispatcher.aclose()
+        await outbox.aclose()
+
+    async def test_slow_handler_keeps_its_lease(self, tmp_path):
+        """Test a handler running longer than the lease is not started twice"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        calls = []
+
+        async def slow(task):
+            calls.append(task.attempts)
+            await asyncio.sleep(0.2)
+
+        dispatcher = OutboxDispatcher(
+            outbox, {'slow': slow}, poll_interval=0.01, lease=0.05, exclusive=False
+        )
+        await dispatcher.start()
+        await outbox.record(make_itn(), [OutboxTask("slow")])
+        assert await wait_for_counts(outbox, {'done': 1}) == {'done': 1}
+        assert calls == [1]
+        await dispatcher.aclose()
+        await outbox.aclose()
+
+    async def test_start_leaves_other_workers_tasks(self, tmp_path):
+        """Test a shared dispatcher does not rerun a task another worker is running"""
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+        started = asyncio.Event()
+        calls = []
+
+        async def fulfil(task):
+            calls.append(task.id)
+            started.set()
+            await asyncio.sleep(0.2)
+
+        first = OutboxDispatcher(outbox, {'fulfil': fulfil}, poll_interval=0.01)
+        await first.start()
+        await outbox.record(make_itn(), [OutboxTask("fulfil")])
+        await asyncio.wait_for(started.wait(), 2)
+        second = OutboxDispatcher(outbox, {'fulfil': fulfil}, poll_interval=0.01)
+        await second.start()
+
+        assert await wait_for_counts(outbox, {'done': 1}) == {'done': 1}
+        assert len(calls) == 1
+        assert second.stats['recovered'] == 0
+        await first.aclose()
+        await second.aclose()
+        await outbox.aclose()
+
+    async def test_recovers_interrupted_tasks_on_restart(self, tmp_path):
+        """Test an exclusive dispatcher recovers tasks left running"""
+        path = str(tmp_path / "outbox.db")
+        outbox = Outbox(path)
+        started = asyncio.Event()
+
+        async def hang(task):
+            started.set()
+            await asyncio.sleep(60)
+
+        dispatcher = OutboxDispatcher(outbox, {'fulfil': hang}, poll_interval=0.01)
+        await dispatcher.start()
+        await outbox.record(make_itn(), [OutboxTask("fulfil")])
+        await asyncio.wait_for(started.wait(), 2)
+        await dispatcher.aclose(timeout=0)
+        await outbox.aclose()
+
+        outbox = Outbox(path)
+        assert await outbox.counts() == {'running': 1}
+        done = []
+
+        async def fulfil(task):
+            done.append(task.attempts)
+
+        dispatcher = OutboxDispatcher(
+            outbox, {'fulfil': fulfil}, poll_interval=0.01, exclusive=True
+        )
+        await dispatcher.start()
+        assert await wait_for_counts(outbox, {'done': 1}) == {'done': 1}
+        assert done == [2]
+        assert dispatcher.stats['recovered'] == 1
+        await dispatcher.aclose()
+        await outbox.aclose()
@@ -0,0 +1,211 @@
+"""Tests for the ITN verification pipeline"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from fastapi_payfast import (
+    InvalidAmountError,
+    PayFastClient,
+    PayFastConfig,
+    SignatureVerificationError,
+)
+from fastapi_payfast.exceptions import ITNValidationError, PayFastException
+from fastapi_payfast.pipeline import (
+    AMOUNT_MISMATCH,
+    DEADLINE_EXCEEDED,
+    ORDER_LOOKUP_FAILED,
+    ORDER_NOT_FOUND,
+    POSTBACK_INVALID,
+    SOURCE_IP,
+    ITNPipeline,
+)
+from fastapi_payfast.utils import generate_signature
+
+PAYFAST_IP = "197.97.145.144"
+
+
+@pytest.fixture
+def client():
+    """Fixture for a PayFast client"""
+    return PayFastClient(PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    ))
+
+
+@pytest.fixture
+def itn(client):
+    """Fixture for signed ITN fields"""
+    fields = {
+        'm_payment_id': 'ORD-1',
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'amount_gross': '100.00',
+        'amount_fee': '-5.00',
+        'amount_net': '95.00',
+        'merchant_id': client.config.merchant_id,
+    }
+    fields['signature'] = generate_signature(fields, client.config.passphrase)
+    return fields
+
+
+def postback(text="VALID", delay=0.0, seen=None):
+    async def handler(request):
+        if seen is not None:
+            seen.append(request.content.decode())
+        await asyncio.sleep(delay)
+        return httpx.Response(200, text=text)
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def lookup(amount, delay=0.0):
+    async def order_lookup(m_payment_id):
+        await asyncio.sleep(delay)
+        return amount
+    return order_lookup
+
+
+class TestITNPipeline:
+    """Test suite for ITNPipeline"""
+
+    def test_unknown_policy(self, client):
+        """Test an unknown policy is rejected"""
+        with pytest.raises(ValueError):
+            ITNPipeline(client, policy="paranoid")
+
+    async def test_fast_skips_io(self, client, itn):
+        """Test the fast policy runs no I/O checks"""
+        pipeline = ITNPipeline(client, policy="fast", order_lookup=lookup(None))
+        result = await pipeline.run(itn, "203.0.113.1")
+        assert result.ok
+        assert set(result.timings) == {'verify'}
+
+    async def test_cpu_checks_fail_before_io(self, client, itn):
+        """Test a forged ITN is rejected before the order lookup"""
+        calls = []
+
+        async def order_lookup(m_payment_id):
+            calls.append(m_payment_id)
+            return 100.0
+
+        itn['signature'] = "0" * 32
+        pipeline = ITNPipeline(client, order_lookup=order_lookup)
+        with pytest.raises(SignatureVerificationError):
+            await pipeline.verify(itn, PAYFAST_IP)
+        assert calls == []
+
+    async def test_standard_checks_source_ip(self, client, itn):
+        """Test the standard policy rejects addresses outside PayFast"""
+        result = await ITNPipeline(client).run(itn, "203.0.113.1")
+        assert result.reason == SOURCE_IP
+        assert (await ITNPipeline(client).run(itn, PAYFAST_IP)).ok
+
+    async def test_source_ip_checked_before_signature(self, client, itn):
+        """Test an off-range ITN is rejected without verifying its signature"""
+        itn['signature'] = "0" * 32
+        result = await ITNPipeline(client).run(itn, "203.0.113.1")
+        assert result.reason == SOURCE_IP
+        assert 'verify' not in result.timings
+
+    async def test_unknown_source_ip_skips_check(self, client, itn):
+        """Test the source IP check is skipped when the address is unknown"""
+        assert (await ITNPipeline(client).run(itn)).ok
+        assert await ITNPipeline(client).verify(itn)
+
+    async def test_verify_request_resolves_proxied_ip(self, client, itn):
+        """Test verify_request checks the address forwarded by a trusted proxy"""
+        app = FastAPI()
+
+        @app.post("/itn/{trust}")
+        async def notify(request: Request, trust: str):
+            pipeline = ITNPipeline(
+                client, trusted_proxies=["10.0.0.0/8"] if trust == "proxy" else ()
+            )
+            try:
+                await pipeline.verify_request(request)
+            except PayFastException as e:
+                raise e.to_http_exception()
+            return {'ok': True}
+
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.5", 1234))
+        headers = {'x-forwarded-for': PAYFAST_IP}
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            trusted = await http.post("/itn/proxy", data=itn, headers=headers)
+            untrusted = await http.post("/itn/direct", data=itn, headers=headers)
+
+        assert trusted.status_code == 200
+        assert untrusted.status_code == 400
+
+    async def test_standard_checks_order_amount(self, client, itn):
+        """Test unknown orders and wrong amounts are rejected"""
+        pipeline = ITNPipeline(client, order_lookup=lookup(None))
+        assert (await pipeline.run(itn, PAYFAST_IP)).reason == ORDER_NOT_FOUND
+        pipeline = ITNPipeline(client, order_lookup=lookup(250.0))
+        result = await pipeline.run(itn, PAYFAST_IP)
+        assert result.reason == AMOUNT_MISMATCH
+        with pytest.raises(InvalidAmountError):
+            await pipeline.verify(itn, PAYFAST_IP)
+
+    async def test_failed_order_lookup_is_rejection(self, client, itn):
+        """Test an order lookup error becomes a retryable rejection"""
+        async def order_lookup(m_payment_id):
+            raise ConnectionError("database unavailable")
+
+        pipeline = ITNPipeline(client, order_lookup=order_lookup)
+        result = await pipeline.run(itn, PAYFAST_IP)
+        assert result.reason == ORDER_LOOKUP_FAILED
+        assert result.detail == "database unavailable"
+        error = result.to_exception(client)
+        assert isinstance(error, ITNValidationError) and error.status_code == 503
+
+    async def test_strict_posts_back_without_signature(self, client, itn):
+        """Test the strict policy posts the fields back without the signature"""
+        seen = []
+        pipeline = ITNPipeline(
+            client, policy="strict", order_lookup=lookup(100.0), http_client=postback(seen=seen)
+        )
+        result = await pipeline.run(itn, PAYFAST_IP)
+        assert result.ok
+        assert set(result.timings) == {'verify', 'order', 'postback'}
+        assert "signature" not in seen[0] and "pf_payment_id=12345" in seen[0]
+
+    async def test_strict_rejects_invalid_postback(self, client, itn):
+        """Test an INVALID postback response is rejected"""
+        pipeline = ITNPipeline(client, policy="strict", http_client=postback("INVALID"))
+        assert (await pipeline.run(itn, PAYFAST_IP)).reason == POSTBACK_INVALID
+
+    async def test_io_checks_run_concurrently(self, client, itn):
+        """Test the order lookup and postback overlap"""
+        pipeline = ITNPipeline(
+            client,
+            policy="strict",
+            order_lookup=lookup(100.0, delay=0.1),
+            http_client=postback(delay=0.1)
+        )
+        started = time.perf_counter()
+        assert (await pipeline.run(itn, PAYFAST_IP)).ok
+        assert time.perf_counter() - started < 0.18
+
+    async def test_first_rejection_cancels_other_checks(self, client, itn):
+        """Test the first failed check ends the run"""
+        pipeline = ITNPipeline(
+            client, policy="strict", order_lookup=lookup(None), http_client=postback(delay=1.0)
+        )
+        started = time.perf_counter()
+        assert (await pipeline.run(itn, PAYFAST_IP)).reason == ORDER_NOT_FOUND
+        assert time.perf_counter() - started < 0.5
+
+    async def test_shared_deadline(self, client, itn):
+        """Test checks missing the deadline give a 503"""
+        pipeline = ITNPipeline(client, order_lookup=lookup(100.0, delay=1.0), deadline=0.05)
+        result = await pipeline.run(itn, PAYFAST_IP)
+        assert result.reason == DEADLINE_EXCEEDED
+        error = result.to_exception(client)
+        assert isinstance(error, ITNValidationError) and error.status_code == 503
@@ -0,0 +1,232 @@
+"""Tests for on-demand PayFast profiling"""
+
+import asyncio
+import sys
+import threading
+import urllib.parse
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from fastapi_payfast import PayFastClient, PayFastConfig, PayFastPaymentData
+from fastapi_payfast.asgi import payfast_itn_asgi
+from fastapi_payfast.debug import create_debug_router
+from fastapi_payfast.metrics import MetricsRegistry
+from fastapi_payfast.profiling import Profiler
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def client():
+    """Fixture for PayFast client"""
+    return PayFastClient(PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    ))
+
+
+@pytest.fixture
+def payment(client):
+    """Fixture for payment data"""
+    return PayFastPaymentData(
+        merchant_id=client.config.merchant_id,
+        merchant_key=client.config.merchant_key,
+        amount=100.00,
+        item_name="Test Product",
+        return_url="https://example.com/return",
+        cancel_url="https://example.com/cancel",
+        notify_url="https://example.com/notify"
+    )
+
+
+def itn_body(config):
+    fields = {
+        'm_payment_id': 'ORD-1',
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'amount_gross': '100.00',
+        'amount_fee': '-5.00',
+        'amount_net': '95.00',
+        'merchant_id': config.merchant_id,
+    }
+    fields['signature'] = generate_signature(fields, config.passphrase)
+    return urllib.parse.urlencode(fields)
+
+
+def unrelated_hot_function():
+    return sum(range(1000))
+
+
+class TestProfiler:
+    """Test suite for the profiler"""
+
+    def test_idle_profiler_installs_nothing(self, client):
+        """Test targets are only wrapped while a session runs"""
+        profiler = Profiler(client)
+        assert 'create_payment' not in vars(client)
+
+        profiler.start('cprofile')
+        assert 'create_payment' in vars(client)
+        profiler.stop()
+
+        assert 'create_payment' not in vars(client)
+        assert not profiler.active
+
+    def test_cprofile_reports_pstats(self, client, payment):
+        """Test cprofile output covers the signing path"""
+        profiler = Profiler(client)
+        profiler.start('cprofile')
+        for _ in range(5):
+            client.generate_payment_form(payment)
+        result = profiler.stop()
+
+        assert result.calls == 5
+        assert 'generate_signature' in result.output
+
+    async def test_cprofile_excludes_concurrent_tasks(self, client):
+        """Test work done by other tasks while an ITN is awaited is not profiled"""
+        app = FastAPI()
+
+        @app.post("/itn")
+        async def itn(request: Request):
+            await client.verify_itn(request)
+            return {}
+
+        async def busy():
+            for _ in range(200):
+                unrelated_hot_function()
+                await asyncio.sleep(0)
+
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        headers = {'content-type': 'application/x-www-form-urlencoded'}
+        profiler = Profiler(client)
+        profiler.start('cprofile')
+        await asyncio.gather(busy(), *(
+            http.post("/itn", content=itn_body(client.config), headers=headers)
+            for _ in range(5)
+        ))
+        result = profiler.stop()
+
+        assert result.calls == 5
+        assert 'generate_signature' in result.output
+        assert 'unrelated_hot_function' not in result.output
+
+    async def test_raw_asgi_endpoint_profiled(self, client):
+        """Test ITNs through the raw ASGI endpoint are profiled"""
+        async def handler(itn):
+            pass
+
+        app = payfast_itn_asgi(client, handler)
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+        profiler = Profiler(client)
+        profiler.start('cprofile')
+        response = await http.post(
+            "/", content=itn_body(client.config),
+            headers={'content-type': 'application/x-www-form-urlencoded'}
+        )
+        result = profiler.stop()
+
+        assert response.status_code == 200
+        assert result.calls == 1
+        assert 'generate_signature' in result.output
+
+    def test_sampling_collapsed_stacks(self, client, payment):
+        """Test sampling output is in collapsed-stack format"""
+        profiler = Profiler(client, interval=0.0005)
+        profiler.start('sampling')
+        stop = threading.Event()
+        threading.Timer(0.1, stop.set).start()
+        while not stop.is_set():
+            client.create_payment(payment)
+        result = profiler.stop()
+
+        stack, count = result.output.splitlines()[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert 'create_payment' in stack
+
+    def test_tracemalloc_mode(self, client, payment):
+        """Test tracemalloc output reports traced memory"""
+        profiler = Profiler(client)
+        profiler.start('tracemalloc')
+        kept = [client.create_payment(payment) for _ in range(50)]
+        result = profiler.stop()
+
+        assert kept and result.output.startswith("# traced current=")
+
+    def test_tracemalloc_scoped_to_targets(self, client, payment):
+        """Test allocations made outside the targets are not reported"""
+        profiler = Profiler(client)
+        profiler.start('tracemalloc')
+        kept = [client.create_payment(payment) for _ in range(50)]
+        unrelated = [MetricsRegistry() for _ in range(50)]
+        result = profiler.stop()
+
+        assert kept and unrelated
+        assert len(result.output.splitlines()) > 1
+        assert 'metrics.py' not in result.output
+
+    @pytest.mark.skipif(
+        sys.version_info >= (3, 12), reason="one cProfile can be active per process"
+    )
+    def test_cprofile_concurrent_threads(self, client, payment, monkeypatch):
+        """Test calls overlapping in several threads are all profiled"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def overlapping_signature(data, passphrase=None):
+            barrier.wait()
+            return generate_signature(data, passphrase)
+
+        monkeypatch.setattr('fastapi_payfast.client.generate_signature', overlapping_signature)
+        profiler = Profiler(client)
+        profiler.start('cprofile')
+        threads = [
+            threading.Thread(target=client.create_payment, args=(payment,)) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result = profiler.stop()
+
+        assert result.calls == 2
+        line = next(line for line in result.output.splitlines() if 'generate_signature' in line)
+        assert line.split()[0] == "2"
+
+    def test_single_session(self, client):
+        """Test only one session can run at a time"""
+        profiler = Profiler(client)
+        profiler.start('cprofile')
+        with pytest.raises(RuntimeError):
+            profiler.start('sampling')
+        profiler.stop()
+        with pytest.raises(ValueError):
+            profiler.start('perf')
+
+    async def test_run_is_time_bounded(self, client):
+        """Test sessions are capped at max_duration"""
+        profiler = Profiler(client, max_duration=0.01)
+        result = await asyncio.wait_for(profiler.run('cprofile', 60), timeout=1)
+        assert result.calls == 0
+        assert not profiler.active
+
+
+class TestProfileEndpoint:
+    """Test suite for the debug profile endpoint"""
+
+    def test_profile_endpoint(self, client):
+        """Test the profile route is guarded and validates the mode"""
+        app = FastAPI()
+        app.include_router(create_debug_router(client, token="s3cret", max_profile_duration=0.01))
+        http = TestClient(app)
+        headers = {"X-PayFast-Debug-Token": "s3cret"}
+
+        assert http.post("/payfast/debug/profile").status_code == 401
+        assert http.post("/payfast/debug/profile?mode=perf", headers=headers).status_code == 400
+        response = http.post("/payfast/debug/profile?mode=sampling&duration=5", headers=headers)
+        assert response.status_code == 200
+        assert response.headers['X-PayFast-Profile-Calls'] == "0"
@@ -0,0 +1,89 @@
+"""Tests for PayFast subscription revenue projection"""
+
+import random
+from datetime import date
+
+import pytest
+
+from fastapi_payfast import FrequencyType
+from fastapi_payfast.projection import np, project_revenue
+from fastapi_payfast.scheduler import BillingScheduler
+
+
+BACKENDS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(np is None, reason="numpy not installed")),
+]
+
+
+def random_subscriptions(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        rows.append((
+            rng.randint(100, 100000),
+            rng.choice(list(FrequencyType)).value,
+            date(rng.randint(2022, 2025), rng.randint(1, 12), rng.randint(1, 28)),
+            rng.choice([0, 1, 3, 12]),
+        ))
+    return rows
+
+
+class TestProjectRevenue:
+    """Test suite for project_revenue"""
+
+    @pytest.mark.parametrize("use_numpy", BACKENDS)
+    def test_simple_schedule(self, use_numpy):
+        """Test monthly and quarterly subscriptions land in the right months"""
+        projection = project_revenue(
+            amounts=[1000, 5000],
+            frequencies=[FrequencyType.MONTHLY, FrequencyType.QUARTERLY],
+            billing_dates=["2024-01-31", "2024-02-15"],
+            cycles=[3, 0],
+            start=date(2024, 1, 1),
+            months=6,
+            use_numpy=use_numpy,
+        )
+
+        assert projection.periods[0] == date(2024, 1, 1)
+        assert projection.amounts == [1000, 6000, 1000, 0, 5000, 0]
+        assert projection.total == 13000
+
+    @pytest.mark.parametrize("use_numpy", BACKENDS)
+    def test_billed_cycles_excluded(self, use_numpy):
+        """Test already-billed cycles are not projected again"""
+        projection = project_revenue(
+            [1000], [FrequencyType.MONTHLY], ["2024-01-01"], cycles=[4], billed=[2],
+            start=date(2024, 1, 1), months=6, use_numpy=use_numpy,
+        )
+        assert projection.amounts == [0, 0, 1000, 1000, 0, 0]
+
+    @pytest.mark.parametrize("use_numpy", BACKENDS)
+    def test_matches_scheduler(self, use_numpy):
+        """Test projections agree with what BillingScheduler would bill"""
+        rows = random_subscriptions(300)
+        start, months = date(2024, 6, 1), 36
+        projection = project_revenue(
+            [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows],
+            cycles=[r[3] for r in rows], start=start, months=months, use_numpy=use_numpy,
+        )
+
+        scheduler = BillingScheduler()
+        for i, (amount, frequency, billing_date, cycles) in enumerate(rows):
+            scheduler.add(str(i), billing_date, frequency, cycles, amount=amount)
+        expected = [0] * months
+        end = date(2027, 6, 1)
+        for subscription in iter(scheduler.peek, None):
+            if subscription.next_date >= end:
+                break
+            if subscription.next_date >= start:
+                index = (subscription.next_date.year - 2024) * 12 + subscription.next_date.month - 6
+                expected[index] += subscription.amount
+            scheduler.advance(subscription.key)
+
+        assert projection.amounts == expected
+
+    def test_unknown_frequency(self):
+        """Test invalid frequency codes are rejected"""
+        with pytest.raises(ValueError):
+            project_revenue([100], [9], ["2024-01-01"], use_numpy=False)
@@ -0,0 +1,148 @@
+"""Tests for the payment status hub"""
+
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_payfast.models import PayFastITNData
+from fastapi_payfast.pubsub import (
+    PaymentStatusHub,
+    SQLiteBackend,
+    create_status_router,
+)
+
+
+def make_itn(status="COMPLETE", m_payment_id="ORD-1"):
+    return PayFastITNData(
+        m_payment_id=m_payment_id,
+        pf_payment_id="12345",
+        payment_status=status,
+        item_name="Test Product",
+        amount_gross=100.00,
+        amount_fee=-5.00,
+        amount_net=95.00,
+        merchant_id="10000100",
+        signature="abc123",
+    )
+
+
+class TestPaymentStatusHub:
+    """Test suite for PaymentStatusHub"""
+
+    async def test_subscriber_receives_status(self):
+        """Test a subscriber receives the status of its order"""
+        hub = PaymentStatusHub()
+        with await hub.subscribe("ORD-1") as subscription:
+            await hub(make_itn())
+            event = await subscription.get(timeout=1)
+        assert event['payment_status'] == "COMPLETE"
+        assert hub.subscriber_count == 0
+
+    async def test_late_subscriber_gets_latest_event(self):
+        """Test a late subscriber receives only the latest retained event"""
+        hub = PaymentStatusHub()
+        await hub.publish_itn(make_itn("PENDING"))
+        await hub.publish_itn(make_itn("COMPLETE"))
+        with await hub.subscribe("ORD-1") as subscription:
+            assert (await subscription.get(timeout=1))['payment_status'] == "COMPLETE"
+            assert await subscription.get(timeout=0.01) is None
+
+    async def test_bounded_queue_drops_oldest(self):
+        """Test a full subscription queue drops its oldest events"""
+        hub = PaymentStatusHub(queue_size=2)
+        with await hub.subscribe("ORD-1") as subscription:
+            for index in range(5):
+                await hub.publish("ORD-1", {'seq': index})
+            assert subscription.dropped == 3
+            assert [(await subscription.get())['seq'] for _ in range(2)] == [3, 4]
+
+    async def test_retention_is_bounded(self):
+        """Test only the most recent orders are retained"""
+        hub = PaymentStatusHub(retain=2)
+        for index in range(5):
+            await hub.publish(f"ORD-{index}", {'seq': index})
+        assert list(hub._recent) == ["ORD-3", "ORD-4"]
+
+    async def test_sqlite_backend_fans_out_between_hubs(self, tmp_path):
+        """Test SQLiteBackend delivers events between hubs"""
+        path = str(tmp_path / "events.db")
+        publisher = PaymentStatusHub(SQLiteBackend(path, poll_interval=0.01))
+        listener = PaymentStatusHub(SQLiteBackend(path, poll_interval=0.01))
+        try:
+            with await listener.subscribe("ORD-1") as subscription:
+                await publisher.publish_itn(make_itn())
+                event = await subscription.get(timeout=2)
+            assert event['pf_payment_id'] == "12345"
+        finally:
+            await publisher.aclose()
+            await listener.aclose()
+
+    async def test_itn_without_order_id_ignored(self, tmp_path):
+        """Test an ITN without m_payment_id is not published"""
+        backend = SQLiteBackend(str(tmp_path / "events.db"), poll_interval=0.01)
+        hub = PaymentStatusHub(backend)
+        try:
+            await hub(make_itn(m_payment_id=None))
+            await hub(make_itn())
+            await asyncio.sleep(0.05)
+            assert list(hub._recent) == ["ORD-1"]
+        finally:
+            await hub.aclose()
+
+
+class TestStatusRouter:
+    """Test suite for the SSE and WebSocket status routes"""
+
+    async def test_sse_stream_ends_on_terminal_status(self):
+        """Test the SSE stream ends after a terminal status"""
+        hub = PaymentStatusHub()
+        app = FastAPI()
+        app.include_router(create_status_router(hub))
+        await hub.publish_itn(make_itn())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await asyncio.wait_for(
+                http.get("/payfast/status/ORD-1/events"), timeout=2
+            )
+        assert response.headers['content-type'].startswith("text/event-stream")
+        data = [line for line in response.text.splitlines() if line.startswith("data: ")]
+        assert json.loads(data[0][6:])['payment_status'] == "COMPLETE"
+        assert hub.subscriber_count == 0
+
+    async def test_sse_idle_stream_closes(self):
+        """Test an idle SSE stream sends keep-alives and closes"""
+        hub = PaymentStatusHub(idle_timeout=0.05, heartbeat=0.02)
+        app = FastAPI()
+        app.include_router(create_status_router(hub))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            response = await asyncio.wait_for(
+                http.get("/payfast/status/ORD-9/events"), timeout=2
+            )
+        assert ": keep-alive" in response.text
+        assert hub.subscriber_count == 0
+
+    async def test_sse_unstarted_stream_does_not_subscribe(self):
+        """Test a response whose stream never starts leaves no subscription"""
+        hub = PaymentStatusHub()
+        router = create_status_router(hub)
+        endpoint = next(route.endpoint for route in router.routes if route.path.endswith("/events"))
+        response = await endpoint("ORD-1")
+        assert hub.subscriber_count == 0
+        await response.body_iterator.aclose()
+        assert hub.subscriber_count == 0
+
+    def test_websocket(self):
+        """Test the WebSocket sends each status as JSON"""
+        hub = PaymentStatusHub()
+        app = FastAPI()
+        app.include_router(create_status_router(hub))
+        with TestClient(app) as client:
+            with client.websocket_connect("/payfast/status/ORD-1/ws") as websocket:
+                client.portal.call(hub.publish_itn, make_itn("PENDING"))
+                assert websocket.receive_json()['payment_status'] == "PENDING"
+                client.portal.call(hub.publish_itn, make_itn("COMPLETE"))
+                assert websocket.receive_json()['payment_status'] == "COMPLETE"
@@ -0,0 +1,186 @@
+"""Tests for token-bucket admission control"""
+
+import sqlite3
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+
+from fastapi_payfast.ratelimit import (
+    MemoryBuckets,
+    RateLimit,
+    RateLimitMiddleware,
+    SQLiteBuckets,
+    parse_networks,
+    resolve_client_ip,
+)
+
+
+def make_scope(client="203.0.113.5", forwarded=None, path="/checkout"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {
+        'type': 'http',
+        'method': 'POST',
+        'path': path,
+        'client': (client, 50000),
+        'headers': headers,
+    }
+
+
+class TestResolveClientIP:
+    """Test suite for resolve_client_ip"""
+
+    def test_untrusted_peer_ignores_header(self):
+        """Test X-Forwarded-For from an untrusted peer is ignored"""
+        assert resolve_client_ip(make_scope(forwarded="1.2.3.4")) == "203.0.113.5"
+
+    def test_trusted_peer_uses_rightmost_untrusted_hop(self):
+        """Test the right-most untrusted hop is the client behind a proxy"""
+        proxies = parse_networks(["10.0.0.0/8"])
+        forwarded = "6.6.6.6, 198.51.100.7, 10.0.0.9"
+        resolved = resolve_client_ip(make_scope("10.0.0.2", forwarded), proxies)
+        assert resolved == "198.51.100.7"
+
+    def test_trusted_peer_without_header(self):
+        """Test a trusted peer without the header is the client"""
+        proxies = parse_networks(["10.0.0.0/8"])
+        assert resolve_client_ip(make_scope("10.0.0.2"), proxies) == "10.0.0.2"
+
+
+class TestMemoryBuckets:
+    """Test suite for MemoryBuckets"""
+
+    def test_burst_then_refill(self):
+        """Test a bucket allows its burst and then refills at its rate"""
+        buckets = MemoryBuckets()
+        limit = RateLimit(rate=2, burst=3)
+        assert [buckets.allow("k", limit, now=0.0) for _ in range(4)] == [True, True, True, False]
+        assert not buckets.allow("k", limit, now=0.2)
+        assert buckets.allow("k", limit, now=0.6)
+
+    def test_keys_are_independent(self):
+        """Test each key has its own bucket"""
+        buckets = MemoryBuckets()
+        limit = RateLimit(rate=1, burst=1)
+        assert buckets.allow("a", limit, now=0.0)
+        assert not buckets.allow("a", limit, now=0.0)
+        assert buckets.allow("b", limit, now=0.0)
+
+    def test_bounded_key_count(self):
+        """Test the number of buckets kept is bounded"""
+        buckets = MemoryBuckets(max_keys=10)
+        limit = RateLimit(rate=1, burst=1)
+        for i in range(100):
+            buckets.allow(str(i), limit, now=0.0)
+        assert len(buckets._buckets) <= 10
+
+    def test_eviction_uses_each_buckets_limit(self):
+        """Test a slowly refilling bucket survives eviction triggered by a fast route"""
+        buckets = MemoryBuckets(max_keys=2)
+        slow, fast = RateLimit(rate=0.01, burst=1), RateLimit(rate=100, burst=1)
+        buckets.allow("slow", slow, now=0.0)
+        buckets.allow("fast", fast, now=0.0)
+        buckets.allow("other", fast, now=1.0)
+        assert set(buckets._buckets) == {"slow", "other"}
+        assert not buckets.allow("slow", slow, now=1.0)
+
+
+class TestSQLiteBuckets:
+    """Test suite for SQLiteBuckets"""
+
+    def test_state_is_shared_between_connections(self, tmp_path):
+        """Test connections to one database share bucket state"""
+        path = str(tmp_path / "buckets.db")
+        first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+        limit = RateLimit(rate=1, burst=2)
+        try:
+            assert first.allow("k", limit, now=100.0)
+            assert second.allow("k", limit, now=100.0)
+            assert not first.allow("k", limit, now=100.0)
+            assert second.allow("k", limit, now=101.0)
+        finally:
+            first.close()
+            second.close()
+
+    def test_locked_database_fails_open(self, tmp_path, caplog):
+        """Test a check that cannot get the write lock admits the request"""
+        path = str(tmp_path / "buckets.db")
+        buckets = SQLiteBuckets(path)
+        blocker = sqlite3.connect(path, isolation_level=None)
+        limit = RateLimit(rate=0, burst=1)
+        try:
+            assert buckets.allow("k", limit, now=0.0)
+            blocker.execute("BEGIN IMMEDIATE")
+            started = time.perf_counter()
+            assert buckets.allow("k", limit, now=0.0)
+            assert time.perf_counter() - started < 0.5
+            assert "failed open" in caplog.text
+        finally:
+            blocker.close()
+            buckets.close()
+
+    def test_prune(self, tmp_path):
+        """Test idle buckets are deleted by prune"""
+        buckets = SQLiteBuckets(str(tmp_path / "buckets.db"))
+        limit = RateLimit(rate=1, burst=1)
+        buckets.allow("k", limit, now=0.0)
+        buckets.prune(before=10.0)
+        assert buckets.allow("k", limit, now=0.0)
+        buckets.close()
+
+
+class TestRateLimitMiddleware:
+    """Test suite for RateLimitMiddleware"""
+
+    async def test_rejects_before_reading_body(self):
+        """Test limited requests get a 429 without their body being read"""
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope['path'])
+
+        async def receive():
+            raise AssertionError("body must not be read")
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = RateLimitMiddleware(app, {"/checkout": RateLimit(rate=0, burst=1)})
+        await middleware(make_scope(), receive, send)
+        await middleware(make_scope(), receive, send)
+        assert calls == ["/checkout"]
+        assert sent[0]['status'] == 429
+        assert (b"retry-after", b"1") in sent[0]['headers']
+
+    async def test_payfast_ranges_bypass(self):
+        """Test PayFast source addresses are never limited"""
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope['client'][0])
+
+        middleware = RateLimitMiddleware(app, {"/itn": RateLimit(rate=0, burst=1)})
+        for _ in range(3):
+            await middleware(make_scope("197.97.145.150", path="/itn"), None, None)
+        assert len(calls) == 3
+
+    async def test_with_fastapi(self):
+        """Test the middleware only limits configured paths of a FastAPI app"""
+        app = FastAPI()
+
+        @app.post("/checkout")
+        async def checkout(request: Request):
+            return {}
+
+        @app.get("/health")
+        async def health():
+            return {}
+
+        app.add_middleware(RateLimitMiddleware, limits={"/checkout": RateLimit(rate=0, burst=2)})
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            codes = [(await http.post("/checkout")).status_code for _ in range(3)]
+            assert codes == [200, 200, 429]
+            assert (await http.get("/health")).status_code == 200
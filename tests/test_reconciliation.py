@@ -0,0 +1,93 @@
+"""Tests for PayFast ITN reconciliation"""
+
+import pytest
+
+from fastapi_payfast import PayFastITNData
+from fastapi_payfast.reconciliation import Category, FeeSchedule, Reconciler, np, reconcile
+
+
+BACKENDS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(np is None, reason="numpy not installed")),
+]
+
+
+def itn(m_payment_id, pf_payment_id, gross="100.00", fee="-3.50", status="COMPLETE"):
+    return {
+        "m_payment_id": m_payment_id,
+        "pf_payment_id": pf_payment_id,
+        "payment_status": status,
+        "amount_gross": gross,
+        "amount_fee": fee,
+    }
+
+
+class TestReconciler:
+    """Test suite for Reconciler"""
+
+    def test_categories(self):
+        """Test each category is detected"""
+        ledger = [
+            {"m_payment_id": "A", "amount": 10000},
+            {"m_payment_id": "B", "amount": 10000},
+            ("C", 5000),
+            ("D", 10000),
+        ]
+        itns = [
+            itn("A", "1"),
+            itn("A", "1"),               # same pf_payment_id and status again
+            itn("B", "2", gross="99.00"),
+            itn("C", "3", status="PENDING"),
+            itn("A", "4"),               # second payment for a settled order
+            itn("Z", "5"),
+            itn("Z", "5"),               # retried ITN for an unknown order
+            itn("D", "6"),
+        ]
+
+        report = list(reconcile(itns, ledger))
+        categories = [(r.category, r.m_payment_id) for r in report]
+
+        assert categories == [
+            (Category.MATCHED, "A"),
+            (Category.DUPLICATE, "A"),
+            (Category.AMOUNT_MISMATCH, "B"),
+            (Category.NOT_COMPLETE, "C"),
+            (Category.DUPLICATE, "A"),
+            (Category.UNKNOWN_ORDER, "Z"),
+            (Category.DUPLICATE, "Z"),
+            (Category.MATCHED, "D"),
+            (Category.MISSING_ITN, "C"),
+        ]
+        assert report[2].expected == 10000 and report[2].received == 9900
+        assert report[3].detail == "PENDING"
+        assert report[1].detail == "Duplicate pf_payment_id"
+        assert report[4].detail == "Order already settled by another payment"
+
+    @pytest.mark.parametrize("use_numpy", BACKENDS)
+    def test_fee_anomalies(self, use_numpy):
+        """Test fees outside the expected rate are flagged"""
+        reconciler = Reconciler(FeeSchedule(rate=0.035, fixed=0, tolerance=1), batch_size=2,
+                                use_numpy=use_numpy)
+        ledger = [(str(i), 10000) for i in range(5)]
+        itns = [itn(str(i), str(i), fee="-3.50") for i in range(4)] + [itn("4", "4", fee="-9.00")]
+
+        report = list(reconciler.reconcile(itns, ledger))
+
+        assert reconciler.counts == {Category.MATCHED: 4, Category.FEE_ANOMALY: 1}
+        anomaly = [r for r in report if r.category == Category.FEE_ANOMALY][0]
+        assert (anomaly.m_payment_id, anomaly.expected, anomaly.received) == ("4", 350, 900)
+
+    def test_accepts_itn_models(self):
+        """Test PayFastITNData objects are reconciled by float amounts"""
+        model = PayFastITNData(
+            m_payment_id="A", pf_payment_id="1", payment_status="COMPLETE", item_name="X",
+            amount_gross=100.10, amount_fee=-2.30, amount_net=97.80,
+            merchant_id="10000100", signature="abc",
+        )
+        report = list(reconcile([model], [("A", 10010)]))
+        assert [r.category for r in report] == [Category.MATCHED]
+
+    def test_duplicate_ledger_rows(self):
+        """Test repeated ledger keys are reported"""
+        report = list(reconcile([], [("A", 100), ("A", 100)]))
+        assert [r.category for r in report] == [Category.DUPLICATE, Category.MISSING_ITN]
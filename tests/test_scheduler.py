@@ -0,0 +1,136 @@
+"""Tests for PayFast recurring billing scheduler"""
+
+from datetime import date
+
+import pytest
+
+from fastapi_payfast import FrequencyType, PayFastITNData, PayFastPaymentData, PaymentStatus
+from fastapi_payfast.scheduler import BillingScheduler, add_months, billing_date_for
+
+
+def make_itn(token, status, pf_payment_id="1"):
+    return PayFastITNData(
+        pf_payment_id=pf_payment_id,
+        payment_status=status,
+        item_name="Plan",
+        amount_gross=99.00,
+        amount_fee=2.00,
+        amount_net=97.00,
+        merchant_id="10000100",
+        signature="abc123",
+        token=token,
+    )
+
+
+class TestBillingDates:
+    """Test suite for billing date arithmetic"""
+
+    def test_add_months_clamps_month_end(self):
+        """Test month-end dates are clamped"""
+        assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+        assert add_months(date(2023, 1, 31), 1) == date(2023, 2, 28)
+        assert add_months(date(2024, 11, 15), 3) == date(2025, 2, 15)
+
+    def test_anchor_survives_short_months(self):
+        """Test cycles are computed from the original anchor day"""
+        start = date(2024, 1, 31)
+        dates = [billing_date_for(start, FrequencyType.MONTHLY, n) for n in range(4)]
+        assert dates == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+
+    @pytest.mark.parametrize("frequency,expected", [
+        (FrequencyType.QUARTERLY, date(2024, 4, 15)),
+        (FrequencyType.BIANNUAL, date(2024, 7, 15)),
+        (FrequencyType.ANNUAL, date(2025, 1, 15)),
+    ])
+    def test_frequencies(self, frequency, expected):
+        """Test each frequency's period length"""
+        assert billing_date_for(date(2024, 1, 15), frequency, 1) == expected
+
+
+class TestBillingScheduler:
+    """Test suite for BillingScheduler"""
+
+    def test_pop_due_only_returns_due(self):
+        """Test only due subscriptions are popped, in date order"""
+        scheduler = BillingScheduler()
+        scheduler.add("b", "2024-01-10", FrequencyType.MONTHLY)
+        scheduler.add("a", "2024-01-05", FrequencyType.MONTHLY)
+        scheduler.add("c", "2024-02-01", FrequencyType.MONTHLY)
+
+        due = [s.key for s in scheduler.pop_due(date(2024, 1, 31))]
+
+        assert due == ["a", "b"]
+        assert scheduler.peek().key == "c"
+        assert len(scheduler) == 3
+
+    def test_advance_consumes_cycles(self):
+        """Test a finite subscription is dropped after its last cycle"""
+        scheduler = BillingScheduler()
+        scheduler.add("a", "2024-01-31", FrequencyType.MONTHLY, cycles=2)
+
+        assert scheduler.advance("a").next_date == date(2024, 2, 29)
+        assert scheduler.get("a").remaining_cycles == 1
+        assert scheduler.advance("a") is None
+        assert "a" not in scheduler
+        assert list(scheduler.pop_due(date(2030, 1, 1))) == []
+
+    def test_apply_itn(self):
+        """Test COMPLETE advances, FAILED requeues and CANCELLED removes"""
+        scheduler = BillingScheduler()
+        scheduler.add("tok-1", "2024-01-01", FrequencyType.MONTHLY)
+        scheduler.add("tok-2", "2024-01-01", FrequencyType.MONTHLY)
+        assert len(list(scheduler.pop_due(date(2024, 1, 1)))) == 2
+
+        scheduler.apply_itn(make_itn("tok-1", PaymentStatus.COMPLETE))
+        scheduler.apply_itn(make_itn("tok-2", PaymentStatus.FAILED))
+
+        assert [s.key for s in scheduler.pop_due(date(2024, 1, 2))] == ["tok-2"]
+        assert scheduler.get("tok-1").next_date == date(2024, 2, 1)
+
+        scheduler.apply_itn(make_itn("tok-1", PaymentStatus.CANCELLED))
+        assert "tok-1" not in scheduler
+        assert list(scheduler.pop_due(date(2030, 1, 1))) == []
+
+    def test_apply_itn_ignores_retries(self):
+        """Test a retried COMPLETE ITN does not skip a billing cycle"""
+        scheduler = BillingScheduler()
+        scheduler.add("tok-1", "2024-01-01", FrequencyType.MONTHLY)
+        list(scheduler.pop_due(date(2024, 1, 1)))
+
+        scheduler.apply_itn(make_itn("tok-1", PaymentStatus.COMPLETE, "1001"))
+        subscription = scheduler.apply_itn(make_itn("tok-1", PaymentStatus.COMPLETE, "1001"))
+
+        assert subscription.billed == 1
+        assert subscription.next_date == date(2024, 2, 1)
+
+        scheduler.apply_itn(make_itn("tok-1", PaymentStatus.COMPLETE, "1002"))
+        assert subscription.billed == 2
+        assert subscription.next_date == date(2024, 3, 1)
+
+    def test_add_payment_data(self):
+        """Test scheduling from PayFastPaymentData"""
+        payment_data = PayFastPaymentData(
+            merchant_id="10000100",
+            merchant_key="46f0cd694581a",
+            amount=99.00,
+            item_name="Plan",
+            subscription_type=1,
+            billing_date="2024-03-31",
+            recurring_amount=49.99,
+            frequency=FrequencyType.QUARTERLY,
+            cycles=4,
+        )
+        subscription = BillingScheduler().add_payment_data("tok", payment_data, billed=1)
+
+        assert subscription.amount == 4999
+        assert subscription.next_date == date(2024, 6, 30)
+        assert subscription.remaining_cycles == 3
+
+    def test_stale_entries_compacted(self):
+        """Test repeated advances do not grow the heap unboundedly"""
+        scheduler = BillingScheduler()
+        scheduler.add("a", "2024-01-01", FrequencyType.MONTHLY)
+        for _ in range(500):
+            scheduler.advance("a")
+        assert len(scheduler._heap) < 100
+        assert scheduler.peek().billed == 500
@@ -0,0 +1,167 @@
+"""Tests for the local PayFast simulator"""
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from fastapi_payfast import PayFastClient, PayFastConfig, PayFastException, PayFastPaymentData
+from fastapi_payfast.pipeline import ITNPipeline
+from fastapi_payfast.testing.simulator import create_simulator
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def create_merchant(config):
+    """Merchant app recording every verified ITN"""
+    client = PayFastClient(config)
+    app = FastAPI()
+    app.state.itns = []
+
+    @app.post("/itn")
+    async def itn(request: Request):
+        try:
+            itn_data = await client.verify_itn(request)
+        except PayFastException as e:
+            raise e.to_http_exception()
+        app.state.itns.append(itn_data)
+        return {}
+
+    return app
+
+
+def checkout_form(config, m_payment_id="ORD-1", amount=100.00):
+    payment = PayFastPaymentData(
+        merchant_id=config.merchant_id,
+        merchant_key=config.merchant_key,
+        amount=amount,
+        item_name="Test Product",
+        m_payment_id=m_payment_id,
+        notify_url="http://merchant/itn"
+    )
+    return PayFastClient(config).create_payment(payment)['data']
+
+
+async def run_checkouts(config, forms, **options):
+    merchant = create_merchant(config)
+    app = create_simulator(
+        config,
+        notify_transport=httpx.ASGITransport(app=merchant),
+        retry_backoff=0,
+        seed=1,
+        **options
+    )
+    simulator = app.state.simulator
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://payfast") as http:
+        responses = [await http.post("/eng/process", data=form) for form in forms]
+        await simulator.drain()
+        await simulator.close()
+    return responses, merchant.state.itns, simulator
+
+
+class TestSimulator:
+    """Test suite for the PayFast simulator"""
+
+    async def test_checkout_to_itn(self, config):
+        """Test a signed checkout produces a verifiable ITN"""
+        responses, itns, simulator = await run_checkouts(config, [checkout_form(config)])
+
+        assert responses[0].status_code == 200
+        assert itns[0].m_payment_id == "ORD-1"
+        assert itns[0].payment_status == "COMPLETE"
+        assert itns[0].amount_gross == 100.00
+        assert itns[0].amount_net == pytest.approx(100.00 - 5.50)
+        assert len(simulator.latencies) == 1
+
+    async def test_rejects_bad_checkout_signature(self, config):
+        """Test checkouts are verified with PayFast's signature rules"""
+        form = checkout_form(config)
+        form['amount'] = '1.0'
+        responses, itns, simulator = await run_checkouts(config, [form])
+
+        assert responses[0].status_code == 400
+        assert responses[0].json()['error'] == "Signature mismatch"
+        assert itns == []
+
+    async def test_duplicates_and_failures(self, config):
+        """Test duplicate and failure injection"""
+        forms = [checkout_form(config, f"ORD-{i}") for i in range(20)]
+        _, itns, simulator = await run_checkouts(
+            config, forms, duplicate_rate=1.0, failure_rate=0.5
+        )
+
+        assert len(itns) == 40
+        assert simulator.stats['itn_duplicates'] == 20
+        assert 0 < sum(itn.payment_status == "FAILED" for itn in itns) < 40
+
+    async def test_corrupt_itns_retried_then_abandoned(self, config):
+        """Test rejected deliveries are retried up to the limit"""
+        _, itns, simulator = await run_checkouts(
+            config, [checkout_form(config)], corrupt_rate=1.0, retries=2
+        )
+
+        assert itns == []
+        assert simulator.stats['itn_sent'] == 3
+        assert simulator.stats['itn_status_400'] == 3
+        assert simulator.stats['itn_abandoned'] == 1
+
+    async def test_validate_postback(self, config):
+        """Test the validate endpoint confirms only ITNs it sent"""
+        _, itns, simulator = await run_checkouts(config, [checkout_form(config)])
+        sent = simulator.sent[itns[0].pf_payment_id]
+        app = create_simulator(config)
+        app.state.simulator.sent = simulator.sent
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://payfast") as http:
+            valid = await http.post("/eng/query/validate", data=sent)
+            invalid = await http.post("/eng/query/validate", data={**sent, 'amount_gross': '1.00'})
+
+        assert valid.text == "VALID"
+        assert invalid.text == "INVALID"
+
+    async def test_strict_pipeline_end_to_end(self, config):
+        """Test the strict pipeline's postback is confirmed by the simulator"""
+        # ASGITransport requests come from 127.0.0.1, not a PayFast address
+        config = config.model_copy(update={'validate_ip': False})
+        app = create_simulator(config, retry_backoff=0, retries=0)
+        simulator = app.state.simulator
+        pipeline = ITNPipeline(
+            PayFastClient(config),
+            policy="strict",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        )
+        merchant = FastAPI()
+        results = []
+
+        @merchant.post("/itn")
+        async def itn(request: Request):
+            results.append(await pipeline.run(dict(await request.form())))
+            return {}
+
+        simulator.notify_transport = httpx.ASGITransport(app=merchant)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://payfast") as http:
+            await http.post("/eng/process", data=checkout_form(config))
+            await simulator.drain()
+            await simulator.close()
+        await pipeline.aclose()
+
+        assert [(result.ok, result.reason) for result in results] == [(True, None)]
+
+    async def test_sent_itns_are_bounded(self, config):
+        """Test only the most recent ITNs are kept for postbacks"""
+        forms = [checkout_form(config, f"ORD-{i}") for i in range(5)]
+        _, itns, simulator = await run_checkouts(config, forms, max_sent=2)
+
+        assert len(itns) == 5
+        assert list(simulator.sent) == [itns[-2].pf_payment_id, itns[-1].pf_payment_id]
@@ -0,0 +1,105 @@
+"""Tests for PayFast ITN tracing"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from fastapi_payfast import InvalidMerchantError, PayFastClient, PayFastConfig
+from fastapi_payfast.debug import create_debug_router
+from fastapi_payfast.tracing import ITNTracer
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def make_request(config, merchant_id=None):
+    form_data = {
+        'merchant_id': merchant_id or config.merchant_id,
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'amount_gross': '100.00',
+        'amount_fee': '5.00',
+        'amount_net': '95.00',
+    }
+    form_data['signature'] = generate_signature(form_data, config.passphrase)
+    request = Mock(spec=Request)
+    request.body = AsyncMock(return_value=b"")
+    request.form = AsyncMock(return_value=form_data)
+    request.client = Mock()
+    request.client.host = "197.97.145.144"
+    return request
+
+
+class TestITNTracer:
+    """Test suite for ITN tracing"""
+
+    async def test_stages_recorded_and_sampled(self, config):
+        """Test every stage is recorded and slow traces are sampled"""
+        tracer = ITNTracer(slow_threshold=0.0)
+        client = PayFastClient(config, tracer=tracer)
+
+        await client.verify_itn(make_request(config))
+
+        sample = tracer.samples[0]
+        assert sample['outcome'] == 'ok'
+        assert sample['pf_payment_id'] == '12345'
+        assert list(sample['stages_ms']) == ['body', 'form', 'signature', 'merchant', 'model']
+
+    async def test_fast_traces_not_sampled(self, config):
+        """Test traces under the threshold only reach hooks"""
+        seen = []
+        tracer = ITNTracer(slow_threshold=10.0, hooks=[seen.append])
+        client = PayFastClient(config, tracer=tracer)
+
+        await client.verify_itn(make_request(config))
+
+        assert len(tracer.samples) == 0
+        assert [span[0] for span in seen[0].spans()][-1] == 'model'
+
+    async def test_rejections_traced(self, config):
+        """Test failed verifications are traced with their exception name"""
+        tracer = ITNTracer(slow_threshold=0.0, sample_size=1)
+        client = PayFastClient(config, tracer=tracer)
+
+        with pytest.raises(InvalidMerchantError):
+            await client.verify_itn(make_request(config, merchant_id="other"))
+
+        assert tracer.samples[0]['outcome'] == 'InvalidMerchantError'
+
+    async def test_broken_hook_does_not_reject(self, config):
+        """Test hook errors do not fail verification"""
+        def broken(trace):
+            raise RuntimeError("exporter down")
+
+        client = PayFastClient(config, tracer=ITNTracer(hooks=[broken]))
+        itn_data = await client.verify_itn(make_request(config))
+        assert itn_data.pf_payment_id == '12345'
+
+
+class TestDebugRouter:
+    """Test suite for the slow-ITN debug endpoint"""
+
+    def test_requires_token(self, config):
+        """Test the endpoint is guarded and dumps samples"""
+        tracer = ITNTracer()
+        tracer.samples.append({'outcome': 'ok'})
+        app = FastAPI()
+        client = PayFastClient(config, tracer=tracer)
+        app.include_router(create_debug_router(client, token="s3cret"))
+        http = TestClient(app)
+
+        assert http.get("/payfast/debug/slow-itns").status_code == 401
+        response = http.get("/payfast/debug/slow-itns", headers={"X-PayFast-Debug-Token": "s3cret"})
+        assert response.json()['samples'] == [{'outcome': 'ok'}]
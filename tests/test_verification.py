@@ -0,0 +1,130 @@
+"""Tests for non-raising ITN verification"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import Request
+
+from fastapi_payfast import (
+    InvalidMerchantError,
+    PayFastClient,
+    PayFastConfig,
+    SignatureVerificationError,
+)
+from fastapi_payfast.client import rejection_response
+from fastapi_payfast.core import (
+    INVALID_DATA,
+    MERCHANT_MISMATCH,
+    MISSING_SIGNATURE,
+    SIGNATURE_MISMATCH,
+    try_verify_itn_data
+)
+from fastapi_payfast.metrics import SIGNATURE_FAILURES, MetricsRegistry
+from fastapi_payfast.utils import generate_signature
+
+
+@pytest.fixture
+def config():
+    """Fixture for PayFast configuration"""
+    return PayFastConfig(
+        merchant_id="10000100",
+        merchant_key="46f0cd694581a",
+        passphrase="jt7NOE43FZPn",
+        sandbox=True
+    )
+
+
+def signed(config, **overrides):
+    fields = {
+        'pf_payment_id': '12345',
+        'payment_status': 'COMPLETE',
+        'item_name': 'Test Product',
+        'amount_gross': '100.00',
+        'amount_fee': '-5.00',
+        'amount_net': '95.00',
+        'merchant_id': config.merchant_id,
+    }
+    fields.update(overrides)
+    fields['signature'] = generate_signature(fields, config.passphrase)
+    return fields
+
+
+def make_request(form_data):
+    request = Mock(spec=Request)
+    request.form = AsyncMock(return_value=form_data)
+    request.client = Mock()
+    request.client.host = "197.97.145.144"
+    return request
+
+
+class TestTryVerifyITN:
+    """Test suite for try_verify_itn"""
+
+    async def test_ok(self, config):
+        """Test a valid ITN returns its data"""
+        result = await PayFastClient(config).try_verify_itn(make_request(signed(config)))
+
+        assert result.ok
+        assert result.reason is None
+        assert result.data.pf_payment_id == '12345'
+
+    @pytest.mark.parametrize("fields, reason", [
+        ({'pf_payment_id': '1'}, MISSING_SIGNATURE),
+        (dict(signature='0' * 32), SIGNATURE_MISMATCH),
+    ])
+    async def test_signature_rejections(self, config, fields, reason):
+        """Test signature failures return reasons and still count in metrics"""
+        metrics = MetricsRegistry()
+        result = await PayFastClient(config, metrics=metrics).try_verify_itn(make_request(fields))
+
+        assert (result.ok, result.reason, result.data) == (False, reason, None)
+        assert metrics.collect()[0][(SIGNATURE_FAILURES, ())] == 1
+
+    async def test_rejections_are_preallocated(self, config):
+        """Test rejection results are shared and responses built per request"""
+        client = PayFastClient(config)
+        first = await client.try_verify_itn(make_request(signed(config, merchant_id="1")))
+        second = await client.try_verify_itn(make_request(signed(config, merchant_id="2")))
+
+        assert first is second
+        assert first.reason == MERCHANT_MISMATCH
+        response = rejection_response(first.reason)
+        assert response.status_code == 400
+        assert response.body == b'{"detail":"Merchant ID mismatch"}'
+        assert response.headers['content-type'] == "application/json"
+        assert rejection_response(first.reason) is not response
+
+    async def test_invalid_data(self, config):
+        """Test model validation failures carry their detail"""
+        result = await PayFastClient(config).try_verify_itn(
+            make_request(signed(config, amount_gross='lots'))
+        )
+
+        assert result.reason == INVALID_DATA
+        assert 'amount_gross' in result.detail
+
+
+class TestRaisingWrapper:
+    """Test the raising API keeps its exceptions and messages"""
+
+    @pytest.mark.parametrize("fields, error, message", [
+        ({}, SignatureVerificationError, "Missing signature"),
+        ({'signature': 'x'}, SignatureVerificationError, "Signature mismatch"),
+    ])
+    async def test_signature_messages(self, config, fields, error, message):
+        """Test signature rejections raise with the original messages"""
+        with pytest.raises(error, match=f"^{message}$"):
+            await PayFastClient(config).verify_itn(make_request(fields))
+
+    async def test_merchant_message(self, config):
+        """Test merchant mismatches still name the expected merchant"""
+        with pytest.raises(InvalidMerchantError, match="Merchant ID mismatch: expected 10000100"):
+            await PayFastClient(config).verify_itn(make_request(signed(config, merchant_id="1")))
+
+    def test_core_matches_client(self, config):
+        """Test the framework-free check agrees with the client"""
+        assert try_verify_itn_data(signed(config), config).ok
+        result = try_verify_itn_data(signed(config, merchant_id="1"), config)
+        assert result.reason == MERCHANT_MISMATCH
+        with pytest.raises(SignatureVerificationError, match="Invalid ITN data"):
+            PayFastClient(config).verify_itn_data(signed(config, amount_gross='lots'))
@@ -0,0 +1,93 @@
+"""Tests for client warm-up"""
+
+import gc
+from unittest.mock import AsyncMock
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_payfast import PayFastClient, PayFastConfig, PayFastITNData, PayFastPaymentData
+from fastapi_payfast.api import PayFastAPI
+from fastapi_payfast.lifespan import payfast_lifespan
+from fastapi_payfast.metrics import MetricsRegistry
+from fastapi_payfast.testing.stub_api import create_stub_api
+from fastapi_payfast.tracing import ITNTracer
+
+
+def make_config(**overrides):
+    return PayFastConfig(**dict({
+        'merchant_id': "10000100",
+        'merchant_key': "46f0cd694581a",
+        'passphrase': "jt7NOE43FZPn",
+        'sandbox': True,
+    }, **overrides))
+
+
+class TestWarmup:
+    """Test suite for PayFastClient.warmup"""
+
+    def test_builds_models_without_recording(self):
+        """Test warm-up completes model schemas and records no metrics or traces"""
+        metrics = MetricsRegistry()
+        tracer = ITNTracer(slow_threshold=0.0)
+        client = PayFastClient(make_config(), metrics=metrics, tracer=tracer)
+
+        client.warmup()
+
+        assert PayFastPaymentData.__pydantic_complete__
+        assert PayFastITNData.__pydantic_complete__
+        assert metrics.collect() == ({}, {})
+        assert len(tracer.samples) == 0
+
+    def test_freeze(self):
+        """Test warm-up can move surviving objects to the permanent generation"""
+        try:
+            PayFastClient(make_config()).warmup(freeze=True)
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+
+    def test_precomputed_process_url(self):
+        """Test the process URL follows the configured environment"""
+        client = PayFastClient(make_config(sandbox=False))
+        assert client._process_url == "https://www.payfast.co.za/eng/process"
+
+
+class TestLifespan:
+    """Test suite for the lifespan helper"""
+
+    def test_primes_api_and_closes(self):
+        """Test the lifespan pings the API on startup and closes it on shutdown"""
+        config = make_config()
+        calls = []
+        stub = create_stub_api(config)
+        transport = httpx.ASGITransport(app=stub)
+
+        async def record(request):
+            calls.append(request.url.path)
+            return await transport.handle_async_request(request)
+
+        api = PayFastAPI(config, http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(record), base_url=config.api_url
+        ))
+        api.aclose = AsyncMock()
+        app = FastAPI(lifespan=payfast_lifespan(PayFastClient(config), api))
+
+        with TestClient(app):
+            assert calls == ["/ping"]
+        api.aclose.assert_awaited_once()
+
+    def test_failed_ping_does_not_block_startup(self):
+        """Test an unreachable API only logs a warning"""
+        config = make_config()
+
+        def refuse(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(refuse))
+        api = PayFastAPI(config, http_client=http_client)
+        app = FastAPI(lifespan=payfast_lifespan(PayFastClient(config), api))
+
+        with TestClient(app):
+            pass
@@ -0,0 +1,129 @@
+"""Tests for the write-behind status buffer"""
+
+import asyncio
+
+import pytest
+
+from fastapi_payfast import PayFastITNData
+from fastapi_payfast.writebehind import WriteBehindBuffer
+
+
+class RecordingWriter:
+    def __init__(self, fail=0):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, batch):
+        await asyncio.sleep(0)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database down")
+        self.batches.append([(update.m_payment_id, update.status) for update in batch])
+
+
+def make_itn(pf_payment_id, m_payment_id=None, status="COMPLETE"):
+    return PayFastITNData(
+        m_payment_id=m_payment_id,
+        pf_payment_id=pf_payment_id,
+        payment_status=status,
+        item_name="Test Product",
+        amount_gross=100.00,
+        amount_fee=-5.00,
+        amount_net=95.00,
+        merchant_id="10000100",
+        signature="abc123",
+    )
+
+
+class TestWriteBehindBuffer:
+    """Test suite for WriteBehindBuffer"""
+
+    async def test_collapses_to_latest_status(self):
+        """Test concurrent updates for one order collapse to the last one"""
+        writer = RecordingWriter()
+        buffer = WriteBehindBuffer(writer, max_batch=100, max_delay=0.01)
+        await asyncio.gather(
+            buffer.submit("ORD-1", "PENDING"),
+            buffer.submit("ORD-2", "COMPLETE"),
+            buffer.submit("ORD-1", "COMPLETE"),
+        )
+
+        assert writer.batches == [[("ORD-1", "COMPLETE"), ("ORD-2", "COMPLETE")]]
+        assert buffer.stats['collapsed'] == 1
+        await buffer.aclose()
+
+    async def test_flushes_by_size(self):
+        """Test a full batch is written without waiting for max_delay"""
+        writer = RecordingWriter()
+        buffer = WriteBehindBuffer(writer, max_batch=2, max_delay=60)
+        await asyncio.wait_for(asyncio.gather(
+            buffer.submit("ORD-1", "COMPLETE"),
+            buffer.submit("ORD-2", "COMPLETE"),
+        ), timeout=1)
+
+        assert len(writer.batches) == 1
+        await buffer.aclose()
+
+    async def test_not_acknowledged_before_written(self):
+        """Test submit waits until the batch holding the update is written"""
+        release = asyncio.Event()
+        written = []
+
+        async def slow_writer(batch):
+            await release.wait()
+            written.extend(batch)
+
+        buffer = WriteBehindBuffer(slow_writer, max_delay=0)
+        submit = asyncio.ensure_future(buffer.submit("ORD-1", "COMPLETE"))
+        await asyncio.sleep(0.01)
+        assert not submit.done()
+
+        release.set()
+        await submit
+        assert written[0].m_payment_id == "ORD-1"
+        await buffer.aclose()
+
+    async def test_writer_failure_reaches_every_submitter(self):
+        """Test a failed write is raised to every update in the batch"""
+        writer = RecordingWriter(fail=1)
+        buffer = WriteBehindBuffer(writer, max_delay=0.01)
+        results = await asyncio.gather(
+            buffer.submit("ORD-1", "COMPLETE"),
+            buffer.submit("ORD-2", "COMPLETE"),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        await buffer.submit("ORD-1", "COMPLETE")
+        assert writer.batches == [[("ORD-1", "COMPLETE")]]
+        assert buffer.stats['failed_batches'] == 1
+        await buffer.aclose()
+
+    async def test_itns_without_order_id_skipped(self):
+        """Test ITNs without an m_payment_id do not overwrite each other"""
+        writer = RecordingWriter()
+        buffer = WriteBehindBuffer(writer, max_delay=0.01)
+        await asyncio.gather(
+            buffer(make_itn("1001")),
+            buffer(make_itn("1002")),
+            buffer(make_itn("1003", "ORD-3")),
+        )
+
+        assert writer.batches == [[("ORD-3", "COMPLETE")]]
+        assert buffer.stats['skipped'] == 2
+        with pytest.raises(ValueError):
+            await buffer.submit(None, "COMPLETE")
+        await buffer.aclose()
+
+    async def test_close_flushes_and_rejects_new_updates(self):
+        """Test aclose writes pending updates and refuses new ones"""
+        writer = RecordingWriter()
+        buffer = WriteBehindBuffer(writer, max_delay=60)
+        submit = asyncio.ensure_future(buffer.submit("ORD-1", "COMPLETE"))
+        await asyncio.sleep(0)
+        await buffer.aclose()
+        await submit
+
+        assert writer.batches == [[("ORD-1", "COMPLETE")]]
+        with pytest.raises(RuntimeError):
+            await buffer.submit("ORD-2", "COMPLETE")